@@ -81,6 +81,7 @@ setup(
         "dev": ["pytest", "black", "isort", "flake8"],
         "plots": ["plotly", "matplotlib"],
         "aggregation": ["tsam"],
+        "parquet": ["pyarrow"],
         "geometry": ["shapely", "scipy", "pyproj", "geojson", "pyshp"],
     },
     entry_points={"console_scripts": ["ota = oemof.tabular.cli:main"]},
@@ -24,6 +24,7 @@ import warnings
 from collections import deque
 from dataclasses import dataclass
 
+from oemof.network import __version__ as oemof_network_version
 from oemof.network.energy_system import EnergySystem
 from oemof.network.network import Node
 from oemof.solph import Investment
@@ -50,42 +51,59 @@ def kwargs_to_parent(cls):
     """
     original_init = cls.__init__
 
+    # The construction plan, i.e. the fields of the dataclass, the arguments
+    # expected by the parent's __init__ and whether that accepts
+    # `custom_attributes`, is the same for all instances, so it is set up
+    # once per class instead of once per instance and argument.
+    fields = tuple(f.name for f in dataclasses.fields(cls))
+    field_names = frozenset(fields)
+    plans = {}
+    # The names of the arguments, shared by all instances given the same.
+    names = {}
+
+    def plan(self):
+        # The parent depends on the MRO of the instance's type.
+        if type(self) not in plans:
+            expected = frozenset(
+                inspect.signature(super(cls, self).__init__).parameters
+            )
+            plans[type(self)] = (expected, "custom_attributes" in expected)
+        return plans[type(self)]
+
     def new_init(self, *args, **kwargs):
         # pass only those kwargs to the dataclass which are expected
         dataclass_kwargs = {
-            key: value
-            for key, value in kwargs.items()
-            if key in [f.name for f in dataclasses.fields(cls)]
+            key: value for key, value in kwargs.items() if key in field_names
         }
 
         # pass args and kwargs to the dataclasses' __init_
         original_init(self, *args, **dataclass_kwargs)
 
-        # update kwargs with default arguments
-        kwargs.update(dataclasses.asdict(self))
+        # update kwargs with default arguments, without copying them like
+        # `dataclasses.asdict` would
+        kwargs.update((name, getattr(self, name)) for name in fields)
+        # The names of the arguments are kept to create copies of the facade
+        # with changed arguments, see `oemof.tabular.datapackage.updating.
+        # rebuild`. Their values are the facade's attributes, so keeping
+        # them, e.g. long sequences, would only keep them from being freed
+        # once the attributes are changed.
+        key = tuple(kwargs)
+        self._init_names = names.setdefault(key, key)
 
         # Pass only those arguments to solph component's __init__ that
         # are expected.
-        init_expected_args = list(
-            inspect.signature(super(cls, self).__init__).parameters
-        )
-
-        kwargs_expected = {
-            key: value
-            for key, value in kwargs.items()
-            if key in init_expected_args
-        }
-
-        kwargs_unexpected = {
-            key: value
-            for key, value in kwargs.items()
-            if key not in init_expected_args
-        }
+        init_expected_args, custom_attributes = plan(self)
+        kwargs_expected = {}
+        kwargs_unexpected = {}
+        for key, value in kwargs.items():
+            if key in init_expected_args:
+                kwargs_expected[key] = value
+            else:
+                kwargs_unexpected[key] = value
 
-        if "custom_attributes" in init_expected_args:
+        if custom_attributes:
             kwargs_expected["custom_attributes"] = kwargs_unexpected
-
-        if kwargs_unexpected and "custom_attributes" not in init_expected_args:
+        elif kwargs_unexpected:
             warnings.warn(
                 f"No custom_attributes in parent class {cls.__mro__[1]}"
             )
@@ -94,8 +112,11 @@ def kwargs_to_parent(cls):
             **kwargs_expected,
         )
 
+        # Building the solph components is deferred, if asked to, see
+        # `Facade.build`.
         if not kwargs.get("build_solph_components") is False:
             self.build_solph_components()
+            self.solph_components_built = True
 
     cls.__init__ = new_init
     return cls
@@ -129,9 +150,132 @@ def dataclass_facade(cls):
 
 
 def add_subnodes(n, **kwargs):
+    """Adds the subnodes of the facade `n` to the energy system it has been
+    added to. Other nodes are left alone.
+    """
+    if not isinstance(n, Facade):
+        return
     deque((kwargs["EnergySystem"].add(sn) for sn in n.subnodes), maxlen=0)
 
 
+# A single receiver handles the subnodes of every facade added to an energy
+# system, so facades don't have to connect one each.
+EnergySystem.signals[EnergySystem.add].connect(add_subnodes)
+
+#: The versions of `oemof.network` whose way of keeping the nodes and groups
+#: of an energy system :func:`_drop_nodes` relies on.
+NETWORK_VERSIONS = frozenset(["0.5.0a4"])
+
+
+def add_nodes(energysystem, nodes):
+    """Adds `nodes` and their subnodes to `energysystem`.
+
+    The nodes are added via `EnergySystem.add`, whose `add` signal makes
+    :func:`add_subnodes` add the subnodes of facades.
+
+    Parameters
+    ----------
+    energysystem : oemof.solph.EnergySystem
+    nodes : iterable of oemof.network.Node
+
+    Returns
+    -------
+    energysystem : oemof.solph.EnergySystem
+    """
+    energysystem.add(*nodes)
+    return energysystem
+
+
+def _drop_nodes(energysystem, nodes):
+    """Drops `nodes` from the nodes and groups of `energysystem`.
+
+    `oemof.network` has no way of removing nodes from an energy system, so
+    this relies on how the supported versions, see
+    :data:`NETWORK_VERSIONS`, keep them: the groups are only ever extended
+    by the nodes added since they were last computed, so they are computed
+    from scratch again.
+
+    Raises
+    ------
+    NotImplementedError
+        If the installed version of `oemof.network` isn't supported.
+    """
+    if oemof_network_version not in NETWORK_VERSIONS:
+        raise NotImplementedError(
+            "Removing nodes isn't supported for oemof.network {}, only for "
+            "{}.".format(oemof_network_version, sorted(NETWORK_VERSIONS))
+        )
+    # Nodes hash by label, comparing their ids is a lot cheaper.
+    ids = {id(n) for n in nodes}
+    energysystem.nodes = [n for n in energysystem.nodes if id(n) not in ids]
+    energysystem._groups = {}
+    energysystem._first_ungrouped_node_index_ = 0
+
+
+def remove_nodes(energysystem, nodes):
+    """Removes `nodes` and their subnodes from `energysystem`.
+
+    The edges from and to the removed nodes are removed as well, so that
+    the nodes staying in `energysystem`, e.g. buses, aren't connected to
+    them anymore. Only the versions of `oemof.network` in
+    :data:`NETWORK_VERSIONS` are supported.
+
+    Parameters
+    ----------
+    energysystem : oemof.solph.EnergySystem
+    nodes : iterable of oemof.network.Node
+
+    Returns
+    -------
+    removed : set of oemof.network.Node
+        The removed nodes, including all subnodes.
+
+    Raises
+    ------
+    NotImplementedError
+        If the installed version of `oemof.network` isn't supported.
+    """
+    removed = set()
+    nodes = list(nodes)
+    while nodes:
+        removed.update(nodes)
+        nodes = [sn for n in nodes for sn in getattr(n, "subnodes", ())]
+    _drop_nodes(energysystem, removed)
+    for node in removed:
+        for source in list(node.inputs):
+            del source.outputs[node]
+        for target in list(node.outputs):
+            del node.outputs[target]
+    return removed
+
+
+def build_facades(energysystem):
+    """Builds the solph components of the facades in `energysystem` which
+    were created with `build_solph_components=False`.
+
+    Subnodes created while building a facade are added to `energysystem`.
+    This has to be done before a model is created from `energysystem`,
+    which would otherwise lack the flows of the unbuilt facades.
+
+    Parameters
+    ----------
+    energysystem : oemof.solph.EnergySystem
+
+    Returns
+    -------
+    energysystem : oemof.solph.EnergySystem
+    """
+    return add_nodes(
+        energysystem,
+        [
+            sn
+            for node in list(energysystem.nodes)
+            if isinstance(node, Facade) and not node.solph_components_built
+            for sn in node.build()
+        ],
+    )
+
+
 class Facade(Node):
     """
     Parent class for oemof.tabular facades.
@@ -147,9 +291,7 @@ class Facade(Node):
         super().__init__(*args, **kwargs)
 
         self.subnodes = []
-        EnergySystem.signals[EnergySystem.add].connect(
-            add_subnodes, sender=self
-        )
+        self.solph_components_built = False
 
     def _nominal_value(self):
         """Returns None if self.expandable ist True otherwise it returns
@@ -248,5 +390,26 @@ class Facade(Node):
 
         return maximum
 
+    def build(self):
+        """Builds the solph components of the facade, unless they have been
+        built already.
+
+        Creating a facade with `build_solph_components=False` defers
+        building its solph components, i.e. its flows, investments and
+        subnodes, until this method is called. Until then, the facade is a
+        plain record of its attributes, which is cheap to create, change or
+        drop.
+
+        Returns
+        -------
+        subnodes : list
+            The subnodes of the facade.
+        """
+        if not self.solph_components_built:
+            self.build_solph_components()
+            self.solph_components_built = True
+        return self.subnodes
+
     def update(self):
         self.build_solph_components()
+        self.solph_components_built = True
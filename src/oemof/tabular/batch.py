@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+Running many scenarios, i.e. datapackages, as one batch.
+
+Every scenario is loaded, built into a model, solved and postprocessed on a
+pool of worker processes, and its results are written to a directory of
+their own, `scenario=<name>`, below the results directory of the batch. At
+most `solvers` models are solved at the same time, e.g. to stay within the
+number of solver licenses, while the other workers load and build the next
+scenarios.
+
+Scenarios which are overlays (see
+:class:`~oemof.tabular.datapackage.reading.PackageReader`) of one of the
+`bases` of the batch share the parsed base: the bases are read once before
+the worker processes are forked, and read again in every worker on
+platforms which don't `fork` new processes.
+
+"""
+import contextlib
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass, field
+
+import datapackage as dp
+import pandas as pd
+from oemof.solph import EnergySystem, Model, processing
+
+from oemof.tabular.constraint_facades import CONSTRAINT_TYPE_MAP
+from oemof.tabular.datapackage import parallel
+from oemof.tabular.datapackage.reading import PackageReader, in_directory
+from oemof.tabular.facades import TYPEMAP
+from oemof.tabular.postprocessing import calculations
+
+#: Limits the number of concurrent solver runs of the current batch.
+_solvers = None
+
+#: Readers of the bases of the current batch, by the path of their metadata.
+_bases = {}
+
+
+@dataclass
+class Report:
+    """The outcome of a batch.
+
+    Attributes
+    ----------
+    results: dict
+        Maps the names of the solved scenarios to their results files.
+    errors: dict
+        Maps the names of the scenarios which failed in every attempt to the
+        error raised in the last one.
+    attempts: dict
+        Maps the names of all scenarios to the number of times they were
+        run.
+    """
+
+    results: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+    attempts: dict = field(default_factory=dict)
+
+
+def _key(path):
+    return os.path.realpath(path)
+
+
+def read_base(path):
+    """Returns a :class:`PackageReader` of `path` which has read all of its
+    tabular resources.
+    """
+    reader = PackageReader(dp.Package(path))
+    for r in reader.resources:
+        if not r.tabular:
+            continue
+        if in_directory(r, "data/sequences"):
+            reader.sequences(r)
+        else:
+            reader.cached(r)
+    return reader
+
+
+def scenario_reader(path):
+    """Returns a :class:`PackageReader` of the scenario at `path`.
+
+    The reader of the parent of an overlay is shared if the parent is one
+    of the bases of the current batch.
+    """
+    package = dp.Package(path)
+    parent = package.descriptor.get("parent")
+    if parent:
+        parent = _bases.get(
+            _key(os.path.join(package.base_path or "", parent))
+        )
+    return PackageReader(package, parent=parent)
+
+
+@contextlib.contextmanager
+def solver_slot():
+    """Waits until fewer than `solvers` models of the batch are solved.
+
+    Custom scenario functions (see :func:`run_batch`) should solve their
+    models in this context.
+    """
+    if _solvers is None:
+        yield
+    else:
+        with _solvers:
+            yield
+
+
+def run_scenario(
+    path,
+    reader=None,
+    solver="cbc",
+    solve_kwargs=None,
+    typemap=None,
+    attributemap=None,
+    constraint_type_map=None,
+):
+    """Loads, builds, solves and postprocesses the scenario at `path`.
+
+    Parameters
+    ----------
+    path: string
+        Path of the metadata of the scenario's datapackage.
+    reader: :class:`PackageReader` (optional)
+        Reader of the datapackage.
+    solver: string
+        Name of the solver.
+    solve_kwargs: dict (optional)
+        Further arguments of :meth:`oemof.solph.Model.solve`.
+    typemap, attributemap: dict (optional)
+        See :func:`~.datapackage.reading.deserialize_energy_system`. The
+        type map defaults to :data:`~oemof.tabular.facades.TYPEMAP`.
+    constraint_type_map: dict (optional)
+        Defaults to
+        :data:`~oemof.tabular.constraint_facades.CONSTRAINT_TYPE_MAP`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The results of
+        :func:`~oemof.tabular.postprocessing.calculations.run_postprocessing`.
+    """
+    es = EnergySystem.from_datapackage(
+        path,
+        typemap=dict(TYPEMAP if typemap is None else typemap),
+        attributemap=dict(attributemap or {}),
+        reader=reader,
+    )
+    m = Model(es)
+    m.add_constraints_from_datapackage(
+        path,
+        constraint_type_map=(
+            CONSTRAINT_TYPE_MAP
+            if constraint_type_map is None
+            else constraint_type_map
+        ),
+    )
+    with solver_slot():
+        m.solve(solver, **(solve_kwargs or {}))
+    es.params = processing.parameter_as_dict(es)
+    es.results = m.results()
+    return calculations.run_postprocessing(es)
+
+
+def partition(results, name):
+    """Returns the directory of the results of scenario `name`."""
+    return os.path.join(results, f"scenario={name}")
+
+
+def read_results(results):
+    """Returns the results of all scenarios in the directory `results`.
+
+    The results are concatenated, with the name of their scenario in the
+    column `scenario`.
+    """
+    frames = []
+    for directory in sorted(os.listdir(results)):
+        path = os.path.join(results, directory, "results.csv")
+        if directory.startswith("scenario=") and os.path.exists(path):
+            frames.append(
+                pd.read_csv(path).assign(
+                    scenario=directory[len("scenario=") :]
+                )
+            )
+    return pd.concat(frames, ignore_index=True)
+
+
+def _initialize(solvers, bases):
+    global _solvers
+    _solvers = solvers
+    for path in bases:
+        if path not in _bases:
+            _bases[path] = read_base(path)
+
+
+def _run(function, path, directory, options):
+    results = function(path, scenario_reader(path), **options)
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, "results.csv")
+    results.to_csv(target + ".tmp")
+    os.replace(target + ".tmp", target)
+    return target
+
+
+def _inline(function, *args):
+    future = Future()
+    try:
+        future.set_result(function(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def run_batch(
+    scenarios,
+    results,
+    bases=(),
+    workers=None,
+    solvers=None,
+    retries=0,
+    function=run_scenario,
+    **options,
+):
+    """Runs `scenarios` and writes their results below `results`.
+
+    Parameters
+    ----------
+    scenarios: dict or iterable
+        Maps the names of the scenarios to the paths of the metadata of
+        their datapackages. Given only the paths, the scenarios are named
+        after the directories of their datapackages.
+    results: string
+        Directory of the results. The results of scenario `name` are written
+        to `scenario=<name>/results.csv` in it (see :func:`read_results`),
+        replacing the previous results only once the scenario succeeded.
+    bases: iterable
+        Paths of the metadata of the datapackages which are read only once
+        for all scenarios which are overlays of them.
+    workers: int (optional)
+        Number of worker processes. If `None`, the scenarios are run one
+        after the other in the calling process.
+    solvers: int (optional)
+        Maximum number of models solved at the same time. Unlimited if
+        `None`.
+    retries: int
+        Number of times a failing scenario is run again before its error
+        is reported.
+    function: callable
+        Called as `function(path, reader, **options)` to run a scenario,
+        where `reader` is the :class:`PackageReader` of its datapackage.
+        Returns the results as :class:`pandas.DataFrame`. Defaults to
+        :func:`run_scenario`. Has to be picklable if `workers` is given.
+
+    Returns
+    -------
+    :class:`Report`
+        The results files, errors and attempts of the scenarios, in the
+        order they finished in.
+    """
+    if not isinstance(scenarios, dict):
+        scenarios = {
+            os.path.basename(os.path.dirname(os.path.abspath(path))): path
+            for path in scenarios
+        }
+    bases = [_key(path) for path in bases]
+    report = Report(attempts=dict.fromkeys(scenarios, 0))
+
+    if workers is None:
+        pool = contextlib.nullcontext()
+        _initialize(None, bases)
+    else:
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+            _initialize(None, bases)
+        else:
+            context = multiprocessing.get_context()
+        pool = parallel.pool(
+            "process",
+            workers,
+            mp_context=context,
+            initializer=_initialize,
+            initargs=(
+                None if solvers is None else context.BoundedSemaphore(solvers),
+                bases,
+            ),
+        )
+
+    try:
+        with pool:
+
+            def submit(name):
+                report.attempts[name] += 1
+                arguments = (
+                    function,
+                    scenarios[name],
+                    partition(results, name),
+                    options,
+                )
+                if workers is None:
+                    return _inline(_run, *arguments)
+                return pool.submit(_run, *arguments)
+
+            futures = {submit(name): name for name in scenarios}
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = futures.pop(future)
+                    try:
+                        report.results[name] = future.result()
+                    except Exception as e:
+                        if report.attempts[name] <= retries:
+                            futures[submit(name)] = name
+                        else:
+                            report.errors[name] = e
+    finally:
+        _bases.clear()
+    return report
@@ -3,8 +3,7 @@ Module that contains the command line app.
 
 """
 
-import collections
-import copy
+from collections.abc import Mapping
 
 from datapackage import Package, exceptions
 
@@ -15,18 +14,35 @@ except ImportError:
 
 import pandas as pd
 
+from . import batch
 from .datapackage import building
 
 
 def update(d, u):
     for k, v in u.items():
-        if isinstance(v, collections.Mapping):
+        if isinstance(v, Mapping):
             d[k] = update(d.get(k, {}), v)
         else:
             d[k] = v
     return d
 
 
+def merge(base, overrides):
+    """Returns `base` updated with `overrides`, leaving both unchanged.
+
+    Nested mappings are merged recursively. All other values are shared
+    with `base` or `overrides` instead of being copied, so they must not be
+    changed in place.
+    """
+    merged = dict(base)
+    for k, v in overrides.items():
+        if isinstance(v, Mapping) and isinstance(merged.get(k), Mapping):
+            merged[k] = merge(merged[k], v)
+        else:
+            merged[k] = v
+    return merged
+
+
 scenarios = {}
 
 
@@ -45,15 +61,13 @@ class Scenario(dict):
         if "parents" in self:
             for parent in self["parents"]:
                 if parent in scenarios:
-                    scenario = copy.deepcopy(scenarios[parent])
+                    scenario = scenarios[parent]
                 else:
-                    scenario = copy.deepcopy(type(self).from_path(parent))
+                    scenario = type(self).from_path(parent)
 
-                # hackish, but necessary to get self (the child) right
-                # with all key/values of the parent and
-                # it's own key/value pairs
-                update(scenario, self)
-                update(self, scenario)
+                # the child's key/value pairs take precedence over the
+                # parent's, which are shared instead of copied
+                self.update(merge(scenario, self))
 
 
 def _test(ctx, package):
@@ -138,5 +152,61 @@ def test(ctx, package):
     _test(ctx, package)
 
 
+@cli.command()
+@click.argument("scenarios", nargs=-1, required=True, type=str)
+@click.option(
+    "--results",
+    default="results",
+    show_default=True,
+    help="Directory to write the results of the scenarios to.",
+)
+@click.option(
+    "--base",
+    "bases",
+    multiple=True,
+    help="Datapackage the scenarios are overlays of, read only once.",
+)
+@click.option(
+    "--workers",
+    type=int,
+    default=None,
+    help="Number of worker processes. Runs one scenario after the other if"
+    " not given.",
+)
+@click.option(
+    "--solvers",
+    type=int,
+    default=None,
+    help="Maximum number of models solved at the same time.",
+)
+@click.option(
+    "--retries",
+    type=int,
+    default=0,
+    show_default=True,
+    help="Number of times a failing scenario is run again.",
+)
+@click.option("--solver", default="cbc", show_default=True)
+@click.pass_context
+def run(ctx, scenarios, results, bases, workers, solvers, retries, solver):
+    """Run the datapackages SCENARIOS as one batch."""
+    report = batch.run_batch(
+        scenarios,
+        results,
+        bases=bases,
+        workers=workers,
+        solvers=solvers,
+        retries=retries,
+        solver=solver,
+    )
+    for name, error in report.errors.items():
+        click.echo(f"Scenario {name} failed: {error}", err=True)
+    click.echo(
+        f"Solved {len(report.results)} of {len(report.attempts)} scenarios."
+    )
+    if report.errors:
+        ctx.exit(1)
+
+
 def main():
     cli(obj={})
@@ -3,7 +3,15 @@ from oemof.solph import Model
 
 from . import building  # noqa F401
 from .reading import deserialize_constraints, deserialize_energy_system
+from .snapshot import read_snapshot, write_snapshot
+from .updating import update_from_datapackage
 
 EnergySystem.from_datapackage = classmethod(deserialize_energy_system)
 
+EnergySystem.from_snapshot = classmethod(read_snapshot)
+
+EnergySystem.to_snapshot = write_snapshot
+
 Model.add_constraints_from_datapackage = deserialize_constraints
+
+Model.update_from_datapackage = update_from_datapackage
@@ -14,11 +14,22 @@ try:
 except ImportError:
     raise ImportError("Need to install tsam to use aggregation!")
 
-from .building import write_sequences
+from .building import infer_descriptor, write_sequences
 from .processing import copy_datapackage
 
 
-def temporal_skip(datapackage, n, path="/tmp", name=None, *args):
+def _infer_rewritten(resource):
+    """Infers the descriptor of the rewritten file of the sequence
+    `resource` anew, keeping its foreign keys.
+    """
+    descriptor = infer_descriptor(resource.descriptor["path"])
+    foreign_keys = resource.descriptor["schema"].get("foreignKeys")
+    if foreign_keys:
+        descriptor["schema"]["foreignKeys"] = foreign_keys
+    return descriptor
+
+
+def temporal_skip(datapackage, n, path="/tmp", name=None, *args, link=False):
     """Creates a new datapackage by aggregating sequences inside the
     `sequence` folder of the specified datapackage by skipping `n` timesteps
 
@@ -33,6 +44,12 @@ def temporal_skip(datapackage, n, path="/tmp", name=None, *args):
     name: string
         Name of the new, aggregated datapackage. If not specified a name will
         be given
+    link: boolean
+        Opt in to link the files of the resources, which aren't aggregated,
+        instead of copying them (see
+        :func:`~oemof.tabular.datapackage.processing.link_file`). Where
+        files can't be reflinked, they are hardlinked, so they must not be
+        written in place afterwards.
     """
     p = Package(datapackage)
 
@@ -47,16 +64,21 @@ def temporal_skip(datapackage, n, path="/tmp", name=None, *args):
 
     copy_path = os.path.join(path, copied_package_name)
 
-    copied_root = copy_datapackage(
-        datapackage, os.path.abspath(copy_path), subset="data"
-    )
-
     sequence_resources = [
         r
         for r in p.resources
         if re.match(r"^data/sequences/.*$", r.descriptor["path"])
     ]
 
+    # only the sequences and the temporal resource are written anew
+    copied_root = copy_datapackage(
+        datapackage,
+        os.path.abspath(copy_path),
+        subset="data",
+        link=link,
+        rewrite=[r.name for r in sequence_resources] + ["temporal"],
+    )
+
     dfs = {
         r.name: pd.DataFrame(r.read(keyed="True"))
         .set_index("timeindex")
@@ -95,7 +117,9 @@ def temporal_skip(datapackage, n, path="/tmp", name=None, *args):
     # Update meta-data of copied package
     cp = Package("datapackage.json")
     cp.descriptor["name"] = copied_package_name
-    cp.descriptor["resources"].append(r.descriptor)
+    cp.descriptor["resources"].extend(
+        [_infer_rewritten(s) for s in sequence_resources] + [r.descriptor]
+    )
     cp.commit()
     cp.save("datapackage.json")
 
@@ -105,7 +129,7 @@ def temporal_skip(datapackage, n, path="/tmp", name=None, *args):
     return copied_root
 
 
-def temporal_clustering(datapackage, n, path="/tmp", how="daily"):
+def temporal_clustering(datapackage, n, path="/tmp", how="daily", link=False):
     """Creates a new datapackage by aggregating sequences inside the
     `sequence` folder of the specified datapackage by clustering `n` timesteps
 
@@ -119,6 +143,9 @@ def temporal_clustering(datapackage, n, path="/tmp", how="daily"):
         Path to directory where the aggregated datapackage is stored
     how: string
         How to cluster 'daily' or 'hourly'
+    link: boolean
+        Opt in to link the files of the resources, which aren't aggregated,
+        instead of copying them (see :func:`temporal_skip`).
     """
     if how == "weekly":
         raise NotImplementedError("Weekly clustering is not implemented!")
@@ -133,16 +160,21 @@ def temporal_clustering(datapackage, n, path="/tmp", how="daily"):
 
     copy_path = os.path.join(path, p.descriptor["name"], copied_package_name)
 
-    copied_root = copy_datapackage(
-        datapackage, os.path.abspath(copy_path), subset="data"
-    )
-
     sequence_resources = [
         r
         for r in p.resources
         if re.match(r"^data/sequences/.*$", r.descriptor["path"])
     ]
 
+    # only the sequences and the temporal resource are written anew
+    copied_root = copy_datapackage(
+        datapackage,
+        os.path.abspath(copy_path),
+        subset="data",
+        link=link,
+        rewrite=[r.name for r in sequence_resources] + ["temporal"],
+    )
+
     dfs = {
         r.name: pd.DataFrame(r.read(keyed="True"))
         .set_index("timeindex")
@@ -219,7 +251,9 @@ def temporal_clustering(datapackage, n, path="/tmp", how="daily"):
     # Update meta-data of copied package
     cp = Package("datapackage.json")
     cp.descriptor["name"] = copied_package_name
-    cp.descriptor["resources"].append(r.descriptor)
+    cp.descriptor["resources"].extend(
+        [_infer_rewritten(s) for s in sequence_resources] + [r.descriptor]
+    )
     cp.commit()
     cp.save("datapackage.json")
 
@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
+import copy
 import errno
+import hashlib
+import json
 import os
 import pathlib
 import shutil
@@ -8,16 +11,177 @@ import tarfile
 import urllib.request
 import zipfile
 from ftplib import FTP
+from functools import partial
 from urllib.parse import urlparse
 
 import pandas as pd
 import paramiko
 import toml
-from datapackage import Package, Resource
+from datapackage import Package, Resource, exceptions, helpers
+from datapackage.profile import Profile
 
 from oemof.tabular import __version__ as oemof_tabular_version
 from oemof.tabular.config import config
 
+from . import columnar, parallel, sidecars, timestamps
+
+
+def infer_resource(path):
+    """Creates a resource for the file at `path` and infers its metadata.
+
+    Parquet and Arrow files are described by the schema stored in the file
+    itself (see :func:`~oemof.tabular.datapackage.columnar.infer_descriptor`),
+    all other files are inferred by `datapackage`.
+
+    Parameters
+    ----------
+    path: string
+        Path of the file relative to the root of the datapackage
+    """
+    if columnar.file_format(path):
+        return Resource(columnar.infer_descriptor(path))
+    r = Resource({"path": path})
+    r.infer()
+    return r
+
+
+def infer_descriptor(path):
+    """Returns the inferred descriptor of the resource at `path`.
+
+    See :func:`infer_resource`.
+    """
+    return infer_resource(path).descriptor
+
+
+def _digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(2**20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def manifest_filename(metadata_filename="datapackage.json"):
+    """Returns the name of the manifest kept next to the metadata
+    `metadata_filename` by :func:`infer_metadata` in incremental mode.
+    """
+    return os.path.splitext(metadata_filename)[0] + ".manifest.json"
+
+
+def read_manifest(path):
+    """Returns the files listed in the manifest at `path`.
+
+    The manifest maps the paths of the resources' files to their size,
+    modification time, SHA-256 hash and inferred descriptor. Returns an
+    empty mapping if there is no manifest or if it was written by another
+    version of `oemof.tabular`.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("oemof_tabular_version") != oemof_tabular_version:
+        return {}
+    return manifest["files"]
+
+
+def unchanged(path, entry):
+    """Checks whether the file at `path` is the one described by manifest
+    `entry`.
+
+    Files with the size and modification time of the entry are taken to be
+    unchanged without reading them, others are compared by their hash. The
+    entry is updated with the file's current state.
+    """
+    if entry is None:
+        return False
+    stat = os.stat(path)
+    if (stat.st_size, stat.st_mtime_ns) == (entry["size"], entry["mtime_ns"]):
+        return True
+    entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    digest, entry["sha256"] = entry["sha256"], _digest(path)
+    return digest == entry["sha256"]
+
+
+def save_descriptor(descriptor, path, resource=False):
+    """Saves the `descriptor` of a datapackage, or of a resource if
+    `resource` is set, to `path`.
+
+    Writes the same JSON as :meth:`datapackage.Package.save` and
+    :meth:`datapackage.Resource.save`, i.e. `descriptor` with the defaults
+    of its resources applied, without creating and validating a
+    :class:`datapackage.Resource` for each of its resources first.
+
+    The file is written to a temporary file first, so an existing file at
+    `path` is only replaced by a complete one.
+    """
+    if resource:
+        helpers.expand_resource_descriptor(descriptor)
+    else:
+        helpers.expand_package_descriptor(descriptor)
+    path = str(path)
+    helpers.ensure_dir(path)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(descriptor, f, indent=4)
+    os.replace(path + ".tmp", path)
+
+
+def read_descriptor(path, resource=False):
+    """Returns the descriptor of the datapackage, or of the resource if
+    `resource` is set, stored at `path`.
+
+    The descriptor is read like :class:`datapackage.Package` and
+    :class:`datapackage.Resource` read it, i.e. with references resolved
+    and defaults applied, but isn't validated.
+    """
+    descriptor = helpers.retrieve_descriptor(path)
+    base_path = helpers.get_descriptor_base_path(path)
+    if resource:
+        helpers.dereference_resource_descriptor(descriptor, base_path)
+        return helpers.expand_resource_descriptor(descriptor)
+    helpers.dereference_package_descriptor(descriptor, base_path)
+    return helpers.expand_package_descriptor(descriptor)
+
+
+def assemble_package(descriptor, resources, path, strict=False):
+    """Adds `resources` to the datapackage `descriptor` and saves it to
+    `path`.
+
+    Adding the resources one by one to a :class:`datapackage.Package`
+    validates the whole package after each of them. The descriptor is
+    validated only once instead, after all resources have been added, and
+    saved atomically (see :func:`save_descriptor`).
+
+    Parameters
+    ----------
+    descriptor: dict
+        Descriptor of the datapackage, which is changed in place.
+    resources: iterable
+        Descriptors of the resources.
+    path: string
+        Path of the metadata, e.g. `datapackage.json`.
+    strict: boolean
+        Raise a :class:`datapackage.exceptions.ValidationError` if the
+        descriptor isn't valid, without writing it.
+
+    Returns
+    -------
+    list
+        The validation errors, like :attr:`datapackage.Package.errors`.
+    """
+    descriptor.setdefault("profile", "data-package")
+    descriptor.setdefault("resources", []).extend(resources)
+    helpers.expand_package_descriptor(descriptor)
+    try:
+        Profile(descriptor["profile"]).validate(descriptor)
+        errors = []
+    except exceptions.ValidationError as e:
+        if strict:
+            raise
+        errors = e.errors
+    save_descriptor(descriptor, path)
+    return errors
+
 
 def infer_resources(directory="data/elements"):
     """Method looks at all files in `directory` and creates
@@ -40,24 +204,23 @@ def infer_resources(directory="data/elements"):
 
 
 def update_package_descriptor():
-    """ """
-    p = Package("datapackage.json")
-
-    for f in sorted(os.listdir("resources")):
-        path = os.path.join("resources", f)
-
-        r = Resource(path)
-
-        p.add_resource(r.descriptor)
-
-        p.commit()
+    """Adds the resources in the directory `resources` to the metadata
+    `datapackage.json` in the current directory and removes the directory.
+    """
+    paths = [
+        os.path.join("resources", f) for f in sorted(os.listdir("resources"))
+    ]
+    assemble_package(
+        read_descriptor("datapackage.json"),
+        [read_descriptor(path, resource=True) for path in paths],
+        "datapackage.json",
+    )
 
+    for path in paths:
         os.remove(path)
 
     os.rmdir("resources")
 
-    p.save("datapackage.json")
-
 
 def infer_metadata(
     package_name="default-name",
@@ -65,9 +228,23 @@ def infer_metadata(
     foreign_keys=None,
     path=None,
     metadata_filename="datapackage.json",
+    workers=None,
+    executor="process",
+    parent=None,
+    incremental=False,
 ):
     """Add basic meta data for a datapackage
 
+    The metadata of the individual resources is inferred concurrently if
+    `workers` is given, the datapackage is assembled from the results in
+    the same order as when inferring the resources one by one.
+
+    In incremental mode, a manifest of the files of the resources is kept
+    next to the metadata (see :func:`manifest_filename`), and only the
+    metadata of files which are new or have changed since the last call is
+    inferred again. The metadata of all other files is taken from the
+    manifest.
+
     Parameters
     ----------
     package_name: string
@@ -84,6 +261,19 @@ def infer_metadata(
         Absolute path to root-folder of the datapackage
     metadata_filename: basestring
         Name of the inferred metadata string.
+    workers: int
+        Number of processes or threads used to infer the metadata of the
+        resources. If `None`, resources are inferred one after the other.
+    executor: string
+        Either "process" or "thread" (see
+        :mod:`~oemof.tabular.datapackage.parallel`).
+    parent: string
+        Path of the metadata of the package which the package changes,
+        relative to the package. The package then only holds the rows and
+        columns it changes (see
+        :class:`~oemof.tabular.datapackage.reading.PackageReader`).
+    incremental: boolean
+        Reuse the metadata of unchanged files and write the manifest.
     """
     foreign_keys = foreign_keys or config.FOREIGN_KEYS
 
@@ -96,9 +286,72 @@ def infer_metadata(
     p.descriptor["name"] = package_name
     p.descriptor["profile"] = "tabular-data-package"
     p.descriptor["oemof_tabular_version"] = oemof_tabular_version
+    if parent:
+        p.descriptor["parent"] = parent
     p.commit()
-    if not os.path.exists("resources"):
+    if keep_resources and not os.path.exists("resources"):
         os.makedirs("resources")
+    resources = []
+
+    def save(r, f):
+        if keep_resources:
+            save_descriptor(
+                r,
+                pathlib.PurePosixPath(
+                    "resources", os.path.splitext(f)[0] + ".json"
+                ),
+                resource=True,
+            )
+        resources.append(r)
+
+    paths = [
+        str(pathlib.PurePosixPath("data", directory, f))
+        for directory in (
+            "elements",
+            "sequences",
+            "geometries",
+            "constraints",
+            "periods",
+        )
+        if os.path.exists(os.path.join("data", directory))
+        for f in os.listdir(os.path.join("data", directory))
+        if not (directory == "sequences" and sidecars.is_sidecar(f))
+    ]
+    files = (
+        read_manifest(manifest_filename(metadata_filename))
+        if incremental
+        else {}
+    )
+    files = {
+        path: files[path] for path in paths if unchanged(path, files.get(path))
+    }
+    stale = [path for path in paths if path not in files]
+    inferred = dict(
+        zip(
+            stale,
+            parallel.run(
+                infer_descriptor,
+                [(path,) for path in stale],
+                workers,
+                executor,
+            ),
+        )
+    )
+    if incremental:
+        for path in stale:
+            stat = os.stat(path)
+            files[path] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": _digest(path),
+                "descriptor": inferred[path].result(),
+            }
+
+    def infer(*parts):
+        path = str(pathlib.PurePosixPath(*parts))
+        if path in files:
+            return copy.deepcopy(files[path]["descriptor"])
+        return inferred[path].result()
 
     # create meta data resources elements
     if not os.path.exists("data/elements"):
@@ -109,25 +362,22 @@ def infer_metadata(
         )
     else:
         for f in sorted(os.listdir("data/elements")):
-            r = Resource(
-                {"path": str(pathlib.PurePosixPath("data", "elements", f))}
-            )
-            r.infer()
-            r.descriptor["schema"]["primaryKey"] = "name"
+            r = infer("data", "elements", f)
+            r["schema"]["primaryKey"] = "name"
 
-            r.descriptor["schema"]["foreignKeys"] = []
+            r["schema"]["foreignKeys"] = []
 
             # Define foreign keys from dictionary 'foreign_key_descriptors'
             for label, descriptor in config.FOREIGN_KEY_DESCRIPTORS.items():
-                if r.name in foreign_keys.get(label, []):
-                    r.descriptor["schema"]["foreignKeys"].extend(descriptor)
+                if r["name"] in foreign_keys.get(label, []):
+                    r["schema"]["foreignKeys"].extend(descriptor)
 
             # Define foreign keys for 'profile' as <resource name>_profile
-            if r.name in foreign_keys.get("profile", []):
-                r.descriptor["schema"]["foreignKeys"].append(
+            if r["name"] in foreign_keys.get("profile", []):
+                r["schema"]["foreignKeys"].append(
                     {
                         "fields": "profile",
-                        "reference": {"resource": r.name + "_profile"},
+                        "reference": {"resource": r["name"] + "_profile"},
                     }
                 )
 
@@ -136,8 +386,8 @@ def infer_metadata(
                 if key not in (
                     ["profile"] + list(config.FOREIGN_KEY_DESCRIPTORS)
                 ):
-                    if r.name in foreign_keys[key]:
-                        r.descriptor["schema"]["foreignKeys"].append(
+                    if r["name"] in foreign_keys[key]:
+                        r["schema"]["foreignKeys"].append(
                             {
                                 "fields": key,
                                 "reference": {"resource": key + "_profile"},
@@ -145,15 +395,9 @@ def infer_metadata(
                         )
 
             # sort foreign_key entries by alphabetically by fields
-            r.descriptor["schema"]["foreignKeys"].sort(
-                key=lambda x: x["fields"]
-            )
+            r["schema"]["foreignKeys"].sort(key=lambda x: x["fields"])
 
-            r.commit()
-            r.save(
-                pathlib.PurePosixPath("resources", f.replace(".csv", ".json"))
-            )
-            p.add_resource(r.descriptor)
+            save(r, f)
 
     # create meta data resources sequences
     if not os.path.exists("data/sequences"):
@@ -164,15 +408,10 @@ def infer_metadata(
         )
     else:
         for f in sorted(os.listdir("data/sequences")):
-            r = Resource(
-                {"path": str(pathlib.PurePosixPath("data", "sequences", f))}
-            )
-            r.infer()
-            r.commit()
-            r.save(
-                pathlib.PurePosixPath("resources", f.replace(".csv", ".json"))
-            )
-            p.add_resource(r.descriptor)
+            if sidecars.is_sidecar(f):
+                continue
+            r = infer("data", "sequences", f)
+            save(r, f)
 
     # create meta data resources geometries
     if not os.path.exists("data/geometries"):
@@ -183,15 +422,8 @@ def infer_metadata(
         )
     else:
         for f in sorted(os.listdir("data/geometries")):
-            r = Resource(
-                {"path": str(pathlib.PurePosixPath("data", "geometries", f))}
-            )
-            r.infer()
-            r.commit()
-            r.save(
-                pathlib.PurePosixPath("resources", f.replace(".csv", ".json"))
-            )
-            p.add_resource(r.descriptor)
+            r = infer("data", "geometries", f)
+            save(r, f)
 
     # create meta data resources constraints
     if not os.path.exists("data/constraints"):
@@ -202,15 +434,8 @@ def infer_metadata(
         )
     else:
         for f in os.listdir("data/constraints"):
-            r = Resource(
-                {"path": str(pathlib.PurePosixPath("data", "constraints", f))}
-            )
-            r.infer()
-            r.commit()
-            r.save(
-                pathlib.PurePosixPath("resources", f.replace(".csv", ".json"))
-            )
-            p.add_resource(r.descriptor)
+            r = infer("data", "constraints", f)
+            save(r, f)
 
     # create meta data resources periods
     if not os.path.exists("data/periods"):
@@ -221,20 +446,24 @@ def infer_metadata(
         )
     else:
         for f in os.listdir("data/periods"):
-            r = Resource(
-                {"path": str(pathlib.PurePosixPath("data", "periods", f))}
+            r = infer("data", "periods", f)
+            save(r, f)
+
+    if resources:
+        p.descriptor["resources"] = resources
+    save_descriptor(p.descriptor, metadata_filename)
+
+    if incremental:
+        with open(manifest_filename(metadata_filename), "w") as f:
+            json.dump(
+                {
+                    "oemof_tabular_version": oemof_tabular_version,
+                    "files": {path: files[path] for path in paths},
+                },
+                f,
             )
-            r.infer()
-            r.commit()
-            r.save(
-                pathlib.PurePosixPath("resources", f.replace(".csv", ".json"))
-            )
-            p.add_resource(r.descriptor)
-
-    p.commit()
-    p.save(metadata_filename)
 
-    if not keep_resources:
+    if not keep_resources and os.path.exists("resources"):
         shutil.rmtree("resources")
 
     os.chdir(current_path)
@@ -253,27 +482,22 @@ def package_from_resources(resource_path, output_path, clean=True):
     clean: boolean
         If true, resources will be deleted
     """
-    p = Package()
-
-    p.descriptor["profile"] = "tabular-data-package"
-    p.commit()
-
-    for f in sorted(os.listdir(resource_path)):
-        path = os.path.join(resource_path, f)
-
-        r = Resource(path)
-
-        p.add_resource(r.descriptor)
-
-        p.commit()
+    paths = [
+        os.path.join(resource_path, f)
+        for f in sorted(os.listdir(resource_path))
+    ]
+    assemble_package(
+        {"profile": "tabular-data-package"},
+        [read_descriptor(path, resource=True) for path in paths],
+        os.path.join(output_path, "datapackage.json"),
+    )
 
+    for path in paths:
         os.remove(path)
 
     if clean:
         os.rmdir(resource_path)
 
-    p.save(os.path.join(output_path, "datapackage.json"))
-
 
 def _ftp(remotepath, localpath, hostname, username=None, passwd=""):
     """Download data with FTP
@@ -552,23 +776,58 @@ def read_build_config(file="build.toml"):
     return config
 
 
+def _replace(path, write):
+    """Calls `write` with a temporary path next to `path` and replaces
+    `path` with the written file.
+
+    Files are never written in place, so neither a reader of `path` sees a
+    partially written file nor are the files of other packages changed,
+    which `path` is linked to (see
+    :func:`~oemof.tabular.datapackage.processing.copy_datapackage`).
+    """
+    root, extension = os.path.splitext(path)
+    tmp = root + ".tmp" + extension
+    write(tmp)
+    os.replace(tmp, path)
+
+
 def read_sequences(filename, directory="data/sequences"):
     """Reads sequence resources from the datapackage
 
     Parameters
     ----------
     filename: string
-        Name of the sequences to be read, for example `load_profile.csv`
+        Name of the sequences to be read, for example `load_profile.csv`.
+        Files ending with `.parquet`, `.arrow` or `.feather` are read as
+        Parquet or Arrow file respectively.
     directory: string
         Directory from where the file should be read. Default: `data/sequences`
+
+    The `timeindex` of CSV files is returned in UTC, if it is written in
+    the default format or as seconds since the epoch (see
+    :mod:`~oemof.tabular.datapackage.timestamps`).
     """
 
     path = os.path.join(directory, filename)
 
-    if os.path.exists(path):
-        sequences = pd.read_csv(
-            path, sep=";", index_col=["timeindex"], parse_dates=True
-        )
+    if os.path.exists(path) and columnar.file_format(path):
+        sequences = columnar.read_dataframe(path).set_index("timeindex")
+    elif os.path.exists(path):
+        sequences = pd.read_csv(path, sep=";", index_col=["timeindex"])
+        index = sequences.index
+        try:
+            if pd.api.types.is_integer_dtype(index):
+                index = timestamps.from_epoch(index)
+            else:
+                index = timestamps.parse_iso(index)
+            index = index.tz_localize("UTC")
+        except ValueError:
+            # Other formats are inferred, as `parse_dates=True` does.
+            try:
+                index = pd.DatetimeIndex(pd.to_datetime(index))
+            except (ValueError, TypeError):
+                pass
+        sequences.index = index.rename("timeindex")
 
     else:
         sequences = pd.DataFrame(columns=["timeindex"]).set_index("timeindex")
@@ -583,7 +842,9 @@ def read_elements(filename, directory="data/elements"):
     Parameters
     ----------
     filename: string
-        Name of the elements to be read, for example `load.csv`
+        Name of the elements to be read, for example `load.csv`. Files ending
+        with `.parquet`, `.arrow` or `.feather` are read as Parquet or Arrow
+        file respectively.
     directory: string
         Directory where the file is located. Default: `data/elements`
 
@@ -593,7 +854,9 @@ def read_elements(filename, directory="data/elements"):
     """
     path = os.path.join(directory, filename)
 
-    if os.path.exists(path):
+    if os.path.exists(path) and columnar.file_format(path):
+        elements = columnar.read_dataframe(path).set_index("name")
+    elif os.path.exists(path):
         elements = pd.read_csv(path, sep=";")
         elements.set_index("name", inplace=True)
     else:
@@ -615,7 +878,9 @@ def write_elements(
     Parameters
     ----------
     filename: string
-        Name of the elements to be read, for example `reservoir.csv`
+        Name of the elements to be read, for example `reservoir.csv`. If the
+        name ends with `.parquet`, `.arrow` or `.feather` the elements are
+        written as Parquet or Arrow file respectively.
     elements: pd.DataFrame
         Elements to be stored in data frame. Index: `name`
     directory: string
@@ -656,7 +921,12 @@ def write_elements(
 
     elements.reset_index(inplace=True)
 
-    elements.to_csv(path, sep=";", quotechar="'", index=0)
+    if columnar.file_format(path):
+        _replace(path, partial(columnar.write_dataframe, elements))
+    else:
+        _replace(
+            path, partial(elements.to_csv, sep=";", quotechar="'", index=0)
+        )
 
     return path
 
@@ -667,13 +937,16 @@ def write_sequences(
     directory="data/sequences",
     replace=False,
     create_dir=True,
+    time_format="iso",
 ):
     """Writes sequences to filesystem.
 
     Parameters
     ----------
     filename: string
-        Name of the sequences to be read, for example `load_profile.csv`
+        Name of the sequences to be read, for example `load_profile.csv`. If
+        the name ends with `.parquet`, `.arrow` or `.feather` the sequences
+        are written as Parquet or Arrow file respectively.
     sequences: pd.DataFrame
         Sequences to be stored in data frame. Index: `datetimeindex` with
         format %Y-%m-%dT%H:%M:%SZ
@@ -684,12 +957,23 @@ def write_sequences(
         data (unique indices) will be checked
     create_dir: boolean
         Create the directory if not exists
+    time_format: string
+        Either "iso" to write the `timeindex` of CSV files as timestamps in
+        the format `%Y-%m-%dT%H:%M:%SZ` or "epoch" to write it as seconds
+        since the epoch (see :mod:`~oemof.tabular.datapackage.timestamps`).
     Returns
     -------
     path: string
         Returns the path where the file has been stored.
     """
 
+    if time_format not in ("iso", "epoch"):
+        raise ValueError(
+            "Unknown time format '{}', use 'iso' or 'epoch'.".format(
+                time_format
+            )
+        )
+
     path = os.path.join(directory, filename)
 
     if create_dir:
@@ -715,6 +999,188 @@ def write_sequences(
 
     sequences = sequences.reindex(sorted(sequences.columns), axis=1)
 
-    sequences.to_csv(path, sep=";", date_format="%Y-%m-%dT%H:%M:%SZ")
+    if columnar.file_format(path):
+        _replace(
+            path, partial(columnar.write_dataframe, sequences.reset_index())
+        )
+    else:
+        # Timestamps are formatted at once instead of row by row.
+        index = sequences.index
+        if time_format == "epoch":
+            index = timestamps.to_epoch(index)
+        elif isinstance(index, pd.DatetimeIndex):
+            index = timestamps.format_iso(index)
+        _replace(
+            path,
+            partial(
+                sequences.set_axis(pd.Index(index, name="timeindex")).to_csv,
+                sep=";",
+            ),
+        )
 
     return path
+
+
+class PackageWriter:
+    """Buffers elements and sequences and writes each resource only once.
+
+    Calling :func:`write_elements` or :func:`write_sequences` repeatedly
+    for the same file reads and rewrites the whole file on every call. The
+    writer instead reads an existing file at most once and collects the
+    rows of elements and the columns of sequences in memory, checking
+    their names against a set of the names collected so far. On
+    :meth:`flush` every resource is written once and, if `metadata` is
+    given, the metadata of the package is inferred once. Used as a context
+    manager, the writer flushes on leaving the block, unless an exception
+    is raised inside it.
+
+    Parameters
+    ----------
+    path: string
+        Root folder of the datapackage. Directories are relative to it.
+        Default: current directory.
+    metadata: dict (optional)
+        Keyword arguments of :func:`infer_metadata`. If given, the metadata
+        of the package is inferred incrementally after each flush.
+
+    Examples
+    --------
+    >>> with PackageWriter("my-datapackage") as writer:  # doctest: +SKIP
+    ...     for region, profile in profiles.items():
+    ...         writer.write_sequences("load_profile.csv", profile)
+    """
+
+    def __init__(self, path=".", metadata=None):
+        self.path = path
+        self.metadata = metadata
+        self._elements = {}
+        self._sequences = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        if kind is None:
+            self.flush()
+
+    def _add(self, buffers, filename, directory, data, replace, overwrite):
+        """Adds `data` to the buffer of `filename`, reading the existing
+        file first, unless `replace` is set.
+
+        The names of elements are the index of `data`, the names of
+        sequences its columns.
+        """
+        axis = 0 if buffers is self._elements else 1
+        key = (directory, filename)
+        if replace or key not in buffers:
+            frames = []
+            path = os.path.join(self.path, directory)
+            if not replace and os.path.exists(os.path.join(path, filename)):
+                read = read_elements if axis == 0 else read_sequences
+                frames.append(read(filename, directory=path))
+            buffers[key] = {
+                "frames": frames,
+                "names": set().union(*(f.axes[axis] for f in frames)),
+            }
+        buffer = buffers[key]
+
+        names = data.axes[axis]
+        duplicates = set(names[names.duplicated()])
+        if not overwrite:
+            duplicates |= buffer["names"].intersection(names)
+        if duplicates:
+            raise ValueError(
+                "Names {} of '{}' are not unique.".format(
+                    sorted(duplicates), filename
+                )
+            )
+        buffer["names"].update(names)
+        buffer["frames"].append(data)
+
+    def write_elements(
+        self,
+        filename,
+        elements,
+        directory="data/elements",
+        replace=False,
+        overwrite=False,
+    ):
+        """Buffers elements to be written to `filename`.
+
+        See :func:`write_elements` for the parameters.
+
+        Raises
+        ------
+        ValueError
+            If `elements` contains a name twice or, unless `overwrite` is
+            set, a name which has already been written.
+        """
+        self._add(
+            self._elements, filename, directory, elements, replace, overwrite
+        )
+
+    def write_sequences(
+        self,
+        filename,
+        sequences,
+        directory="data/sequences",
+        replace=False,
+        time_format="iso",
+    ):
+        """Buffers sequences to be written to `filename`.
+
+        See :func:`write_sequences` for the parameters. The `time_format`
+        of the last call for a file is used.
+
+        Raises
+        ------
+        ValueError
+            If `sequences` contains a column twice or a column which has
+            already been written.
+        """
+        self._add(
+            self._sequences, filename, directory, sequences, replace, False
+        )
+        self._sequences[directory, filename]["time_format"] = time_format
+
+    def flush(self):
+        """Writes the buffered resources and infers the metadata.
+
+        Returns
+        -------
+        paths: list
+            The paths of the written resources.
+        """
+        paths = []
+        for (directory, filename), buffer in self._elements.items():
+            elements = pd.concat(buffer["frames"], sort=False)
+            # Overwritten elements are replaced by their last version.
+            elements = elements[~elements.index.duplicated(keep="last")]
+            paths.append(
+                write_elements(
+                    filename,
+                    elements,
+                    directory=os.path.join(self.path, directory),
+                    replace=True,
+                )
+            )
+        for (directory, filename), buffer in self._sequences.items():
+            paths.append(
+                write_sequences(
+                    filename,
+                    pd.concat(buffer["frames"], axis=1),
+                    directory=os.path.join(self.path, directory),
+                    replace=True,
+                    time_format=buffer["time_format"],
+                )
+            )
+        self._elements.clear()
+        self._sequences.clear()
+
+        if self.metadata is not None:
+            infer_metadata(
+                **dict(
+                    {"path": self.path, "incremental": True}, **self.metadata
+                )
+            )
+        return paths
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+On-disk cache for parsed datapackage resources.
+
+Parsing and casting the CSV files of a datapackage is the dominant cost of
+`EnergySystem.from_datapackage` for large packages. The
+:class:`ResourceCache` stores the parsed content of every resource in a
+binary format, keyed by the resource's descriptor and the state of its data
+files, so that loading an unchanged package again only has to read these
+binary files.
+
+Nothing stored in the cache is executed when it is loaded, so a cache
+directory shared with others can at most hand out wrong data, but it can't
+run code.
+
+"""
+import datetime
+import hashlib
+import json
+import os
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from datapackage import Resource
+from oemof.solph import helpers
+
+from oemof.tabular import __version__
+
+#: Bump this, whenever the layout of the cached files changes.
+CACHE_FORMAT = 3
+
+#: The tags of values, which JSON has no type for, in cached rows, along with
+#: the functions restoring them from text.
+TAGGED = {
+    "decimal": Decimal,
+    "datetime": datetime.datetime.fromisoformat,
+    "date": datetime.date.fromisoformat,
+    "time": datetime.time.fromisoformat,
+}
+
+
+def _encode(value):
+    """Returns `value`, a value of a row, in a form JSON can represent.
+
+    Values which JSON has no type for, objects and arrays are tagged by
+    wrapping them in an object holding them under their tag, so that the
+    objects of rows can't be mistaken for tagged values.
+
+    Raises
+    ------
+    TypeError
+        If `value` can't be represented.
+    """
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, dict):
+        return {"object": {k: _encode(v) for k, v in value.items()}}
+    if isinstance(value, list):
+        return {"array": [_encode(v) for v in value]}
+    if isinstance(value, Decimal):
+        return {"decimal": str(value)}
+    # `datetime` is a subclass of `date`, so it is checked first.
+    for tag, kind in [
+        ("datetime", datetime.datetime),
+        ("date", datetime.date),
+        ("time", datetime.time),
+    ]:
+        if isinstance(value, kind):
+            return {tag: value.isoformat()}
+    raise TypeError(
+        "Values of type {} aren't cached.".format(type(value).__name__)
+    )
+
+
+def _decode(value):
+    """Restores a value encoded by :func:`_encode`."""
+    if not isinstance(value, dict):
+        return value
+    ((tag, content),) = value.items()
+    if tag == "object":
+        return {k: _decode(v) for k, v in content.items()}
+    if tag == "array":
+        return [_decode(v) for v in content]
+    return TAGGED[tag](content)
+
+
+class ResourceCache:
+    r"""Cache of parsed resources stored in a directory.
+
+    Element rows are stored as JSON, sequence columns as `.npz` archives
+    of NumPy arrays. The key of a resource is a hash of its descriptor and,
+    for every data file of the resource, either the file's path, size and
+    modification time or, if `hash_files` is set, a hash of the file's
+    content. Changing a resource's data or metadata therefore invalidates
+    its cache entry.
+
+    Whenever an entry is added, least recently used entries are removed
+    until the total size of the cache is below `max_size`.
+
+    Parameters
+    ----------
+    directory: str (optional)
+        Directory where cached resources are stored. Defaults to
+        `~/.oemof/tabular_cache`.
+    max_size: int (optional)
+        Maximum total size of the cache in bytes. Default: 2 GiB.
+    hash_files: boolean (optional)
+        Key resources by the content of their files instead of their size
+        and modification time. Slower, but survives copying a package.
+        Default: False.
+    """
+
+    def __init__(self, directory=None, max_size=2 * 1024**3, hash_files=False):
+        if directory is None:
+            directory = helpers.extend_basic_path("tabular_cache")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_size = max_size
+        self.hash_files = hash_files
+
+    def key(self, r):
+        """Returns the cache key of resource `r` or `None` if `r` can't be
+        cached, e.g. because it is a remote resource.
+        """
+        if not isinstance(r, Resource) or r.remote:
+            return None
+        h = hashlib.sha256()
+        h.update(
+            json.dumps(
+                [CACHE_FORMAT, __version__, r.descriptor],
+                sort_keys=True,
+                default=str,
+            ).encode()
+        )
+        if r.local:
+            paths = r.source if isinstance(r.source, list) else [r.source]
+            for path in paths:
+                if self.hash_files:
+                    with open(path, "rb") as f:
+                        for chunk in iter(lambda: f.read(2**20), b""):
+                            h.update(chunk)
+                else:
+                    stat = os.stat(path)
+                    h.update(
+                        "{}:{}:{}".format(
+                            os.path.abspath(path),
+                            stat.st_size,
+                            stat.st_mtime_ns,
+                        ).encode()
+                    )
+        return h.hexdigest()
+
+    def _path(self, r, extension):
+        key = self.key(r)
+        if key is None:
+            return None
+        return os.path.join(self.directory, key + extension)
+
+    def _hit(self, path):
+        if path is None or not os.path.exists(path):
+            return False
+        # Mark the entry as recently used.
+        os.utime(path)
+        return True
+
+    def _write(self, path, write):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+        self.evict()
+
+    def contains(self, r, columns=False):
+        """Checks whether the rows of resource `r` or, if `columns` is set,
+        its sequence columns are cached.
+        """
+        path = self._path(r, ".npz" if columns else ".json")
+        return path is not None and os.path.exists(path)
+
+    def load_rows(self, r):
+        """Returns the cached rows of resource `r` or `None`."""
+        path = self._path(r, ".json")
+        if not self._hit(path):
+            return None
+        with open(path, "rb") as f:
+            return [
+                {name: _decode(value) for name, value in row.items()}
+                for row in json.load(f)
+            ]
+
+    def store_rows(self, r, rows):
+        """Stores the `rows` of resource `r`.
+
+        Rows are only stored if all of their values can be represented in
+        JSON, tagging those of the types in :data:`TAGGED`.
+        """
+        path = self._path(r, ".json")
+        if path is None:
+            return
+        try:
+            encoded = [
+                {name: _encode(value) for name, value in row.items()}
+                for row in rows
+            ]
+        except TypeError:
+            return
+        self._write(path, lambda f: f.write(json.dumps(encoded).encode()))
+
+    def load_columns(self, r):
+        """Returns the cached sequence columns of resource `r` or `None`."""
+        path = self._path(r, ".npz")
+        if not self._hit(path):
+            return None
+        with np.load(path) as npz:
+            names = json.loads(npz["__names__"].item())
+            return {
+                name: (
+                    pd.DatetimeIndex(npz[str(i)])
+                    if npz[str(i)].dtype.kind == "M"
+                    else npz[str(i)]
+                )
+                for i, name in enumerate(names)
+            }
+
+    def store_columns(self, r, columns):
+        """Stores the sequence `columns` of resource `r`.
+
+        Columns are only stored if all of them can be represented as
+        NumPy arrays without falling back to Python objects.
+        """
+        path = self._path(r, ".npz")
+        arrays = {
+            str(i): np.asarray(column)
+            for i, column in enumerate(columns.values())
+        }
+        if path is None or any(a.dtype.kind == "O" for a in arrays.values()):
+            return
+        arrays["__names__"] = np.array(json.dumps(list(columns)))
+        self._write(path, lambda f: np.savez(f, **arrays))
+
+    def size(self):
+        """Returns the total size of all cached files in bytes."""
+        return sum(
+            entry.stat().st_size for entry in os.scandir(self.directory)
+        )
+
+    def evict(self):
+        """Removes least recently used entries until the cache is smaller
+        than `max_size`.
+        """
+        entries = sorted(
+            (entry.stat().st_mtime_ns, entry.stat().st_size, entry.path)
+            for entry in os.scandir(self.directory)
+            if entry.is_file() and not entry.name.endswith(".tmp")
+        )
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            os.remove(path)
+            total -= size
+
+    def clear(self):
+        """Removes all entries from the cache."""
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                os.remove(entry.path)
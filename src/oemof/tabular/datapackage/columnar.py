@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""
+Support for datapackage resources stored as Parquet or Arrow files.
+
+Besides CSV files, resources of a datapackage may be stored in the binary,
+columnar Parquet (`*.parquet`) or Arrow IPC (`*.arrow`, `*.feather`) formats.
+The schema of such a resource is taken from the file itself, numeric columns
+are loaded into NumPy arrays without parsing any text and uncompressed Arrow
+files are memory-mapped, so that their columns are used without copying.
+
+Using these formats requires `pyarrow` to be installed.
+
+"""
+import json
+import os
+
+import pandas as pd
+
+FORMATS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+MEDIATYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.feather  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise ImportError(
+            "Need to install pyarrow to use parquet or arrow resources!"
+        )
+    return pyarrow
+
+
+def file_format(path):
+    """Returns the columnar format of the file at `path` or `None`."""
+    return FORMATS.get(os.path.splitext(str(path))[1].lower())
+
+
+def resource_format(r):
+    """Returns the columnar format of resource `r` or `None`.
+
+    The format is taken from the resource's `format` property and, if that
+    isn't set, from the extension of its path.
+    """
+    fmt = r.descriptor.get("format")
+    if fmt in MEDIATYPES:
+        return fmt
+    if fmt is None and isinstance(r.descriptor.get("path"), str):
+        return file_format(r.descriptor["path"])
+    return None
+
+
+def _floats(pa, table):
+    for i, field in enumerate(table.schema):
+        if pa.types.is_decimal(field.type):
+            table = table.set_column(
+                i, field.name, table.column(i).cast(pa.float64())
+            )
+    return table
+
+
+def read_table(path, columns=None):
+    """Reads the Parquet or Arrow file at `path` into a `pyarrow.Table`.
+
+    Arrow files are memory-mapped. Decimal columns are cast to float64, so
+    that numbers are never read as `Decimal`. If `columns` is given, only
+    these columns are read.
+    """
+    pa = _pyarrow()
+    if file_format(path) == "arrow":
+        table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+        if columns is not None:
+            table = table.select(columns)
+    else:
+        table = pa.parquet.read_table(str(path), columns=columns)
+    return _floats(pa, table)
+
+
+def read_schema(path):
+    """Reads only the schema of the Parquet or Arrow file at `path`."""
+    pa = _pyarrow()
+    if file_format(path) == "arrow":
+        return pa.ipc.open_file(pa.memory_map(str(path))).schema
+    return pa.parquet.read_schema(str(path))
+
+
+def _column(table, name):
+    column = table.column(name)
+    if column.num_chunks == 1:
+        column = column.chunk(0)
+    return column.to_numpy(zero_copy_only=False)
+
+
+def _values(pa, table, field):
+    values = _column(table, field.name)
+    if pa.types.is_timestamp(field.type):
+        values = pd.DatetimeIndex(values)
+        if values.tz is not None:
+            values = values.tz_convert(None)
+    elif field.name == "timeindex":
+        values = pd.DatetimeIndex(pd.to_datetime(values))
+    return values
+
+
+def read_slice(path, select, columns=None):
+    """Reads the rows of the Parquet or Arrow file at `path` chosen by
+    `select`.
+
+    `select` is called with the file's `timeindex` column and has to return
+    the `slice` of rows to read. Only this column and the row groups
+    overlapping the slice are read from Parquet files. Arrow files are
+    memory-mapped and sliced without copying. If `columns` is given, only
+    these columns are read.
+    """
+    pa = _pyarrow()
+    if file_format(path) == "arrow":
+        table = read_table(path, columns)
+        field = table.schema.field("timeindex")
+        start, stop, _ = select(_values(pa, table, field)).indices(
+            table.num_rows
+        )
+        return table.slice(start, max(stop - start, 0))
+    f = pa.parquet.ParquetFile(str(path))
+    times = f.read(columns=["timeindex"])
+    start, stop, _ = select(
+        _values(pa, times, times.schema.field("timeindex"))
+    ).indices(times.num_rows)
+    groups, offset, first = [], 0, None
+    for i in range(f.num_row_groups):
+        n = f.metadata.row_group(i).num_rows
+        if offset < stop and offset + n > start:
+            first = offset if first is None else first
+            groups.append(i)
+        offset += n
+    if not groups:
+        table = f.schema_arrow.empty_table()
+        return _floats(pa, table if columns is None else table.select(columns))
+    table = f.read_row_groups(groups, columns=columns)
+    return _floats(pa, table.slice(start - first, stop - start))
+
+
+def read_columns(r, select=None, names=None):
+    """Reads the columnar resource `r` into a dictionary of NumPy arrays.
+
+    Datetime columns are returned as (timezone naive) `pandas.DatetimeIndex`
+    just like the ones parsed from CSV files. If `select` is given, only the
+    rows it chooses are read (see :func:`read_slice`). If `names` is given,
+    only the `timeindex` and the columns in `names` are read.
+    """
+    columns = None
+    if names is not None:
+        columns = [
+            name
+            for name in read_schema(r.source).names
+            if name == "timeindex" or name in names
+        ]
+    if select is None:
+        table = read_table(r.source, columns)
+    else:
+        table = read_slice(r.source, select, columns)
+    pa = _pyarrow()
+    return {field.name: _values(pa, table, field) for field in table.schema}
+
+
+def read_rows(r):
+    """Reads the columnar resource `r` as a list of dictionaries.
+
+    The result matches
+    :func:`~oemof.tabular.datapackage.reading.table_rows`. Fields of type
+    `object` or `array` which are stored as JSON strings are decoded.
+    """
+    table = read_table(r.source)
+    decode = {
+        field["name"]
+        for field in r.descriptor.get("schema", {}).get("fields", [])
+        if field.get("type") in ("object", "array")
+    }
+    rows = table.to_pylist()
+    for row in rows:
+        for name in decode:
+            if isinstance(row.get(name), str):
+                row[name] = json.loads(row[name]) if row[name] else None
+    return rows
+
+
+def read_dataframe(path):
+    """Reads the Parquet or Arrow file at `path` into a DataFrame."""
+    return read_table(path).to_pandas()
+
+
+def write_dataframe(df, path):
+    """Writes the DataFrame `df` to `path` as Parquet or Arrow file.
+
+    Dictionaries and lists in object columns are stored as JSON strings.
+    Arrow files are written uncompressed, so that they can be memory-mapped.
+    """
+    pa = _pyarrow()
+    df = df.copy()
+    for name in df.columns[df.dtypes == object]:
+        df[name] = [
+            json.dumps(v) if isinstance(v, (dict, list)) else v
+            for v in df[name]
+        ]
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if file_format(path) == "arrow":
+        pa.feather.write_feather(table, str(path), compression="uncompressed")
+    else:
+        pa.parquet.write_table(table, str(path))
+    return path
+
+
+def _field_type(pa, field, column):
+    if pa.types.is_boolean(field.type):
+        return "boolean"
+    if pa.types.is_integer(field.type):
+        return "integer"
+    if pa.types.is_floating(field.type) or pa.types.is_decimal(field.type):
+        return "number"
+    if pa.types.is_timestamp(field.type):
+        return "datetime"
+    if pa.types.is_date(field.type):
+        return "date"
+    if pa.types.is_list(field.type) or pa.types.is_large_list(field.type):
+        return "array"
+    if pa.types.is_struct(field.type) or pa.types.is_map(field.type):
+        return "object"
+    if pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+        values = [v for v in column.to_pylist() if v]
+        for prefix, json_type in (("{", "object"), ("[", "array")):
+            if values and all(v.lstrip().startswith(prefix) for v in values):
+                return json_type
+        return "string"
+    return "any"
+
+
+def infer_descriptor(path):
+    """Returns a resource descriptor for the Parquet or Arrow file `path`.
+
+    The field types are derived from the file's schema. Only string columns
+    are looked at to tell JSON encoded `object` and `array` fields apart
+    from plain strings.
+    """
+    pa = _pyarrow()
+    schema = read_schema(path)
+    strings = [
+        field.name
+        for field in schema
+        if pa.types.is_string(field.type)
+        or pa.types.is_large_string(field.type)
+    ]
+    table = read_table(path).select(strings) if strings else None
+    fmt = file_format(path)
+    return {
+        "path": str(path),
+        "profile": "tabular-data-resource",
+        "name": os.path.splitext(os.path.basename(str(path)))[0],
+        "format": fmt,
+        "mediatype": MEDIATYPES[fmt],
+        "schema": {
+            "fields": [
+                {
+                    "name": field.name,
+                    "type": _field_type(
+                        pa,
+                        field,
+                        (
+                            table.column(field.name)
+                            if field.name in strings
+                            else None
+                        ),
+                    ),
+                    "format": "default",
+                }
+                for field in schema
+            ],
+            "missingValues": [""],
+        },
+    }
@@ -0,0 +1,503 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental reloading of energy systems after edits of their datapackage.
+
+An :class:`IncrementalLoader` deserializes an energy system from a
+datapackage once and keeps what it read, along with the state of every
+file of the package. Reloading the package afterwards only reads the
+resources whose files changed, parses only the changed rows of element
+resources and rebuilds only the facades created from these rows, together
+with the facades depending on them through foreign keys, in the existing
+energy system.
+
+"""
+import hashlib
+import os
+from dataclasses import dataclass, field
+
+import datapackage as dp
+import numpy as np
+
+from .._facade import add_nodes, remove_nodes
+from .reading import (
+    PackageReader,
+    csv_dialect,
+    csv_lines,
+    deserialize_energy_system,
+    facade_factory,
+    in_directory,
+    listify,
+    local_csv,
+    parse_resource,
+    read_facade,
+    read_periods,
+    table_rows,
+    unpack_sequences,
+)
+
+
+@dataclass
+class ChangeSet:
+    """The changes applied by :meth:`IncrementalLoader.reload`.
+
+    Attributes
+    ----------
+    resources: set
+        Names of the resources whose files changed.
+    added: set
+        Names of the elements which have been added to the package.
+    removed: set
+        Names of the elements which have been removed from the package.
+    modified: set
+        Names of the elements whose rows changed.
+    rebuilt: set
+        Names of all facades which have been created anew, i.e. the added
+        and modified elements and the elements referencing these, removed
+        elements or changed sequence columns, directly or indirectly.
+    full: boolean
+        Whether the energy system had to be deserialized from scratch.
+    """
+
+    resources: set = field(default_factory=set)
+    added: set = field(default_factory=set)
+    removed: set = field(default_factory=set)
+    modified: set = field(default_factory=set)
+    rebuilt: set = field(default_factory=set)
+    full: bool = False
+
+
+def _paths(r):
+    """Returns the local files of resource `r` or `None` for inline and
+    remote resources.
+    """
+    if not r.local or r.descriptor.get("data") is not None:
+        return None
+    return list(listify(r.source, 1))
+
+
+def _stat(paths):
+    return tuple(
+        (s.st_size, s.st_mtime_ns) for s in (os.stat(p) for p in paths)
+    )
+
+
+def _digest(paths):
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+class IncrementalLoader:
+    """Deserializes an energy system from a datapackage and reloads it
+    incrementally after edits of the package.
+
+    :meth:`load` deserializes the energy system just like
+    `EnergySystem.from_datapackage` does. :meth:`reload` then updates this
+    energy system in place:
+
+      - Resources whose files have neither a new size nor a new
+        modification time, or whose content hash didn't change, are not
+        read at all.
+      - Of a changed element resource only the lines which are new are
+        parsed, provided the resource is a local CSV file whose lines are
+        its rows. Otherwise the resource is parsed completely and its rows
+        are compared to the previous ones.
+      - Of a changed sequence resource only the columns whose values
+        changed are taken into account.
+      - Only the facades of added or modified rows and the facades
+        referencing these, removed rows or changed sequence columns via
+        foreign keys, directly or indirectly, are rebuilt. The old facades
+        and their flows are removed from the energy system and the new ones
+        are added at its end.
+
+    The energy system is deserialized from scratch instead if the
+    package's descriptor, a resource which is neither an element nor a
+    sequence resource, e.g. `periods` or `temporal`, or the timeindex of a
+    sequence changed. The same happens on the next :meth:`reload` after a
+    reload failed, e.g. because of a dangling foreign key.
+
+    Parameters
+    ----------
+    cls: type
+        The energy system class, e.g. `oemof.solph.EnergySystem`.
+    path: str
+        Path of the package's descriptor, i.e. its `datapackage.json`.
+    typemap: dict
+        See :func:`~.reading.deserialize_energy_system`.
+    attributemap: dict
+        See :func:`~.reading.deserialize_energy_system`.
+    lazy: boolean
+        Create facades without building their solph components, see
+        :func:`~.reading.deserialize_energy_system`.
+        Rebuilt facades have to be built again via
+        :func:`~oemof.tabular._facade.build_facades` then.
+    time_window: tuple or slice
+        Only load the timesteps in this window, see
+        :func:`~oemof.tabular.datapackage.reading.window_slice`.
+    mmap_sequences: boolean
+        Load sequences from memory-mapped sidecar files, see
+        :mod:`~oemof.tabular.datapackage.sidecars`.
+
+    Examples
+    --------
+    >>> loader = IncrementalLoader(
+    ...     EnergySystem, "datapackage.json", typemap=TYPEMAP
+    ... )  # doctest: +SKIP
+    >>> es = loader.load()  # doctest: +SKIP
+    >>> # edit a row of data/elements/wind.csv, then
+    >>> es, changes = loader.reload()  # doctest: +SKIP
+    """
+
+    def __init__(
+        self,
+        cls,
+        path,
+        typemap=None,
+        attributemap=None,
+        lazy=False,
+        time_window=None,
+        mmap_sequences=False,
+    ):
+        self.cls = cls
+        self.path = path
+        self.typemap = {} if typemap is None else typemap
+        self.attributemap = {} if attributemap is None else attributemap
+        self.lazy = lazy
+        self.time_window = time_window
+        self.mmap_sequences = mmap_sequences
+        self.energysystem = None
+
+    def reader(self, package):
+        return PackageReader(
+            package, mmap=self.mmap_sequences, window=self.time_window
+        )
+
+    def load(self):
+        """Deserializes the energy system from scratch and returns it."""
+        self.energysystem = None
+        package = dp.Package(self.path)
+        reader = self.reader(package)
+        self.descriptor = (
+            _digest([self.path]) if os.path.isfile(self.path) else None
+        )
+        #: The state of the files of every local resource, by resource name.
+        self.files = {}
+        for r in package.resources:
+            paths = _paths(r)
+            if paths is not None:
+                self.files[r.name] = (_stat(paths), _digest(paths))
+        #: The rows of every element, by element name, as they have been
+        #: read, i.e. with unresolved foreign keys.
+        self.elements = {}
+        #: The header of every element resource and its rows by line.
+        self.tables = {}
+        for r in package.resources:
+            if in_directory(r, "data/elements"):
+                rows = reader.read(r)
+                for row in rows:
+                    self.elements.setdefault(row["name"], (r.name, row))
+                self.tables[r.name] = self.table(r, rows)
+
+        es = deserialize_energy_system(
+            self.cls,
+            self.path,
+            self.typemap,
+            self.attributemap,
+            lazy=self.lazy,
+            reader=reader,
+        )
+
+        self.package = package
+        self.foreign_keys = reader.foreign_keys
+        self.cast_error = reader.cast_error
+        self.data = {
+            r.name: reader.columns[r.name]
+            for r in package.resources
+            if in_directory(r, "data/sequences")
+        }
+        self.timeindices = reader.timeindices
+        self.period_data = read_periods(reader, self.time_window)
+        subnodes = {
+            id(sn) for n in es.nodes for sn in getattr(n, "subnodes", ())
+        }
+        labels = {n.label: n for n in es.nodes if id(n) not in subnodes}
+        #: The facade of every element.
+        self.facades = {
+            name: labels[name] for name in self.elements if name in labels
+        }
+        #: The fields of every resource which foreign keys reference.
+        self.targets = {}
+        #: The elements referencing a row or sequence column, keyed by the
+        #: referenced resource, field and value. Sequence columns have no
+        #: field.
+        self.referrers = {}
+        for name, (resource, row) in self.elements.items():
+            self.index(name, resource, row)
+        self.energysystem = es
+        return es
+
+    def table(self, r, rows):
+        """Returns the header of resource `r` and its `rows` by line, or
+        `None` if its lines aren't its rows.
+        """
+        path = local_csv(r)
+        if path is None:
+            return None
+        lines = csv_lines(r, path, csv_dialect(r, path))
+        if lines is None or len(set(lines[1:])) != len(rows):
+            return None
+        return lines[0], dict(zip(lines[1:], rows))
+
+    def references(self, resource, row):
+        """Yields the keys of :attr:`referrers` under which `row` of
+        `resource` references other rows or sequence columns.
+        """
+        for fields, reference in self.foreign_keys(resource).items():
+            value = row.get(fields)
+            if value is None:
+                continue
+            target = reference["resource"] or resource
+            if target in self.data:
+                yield target, None, value
+            elif reference.get("fields"):
+                self.targets.setdefault(target, set()).add(reference["fields"])
+                yield target, reference["fields"], value
+
+    def index(self, name, resource, row, remove=False):
+        """Adds element `name` to or removes it from :attr:`referrers`."""
+        for key in self.references(resource, row):
+            if remove:
+                self.referrers.get(key, set()).discard(name)
+            else:
+                self.referrers.setdefault(key, set()).add(name)
+
+    def dependents(self, resource, row):
+        """Returns the elements referencing `row` of `resource`."""
+        return set().union(
+            *(
+                self.referrers.get((resource, field, row.get(field)), ())
+                for field in self.targets.get(resource, ())
+            )
+        )
+
+    def changed(self):
+        """Returns the resources of the package whose files changed."""
+        changed = []
+        for r in self.package.resources:
+            if r.name not in self.files:
+                continue
+            paths = _paths(r)
+            stat, digest = self.files[r.name]
+            current = _stat(paths)
+            if current == stat:
+                continue
+            digest, old = _digest(paths), digest
+            self.files[r.name] = (current, digest)
+            if digest != old:
+                changed.append(r)
+        return changed
+
+    def diff(self, r):
+        """Returns the rows removed from and added to element resource `r`.
+
+        Only the new lines of `r` are parsed, if possible.
+        """
+        table = self.tables.get(r.name)
+        path = local_csv(r)
+        lines = (
+            None if path is None else csv_lines(r, path, csv_dialect(r, path))
+        )
+        try:
+            current = set(lines[1:]) if lines is not None else ()
+            if (
+                table is not None
+                and lines is not None
+                and lines[0] == table[0]
+                and len(current) == len(lines) - 1
+            ):
+                header, old = table
+                new = [line for line in lines[1:] if line not in old]
+                parsed = table_rows(r, lines=[header, *new])
+                if parsed is not None:
+                    gone = [line for line in old if line not in current]
+                    removed = [old.pop(line) for line in gone]
+                    old.update(zip(new, parsed))
+                    return removed, parsed
+            rows = parse_resource(r)
+        except dp.exceptions.CastError as e:
+            raise self.cast_error(r, e)
+        old = {
+            name: row
+            for name, (resource, row) in self.elements.items()
+            if resource == r.name
+        }
+        new = {row["name"]: row for row in rows}
+        self.tables[r.name] = self.table(r, rows)
+        return (
+            [row for name, row in old.items() if new.get(name) != row],
+            [row for name, row in new.items() if old.get(name) != row],
+        )
+
+    def resolve(self, name, facades):
+        """Returns a copy of the row of element `name` which
+        :func:`~oemof.tabular.datapackage.reading.read_facade` can create a
+        facade from.
+
+        Foreign keys referencing elements without a facade in `facades` are
+        replaced by the resolved rows of these elements.
+
+        Raises
+        ------
+        datapackage.exceptions.LoadError
+            If a foreign key references a row which doesn't exist.
+        """
+        resource, row = self.elements[name]
+        row = dict(row)
+        for fields, reference in self.foreign_keys(resource).items():
+            target = reference["resource"] or resource
+            value = row.get(fields)
+            if value is None or target in self.data:
+                continue
+            if value in facades:
+                row[fields] = {reference["fields"]: value}
+                continue
+            found = self.elements.get(value)
+            if found is None or found[0] != target:
+                raise dp.exceptions.LoadError(
+                    'Foreign key "{}" violation in `{}`: {} not found in '
+                    "`{}`.".format(fields, resource, value, target)
+                )
+            row[fields] = self.resolve(value, facades)
+        return unpack_sequences(facade=row, period_data=self.period_data)
+
+    def reload(self):
+        """Updates the energy system to the current state of the package.
+
+        Returns
+        -------
+        tuple
+            The updated energy system, which is a new one if it had to be
+            deserialized from scratch, and the :class:`ChangeSet`.
+        """
+        if self.energysystem is None:
+            return self.load(), ChangeSet(full=True)
+        if self.descriptor is not None and self.descriptor != _digest(
+            [self.path]
+        ):
+            return self.load(), ChangeSet(full=True)
+        resources = self.changed()
+        changes = ChangeSet(resources={r.name for r in resources})
+        if any(
+            not in_directory(r, "data/elements")
+            and not in_directory(r, "data/sequences")
+            for r in resources
+        ):
+            return self.load(), ChangeSet(changes.resources, full=True)
+        try:
+            self.update(resources, changes)
+        except Exception:
+            self.energysystem = None
+            raise
+        return self.energysystem, changes
+
+    def update(self, resources, changes):
+        """Applies the changes of `resources` to the energy system and
+        records them in `changes`.
+        """
+        # Sequence columns are compared first, as a new timeindex means
+        # deserializing the energy system from scratch.
+        affected = set()
+        reader = self.reader(self.package)
+        for r in resources:
+            if not in_directory(r, "data/sequences"):
+                continue
+            columns = reader.sequences(r)
+            if not reader.timeindices[r.name].equals(self.timeindices[r.name]):
+                self.energysystem = self.load()
+                changes.full = True
+                return
+            old = self.data[r.name]
+            for column in set(old) | set(columns):
+                if column not in old or column not in columns:
+                    changed = True
+                else:
+                    changed = not np.array_equal(
+                        np.asarray(old[column]), np.asarray(columns[column])
+                    )
+                if changed:
+                    affected.update(
+                        self.referrers.get((r.name, None, column), ())
+                    )
+            self.data[r.name] = columns
+
+        old, new = {}, {}
+        for r in resources:
+            if not in_directory(r, "data/elements"):
+                continue
+            gone, came = self.diff(r)
+            for row in gone:
+                old[row["name"]] = row
+            for row in came:
+                if row["name"] in new:
+                    raise dp.exceptions.LoadError(
+                        "Element `{}` is defined more than once.".format(
+                            row["name"]
+                        )
+                    )
+                new[row["name"]] = (r.name, row)
+        for name in new.keys() - old.keys():
+            if name in self.elements:
+                raise dp.exceptions.LoadError(
+                    "Element `{}` is defined more than once.".format(name)
+                )
+        changes.added = new.keys() - old.keys()
+        changes.removed = old.keys() - new.keys()
+        changes.modified = {
+            name
+            for name in old.keys() & new.keys()
+            if (self.elements[name][0], old[name]) != new[name]
+        }
+
+        changed = changes.added | changes.removed | changes.modified
+        for name in changed:
+            if name in self.elements:
+                resource, row = self.elements.pop(name)
+                self.index(name, resource, row, remove=True)
+                affected.update(self.dependents(resource, row))
+            if name in new:
+                resource, row = self.elements[name] = new[name]
+                self.index(name, resource, row)
+        affected |= changed
+        todo = list(affected)
+        while todo:
+            name = todo.pop()
+            if name not in self.elements:
+                continue
+            for dependent in self.dependents(*self.elements[name]):
+                if dependent not in affected:
+                    affected.add(dependent)
+                    todo.append(dependent)
+
+        es = self.energysystem
+        remove_nodes(
+            es, [self.facades.pop(n) for n in affected if n in self.facades]
+        )
+        objects = {}
+        create = facade_factory(self.attributemap, objects, self.lazy)
+        rebuilt = sorted(n for n in affected if n in self.elements)
+        for name in rebuilt:
+            read_facade(
+                self.resolve(name, self.facades),
+                self.facades,
+                create,
+                self.typemap,
+                self.data,
+                objects,
+                set(self.data),
+                self.foreign_keys(self.elements[name][0]),
+                self.foreign_keys,
+            )
+        add_nodes(es, [self.facades[name] for name in rebuilt])
+        changes.rebuilt = set(rebuilt)
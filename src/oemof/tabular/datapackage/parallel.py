@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Running independent per-resource work on a pool of threads or processes.
+
+Parsing, casting and inferring the metadata of one resource doesn't depend
+on any other resource, so these steps can run concurrently. The results are
+always collected in the order the work was submitted in, so that using a
+pool doesn't change the outcome, including which error is reported first.
+
+When using processes, the functions and their arguments have to be
+picklable and, on platforms which don't `fork` new processes, the calling
+script has to guard its entry point with `if __name__ == "__main__":`.
+
+"""
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+EXECUTORS = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+
+
+def pool(executor="process", workers=None, **kwargs):
+    """Returns a new executor of kind `executor` with `workers` workers.
+
+    Parameters
+    ----------
+    executor: string
+        Either "thread" or "process".
+    workers: int (optional)
+        Number of workers. Defaults to the number of CPUs.
+    **kwargs
+        Further arguments of the executor, e.g. its `initializer`.
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(
+            "Unknown executor '{}'. Use one of: {}".format(
+                executor, ", ".join(sorted(EXECUTORS))
+            )
+        )
+    return EXECUTORS[executor](max_workers=workers, **kwargs)
+
+
+def run(function, arguments, workers=None, executor="process"):
+    """Calls `function(*args)` for every `args` in `arguments`.
+
+    The calls are run on a pool of `workers` threads or processes,
+    depending on `executor`. If `workers` is `None`, they are run one after
+    the other in the calling thread instead.
+
+    Returns
+    -------
+    list of concurrent.futures.Future
+        One finished future per call, in the order of `arguments`. Errors
+        raised by a call are re-raised when the result of its future is
+        requested.
+    """
+    arguments = list(arguments)
+    if workers is None or len(arguments) < 2:
+        futures = []
+        for args in arguments:
+            future = Future()
+            try:
+                future.set_result(function(*args))
+            except Exception as e:
+                future.set_exception(e)
+            futures.append(future)
+        return futures
+    with pool(executor, workers) as p:
+        futures = [p.submit(function, *args) for args in arguments]
+    return futures
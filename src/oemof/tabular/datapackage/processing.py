@@ -7,12 +7,56 @@ import json
 import os
 import shutil
 
-from datapackage import Package
+from .building import read_descriptor, save_descriptor
 
-from .building import package_from_resources
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
+#: The `ioctl` request cloning a file on Linux, i.e. sharing its blocks.
+FICLONE = 0x40049409
 
-def copy_datapackage(source, destination, subset=None):
+
+def link_file(source, destination):
+    """Links the file `source` to `destination`, copying it if that isn't
+    possible.
+
+    The file is reflinked on file systems supporting it, i.e. both files
+    share their blocks until one of them is changed. Otherwise it is
+    hardlinked, i.e. both paths name the same file, so it must only be
+    replaced, never be written in place, as the functions writing
+    resources in :mod:`~oemof.tabular.datapackage.building` do. Files on
+    other devices are copied.
+    """
+    if fcntl is not None:
+        try:
+            with open(source, "rb") as s, open(destination, "wb") as d:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError:
+            if os.path.exists(destination):
+                os.remove(destination)
+        else:
+            shutil.copystat(source, destination)
+            return destination
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+    return destination
+
+
+def _paths(root, resource):
+    """Returns the normalized paths of the local files of `resource`."""
+    paths = resource.get("path", [])
+    return [
+        os.path.normpath(os.path.join(root, path))
+        for path in ([paths] if isinstance(paths, str) else paths)
+        if "://" not in path
+    ]
+
+
+def copy_datapackage(source, destination, subset=None, link=False, rewrite=()):
     """
     Parameters
     ----------
@@ -20,46 +64,70 @@ def copy_datapackage(source, destination, subset=None):
         datapackage.json
     destination: str
         Destination of copied datapackage
-    name (optional): str
-        Name of datapackage
-    only_data: str
+    subset: str (optional)
         Name of directory to only copy subset of datapackage (for example
-        only the 'data' directory)
+        only the 'data' directory). The metadata of the copy holds the
+        descriptors of the resources in it, taken from the source, except
+        for those of the resources to `rewrite`.
+    link: boolean (optional)
+        Link the files of the resources instead of copying them (see
+        :func:`link_file`). All other files are copied.
+    rewrite: iterable (optional)
+        Names of the resources, whose files are going to be written anew.
+        Neither their files nor their descriptors are copied, the latter
+        have to be inferred once the files have been written.
     """
     if source.endswith(".json"):
         package_root = os.path.dirname(os.path.realpath(source))
-        sp = Package(
-            os.path.join(package_root, "datapackage.json")
-        )  # source package
+        descriptor = read_descriptor(os.path.realpath(source))
     else:
         raise ValueError("Set a path to a *.json meta-data file for copying.")
 
+    linked, skipped = set(), set()
+    for resource in descriptor["resources"]:
+        paths = _paths(package_root, resource)
+        (skipped if resource.get("name") in rewrite else linked).update(paths)
+
+    def copy(src, dst):
+        if link and os.path.normpath(src) in linked:
+            return link_file(src, dst)
+        return shutil.copy2(src, dst)
+
+    def ignore(directory, names):
+        return [
+            name
+            for name in names
+            if os.path.normpath(os.path.join(directory, name)) in skipped
+        ]
+
     try:
         if subset:
+            root = os.path.join(package_root, subset)
             shutil.copytree(
-                os.path.join(package_root, subset),
+                root,
                 os.path.join(destination, subset),
+                copy_function=copy,
+                ignore=ignore,
             )
-            # write new meta data for copied data
-            p = Package(base_path=destination)
-            p.infer(os.path.join(destination, "**/*.csv"))
-            for r in p.resources:
-                r.descriptor["schema"]["foreignKeys"] = (
-                    sp.get_resource(r.name)
-                    .descriptor["schema"]
-                    .get("foreignKeys", [])
-                )
-                r.commit()
-                r.save(
-                    os.path.join(destination, "resources", r.name + ".json")
+            # reuse the source's meta data of the copied resources
+            root = os.path.normpath(root)
+            descriptor["resources"] = [
+                r
+                for r in descriptor["resources"]
+                if r.get("name") not in rewrite
+                and all(
+                    os.path.commonpath([root, path]) == root
+                    for path in _paths(package_root, r)
                 )
-            package_from_resources(
-                output_path=destination,
-                resource_path=os.path.join(destination, "resources"),
+            ]
+            save_descriptor(
+                descriptor, os.path.join(destination, "datapackage.json")
             )
 
         else:
-            shutil.copytree(package_root, destination)
+            shutil.copytree(
+                package_root, destination, copy_function=copy, ignore=ignore
+            )
     except OSError as e:
         # If the error was caused because the source wasn't a directory
         if e.errno == errno.ENOTDIR:
@@ -11,40 +11,1480 @@ along with how to use the functions in this module.
 """
 
 import collections.abc as cabc
+import csv
+import io
 import json
+import os
 import re
-import typing
 import warnings
+from bisect import bisect_left, bisect_right
+from datetime import datetime
 from decimal import Decimal
-from itertools import chain, groupby, repeat
+from fnmatch import fnmatchcase
+from functools import partial
+from itertools import chain, groupby, islice, repeat
 
 import datapackage as dp
+import numpy as np
 import pandas as pd
 from oemof.network.network import Bus, Component
 
 from oemof.tabular.config.config import supported_oemof_tabular_versions
 
+from .._facade import Facade, add_nodes
 from ..tools import HSN, raisestatement, remap
+from . import columnar, parallel, sidecars, timestamps
+from .cache import ResourceCache
 
 DEFAULT = object()
 FLOW_TYPE = object()
 
 
-def sequences(r, timeindices=None):
-    """Parses the resource `r` as a sequence."""
-    result = {
-        name: [
-            float(s[name]) if isinstance(s[name], Decimal) else s[name]
-            for s in r.read(keyed=True)
+DEFAULT_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def local_csv(r):
+    """Returns the path of resource `r` if it is a single, local CSV file.
+
+    Returns `None` for inline, remote, multipart or non-CSV resources.
+    """
+    if (
+        r.descriptor.get("data") is not None
+        or not r.local
+        or r.multipart
+        or r.descriptor.get("format", "csv") != "csv"
+    ):
+        return None
+    return r.source
+
+
+def csv_dialect(r, path):
+    """Returns the dialect of the CSV file `path` belonging to `r`.
+
+    The dialect is returned as keyword arguments for `csv.reader`. Options
+    set in the resource's dialect are used as they are. Otherwise the
+    delimiter and whether spaces following it are skipped are sniffed from
+    the first lines of the file, just like `tabulator` does when reading via
+    `datapackage`.
+    """
+    dialect = r.descriptor.get("dialect", {})
+    with open(path, newline="", encoding=r.descriptor.get("encoding")) as f:
+        sample = "".join(islice(f, 100))
+    try:
+        sniffed = csv.Sniffer().sniff(sample, ",\t;|")
+        delimiter, skip = sniffed.delimiter, sniffed.skipinitialspace
+    except csv.Error:
+        delimiter, skip = ",", False
+    return {
+        "delimiter": dialect.get("delimiter", delimiter),
+        "quotechar": dialect.get("quoteChar", '"'),
+        "doublequote": dialect.get("doubleQuote", True),
+        "escapechar": dialect.get("escapeChar"),
+        "skipinitialspace": dialect.get("skipInitialSpace", skip),
+    }
+
+
+def _encoding(r):
+    encoding = r.descriptor.get("encoding") or "utf-8"
+    if encoding.lower().replace("_", "-") == "utf-8":
+        # Ignore byte order marks, just like `tabulator` does.
+        encoding = "utf-8-sig"
+    return encoding
+
+
+class LazyColumn(cabc.Sequence):
+    """Column `position` of the CSV `lines`, cast by `cast` on access.
+
+    Lets :func:`window_slice` look up the few timestamps it needs without
+    parsing the other lines.
+    """
+
+    def __init__(self, r, lines, dialect, position, cast):
+        self.r = r
+        self.lines = lines
+        self.dialect = dialect
+        self.position = position
+        self.cast = cast
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __getitem__(self, i):
+        value = next(csv.reader([self.lines[i]], **self.dialect))[
+            self.position
         ]
-        for name in r.headers
+        try:
+            return self.cast(value)
+        except ValueError as e:
+            raise dp.exceptions.CastError(
+                "Could not cast value `{}` of resource `{}`.".format(
+                    value, self.r.name
+                ),
+                errors=[e],
+            )
+
+
+def csv_lines(r, path, dialect):
+    """Returns the lines of the CSV file `path` belonging to `r`.
+
+    Returns `None` if the lines of the file might not be its rows, i.e. if
+    it contains quotes or blank lines.
+    """
+    with open(path, newline="", encoding=_encoding(r)) as f:
+        text = f.read()
+    if dialect["quotechar"] in text:
+        return None
+    lines = text.splitlines()
+    if "" in lines:
+        return None
+    return lines
+
+
+def _datetimes(r, field, values):
+    fmt = field.get("format", "default")
+    fmt = (
+        DEFAULT_DATETIME_FORMAT
+        if fmt == "default"
+        else fmt.replace("fmt:", "")
+    )
+    try:
+        if timestamps.is_epoch(field):
+            return timestamps.from_epoch(values)
+        if fmt == timestamps.FORMAT:
+            try:
+                return timestamps.parse_iso(values)
+            except ValueError:
+                pass
+        return pd.DatetimeIndex(pd.to_datetime(values, format=fmt))
+    except ValueError as e:
+        raise dp.exceptions.CastError(
+            "Could not cast field `{}` of resource `{}`.".format(
+                field["name"], r.name
+            ),
+            errors=[e],
+        )
+
+
+def sequence_columns(r, select=None, names=None):
+    """Parses the resource `r` column-wise into NumPy arrays.
+
+    The CSV file is parsed exactly once. `number` fields are parsed straight
+    into float64 arrays, `integer` fields into int64 arrays (float64 if they
+    contain missing values) and `datetime` fields into a
+    `pandas.DatetimeIndex`, as is an `integer` `timeindex`, which holds
+    seconds since the epoch (see
+    :mod:`~oemof.tabular.datapackage.timestamps`). The same checks
+    `tableschema` does when casting are applied, i.e. the headers have to
+    match the schema's field names and every non-missing value has to be
+    castable to its field's type.
+
+    If `select` is given, it is called with the `timeindex` and has to
+    return the `slice` of rows to parse. The `timeindex` is passed as
+    :class:`LazyColumn`, so that only the timestamps `select` looks at are
+    parsed, unless the lines of the file might not be its rows (see
+    :func:`csv_lines`). All other rows are skipped without being parsed.
+    If `names` is given, only the `timeindex` and the columns in `names` are
+    parsed.
+
+    Returns `None` if `r` is not a local CSV file or if its schema uses
+    features (constraints, number formatting options, other field types)
+    which are only handled by `tableschema`. Callers are expected to fall
+    back to reading `r` via `datapackage` in that case.
+    """
+    path = local_csv(r)
+    schema = r.descriptor.get("schema", {})
+    fields = schema.get("fields", [])
+    if path is None or not fields or schema.get("primaryKey"):
+        return None
+
+    dtypes, times = {}, set()
+    for field in fields:
+        if field.get("constraints") or (
+            {"decimalChar", "groupChar", "bareNumber"} & set(field)
+        ):
+            return None
+        if timestamps.is_epoch(field):
+            dtypes[field["name"]] = "int64"
+            times.add(field["name"])
+        elif field.get("type") in ("number", "integer"):
+            dtypes[field["name"]] = "float64"
+        elif field.get("type") == "datetime" and (
+            field.get("format", "default") != "any"
+        ):
+            dtypes[field["name"]] = str
+            times.add(field["name"])
+        else:
+            return None
+    if select is not None and "timeindex" not in times:
+        return None
+
+    dialect = csv_dialect(r, path)
+    with open(path, newline="", encoding=_encoding(r)) as f:
+        headers = next(csv.reader(f, **dialect), [])
+    if [h.strip() for h in headers] != [field["name"] for field in fields]:
+        raise dp.exceptions.CastError(
+            "Table headers don't match schema field names"
+        )
+    positions = [
+        i
+        for i, field in enumerate(fields)
+        if names is None
+        or field["name"] == "timeindex"
+        or field["name"] in names
+    ]
+
+    def read(source, **kwargs):
+        try:
+            return pd.read_csv(
+                source,
+                sep=dialect["delimiter"],
+                quotechar=dialect["quotechar"],
+                doublequote=dialect["doublequote"],
+                escapechar=dialect["escapechar"],
+                skipinitialspace=dialect["skipinitialspace"],
+                encoding=r.descriptor.get("encoding"),
+                header=0,
+                names=[field["name"] for field in fields],
+                na_values=schema.get("missingValues", [""]),
+                keep_default_na=False,
+                **kwargs,
+            )
+        except ValueError as e:
+            raise dp.exceptions.CastError(
+                "Could not cast values of resource `{}`.".format(r.name),
+                errors=[e],
+            )
+
+    source, rows = path, {}
+    if select is not None:
+        position = [field["name"] for field in fields].index("timeindex")
+        # Seconds since the epoch are parsed at once, as cheaply as lines.
+        epoch = dtypes["timeindex"] != str
+        lines = None if epoch else csv_lines(r, path, dialect)
+        if lines is None:
+            index = _datetimes(
+                r,
+                fields[position],
+                read(path, usecols=[position], dtype=dtypes["timeindex"]).iloc[
+                    :, 0
+                ],
+            )
+            start, stop, _ = select(index).indices(len(index))
+            rows = {
+                "skiprows": range(1, start + 1),
+                "nrows": max(stop - start, 0),
+            }
+        else:
+            # Only the timestamps needed to find the window are parsed.
+            header, lines = lines[0], lines[1:]
+            index = LazyColumn(
+                r, lines, dialect, position, field_caster(fields[position])
+            )
+            start, stop, _ = select(index).indices(len(lines))
+            source = io.StringIO("\n".join([header, *lines[start:stop]]))
+    df = read(source, usecols=positions, dtype=dtypes, **rows)
+
+    result = {}
+    for field in (fields[i] for i in positions):
+        name = field["name"]
+        if name in times:
+            result[name] = _datetimes(r, field, df[name])
+            continue
+        values = df[name].to_numpy(dtype="float64")
+        if field["type"] == "integer":
+            finite = np.isfinite(values)
+            if np.any(np.mod(values[finite], 1)) or not np.all(
+                finite | np.isnan(values)
+            ):
+                raise dp.exceptions.CastError(
+                    "Could not cast field `{}` of resource `{}` to "
+                    "integer.".format(name, r.name)
+                )
+            if finite.all():
+                values = values.astype("int64")
+        result[name] = values
+    return result
+
+
+#: The values `tableschema` casts to `True` and `False` by default.
+TRUE_VALUES = ("true", "True", "TRUE", "1")
+FALSE_VALUES = ("false", "False", "FALSE", "0")
+
+
+def _json(expected):
+    def cast(value):
+        value = json.loads(value)
+        if not isinstance(value, expected):
+            raise ValueError(value)
+        return value
+
+    return cast
+
+
+def field_caster(field):
+    """Returns a function casting the values of `field` from strings.
+
+    `number` fields are cast to `float`, `object` and `array` fields are
+    decoded from JSON. Returns `None` for fields which only `tableschema`
+    can cast, i.e. fields with constraints, number formatting options,
+    non-default formats (except for `datetime` patterns) or types other
+    than `string`, `any`, `number`, `integer`, `boolean`, `object`, `array`
+    and `datetime`.
+    """
+    kind = field.get("type", "string")
+    fmt = field.get("format", "default")
+    if kind == "datetime" and fmt != "any" and not field.get("constraints"):
+        fmt = DEFAULT_DATETIME_FORMAT if fmt == "default" else fmt
+        fmt = fmt[4:] if fmt.startswith("fmt:") else fmt
+        return lambda value: datetime.strptime(value, fmt)
+    if (
+        field.get("constraints")
+        or {"decimalChar", "groupChar", "bareNumber"} & set(field)
+        or fmt != "default"
+    ):
+        return None
+    if kind in ("string", "any"):
+        return str
+    if kind == "number":
+        return float
+    if kind == "integer":
+        return int
+    if kind == "boolean":
+        values = dict.fromkeys(field.get("falseValues", FALSE_VALUES), False)
+        values.update(
+            dict.fromkeys(field.get("trueValues", TRUE_VALUES), True)
+        )
+        return values.__getitem__
+    if kind == "object":
+        return _json(dict)
+    if kind == "array":
+        return _json(list)
+    return None
+
+
+def table_rows(r, keep=None, lines=None):
+    """Parses the resource `r` into a list of dictionaries.
+
+    The rows and the checks applied match those of
+    `datapackage.Resource.read(keyed=True)`, i.e. missing values become
+    `None`, the headers have to match the schema's field names, every row
+    has to have one value per field and the primary key has to be unique.
+    But values are cast via :func:`field_caster`, so numbers become `float`
+    instead of `Decimal`.
+
+    If `keep` is given (see :class:`RowFilter`), only the fields it looks
+    at are cast first and rows for which it is false are skipped without
+    casting or checking the others.
+
+    If `lines` are given, they are parsed instead of the lines of the file,
+    e.g. to parse only some of its rows. The first line has to be the
+    header.
+
+    Returns `None` if `r` is not a local CSV file or if one of its fields
+    can't be cast by :func:`field_caster`. Callers are expected to fall
+    back to reading `r` via `datapackage` in that case.
+    """
+    path = local_csv(r)
+    schema = r.descriptor.get("schema", {})
+    fields = schema.get("fields", [])
+    if (
+        path is None
+        or not fields
+        or r.descriptor.get("dialect", {}).get("header") is False
+    ):
+        return None
+    casters = [field_caster(field) for field in fields]
+    if None in casters:
+        return None
+
+    names = [field["name"] for field in fields]
+    missing = set(schema.get("missingValues", [""]))
+    key = [names.index(k) for k in listify(schema.get("primaryKey", []), 1)]
+    probes = (
+        []
+        if keep is None
+        else [
+            (name, names.index(name), casters[names.index(name)])
+            for name in keep.fields
+            if name in names
+        ]
+    )
+
+    rows = []
+    keys = set()
+    with open(path, newline="", encoding=_encoding(r)) as f:
+        reader = csv.reader(
+            f if lines is None else lines, **csv_dialect(r, path)
+        )
+        headers = next(reader, None)
+        if headers is None:
+            return rows
+        # `tabulator` strips whitespace off the headers, but not the values.
+        if [h.strip() for h in headers] != names:
+            raise dp.exceptions.CastError(
+                "Table headers don't match schema field names"
+            )
+        for row_number, values in enumerate(reader, start=2):
+            if len(values) != len(fields):
+                raise dp.exceptions.CastError(
+                    "Row length {} doesn't match fields count {}".format(
+                        len(values), len(fields)
+                    )
+                )
+            if keep is not None:
+                try:
+                    probe = {
+                        name: None if values[i] in missing else cast(values[i])
+                        for name, i, cast in probes
+                    }
+                except (KeyError, ValueError):
+                    # Cast errors are reported below.
+                    probe = None
+                if probe is not None and not keep(probe):
+                    continue
+            row = {}
+            errors = []
+            for name, cast, field, value in zip(
+                names, casters, fields, values
+            ):
+                if value in missing:
+                    row[name] = None
+                    continue
+                try:
+                    row[name] = cast(value)
+                except (KeyError, ValueError):
+                    errors.append(
+                        dp.exceptions.CastError(
+                            'Field "{}" can\'t cast value "{}" for type "{}" '
+                            'with format "{}"'.format(
+                                name,
+                                value,
+                                field.get("type", "string"),
+                                field.get("format", "default"),
+                            )
+                        )
+                    )
+            if errors:
+                raise dp.exceptions.CastError(
+                    "There are {} cast errors (see exception.errors)".format(
+                        len(errors)
+                    ),
+                    errors=errors,
+                )
+            if key:
+                values = tuple(row[names[i]] for i in key)
+                if not all(v is None for v in values):
+                    if values in keys:
+                        raise dp.exceptions.CastError(
+                            'Field(s) "{}" duplicates in row "{}"'.format(
+                                ", ".join(names[i] for i in key), row_number
+                            )
+                        )
+                    keys.add(values)
+            rows.append(row)
+    return rows
+
+
+def _bound(value, end=False):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        # Partial dates like "2050-03" cover the whole month, like in pandas.
+        period = pd.Period(value)
+        return period.end_time if end else period.start_time
+    return pd.Timestamp(value)
+
+
+def window_slice(timeindex, window):
+    """Returns the positions of the timesteps of `timeindex` in `window`.
+
+    `window` is either a pair `(start, end)` of timestamps, selecting all
+    timesteps from `start` up to and including `end` (like
+    `pandas.DataFrame.loc` does), or a `slice` of timestep positions. A
+    bound which is `None` is left open. As `timeindex` has to be sorted,
+    only the few timestamps needed to find the bounds are looked at.
+
+    Returns
+    -------
+    slice
+        The positions of the selected timesteps.
+
+    Raises
+    ------
+    ValueError
+        If `window` is invalid or doesn't contain any timestep.
+    """
+    if isinstance(window, slice):
+        if window.step not in (None, 1):
+            raise ValueError(
+                "Time windows with steps other than 1 are not supported."
+            )
+        positions = slice(*window.indices(len(timeindex))[:2])
+    else:
+        try:
+            start, end = window
+        except (TypeError, ValueError):
+            raise ValueError(
+                "Time window has to be a pair `(start, end)` of timestamps "
+                "or a slice of timesteps, not {!r}.".format(window)
+            )
+        start, end = _bound(start), _bound(end, True)
+        positions = slice(
+            0 if start is None else bisect_left(timeindex, start),
+            len(timeindex) if end is None else bisect_right(timeindex, end),
+        )
+    if not len(range(len(timeindex))[positions]):
+        raise ValueError(
+            "Time window {!r} doesn't contain any timestep.".format(window)
+        )
+    return positions
+
+
+def window_freq(timeindex, complete):
+    """Returns the frequency of `timeindex`, the part of a longer timeindex
+    in a time window.
+
+    A frequency can't be inferred from less than three timesteps, so the
+    frequency of shorter windows is inferred from the complete timeindex,
+    which `complete` is called to return.
+    """
+    if len(timeindex) >= 3:
+        return timeindex.inferred_freq
+    return pd.DatetimeIndex(complete()).inferred_freq
+
+
+def window_columns(columns, window):
+    """Returns the rows of the sequence `columns` in the time `window`."""
+    if window is None:
+        return columns
+    positions = window_slice(columns["timeindex"], window)
+    return {name: values[positions] for name, values in columns.items()}
+
+
+def window_rows(rows, window):
+    """Returns the `rows` with a `timeindex` in the time `window`."""
+    if window is None:
+        return rows
+    return rows[
+        window_slice(
+            pd.DatetimeIndex([row["timeindex"] for row in rows]), window
+        )
+    ]
+
+
+def select_columns(columns, names):
+    """Returns the `timeindex` and the columns in `names` of `columns`."""
+    if names is None:
+        return columns
+    return {
+        name: values
+        for name, values in columns.items()
+        if name == "timeindex" or name in names
     }
+
+
+def merge_rows(rows, changes, key="name"):
+    """Returns `rows` with `changes` applied.
+
+    Rows of `changes` replace the values which aren't missing, i.e. `None`,
+    of the row of `rows` with the same `key`, rows with a new `key` are
+    appended. The rows are copies, as deserializing an energy system
+    replaces foreign keys in its rows, but the values are shared.
+    """
+    rows = [dict(row) for row in rows]
+    index = {row.get(key): i for i, row in enumerate(rows)}
+    for change in changes:
+        i = index.get(change.get(key))
+        if i is None:
+            index[change.get(key)] = len(rows)
+            rows.append(dict(change))
+        else:
+            rows[i].update(
+                (name, value)
+                for name, value in change.items()
+                if value is not None
+            )
+    return rows
+
+
+def sequence_data(r, window=None, names=None):
+    """Returns all columns of the sequence resource `r`, including its
+    `timeindex`.
+
+    Parquet and Arrow resources are loaded straight into NumPy arrays (see
+    :func:`~oemof.tabular.datapackage.columnar.read_columns`), local CSV
+    resources are parsed once into NumPy arrays, one per column (see
+    :func:`sequence_columns`). All other resources are read once via
+    `datapackage` and their columns are returned as lists.
+
+    If a time `window` is given (see :func:`window_slice`), only the rows in
+    it are returned. If `names` is given, only the `timeindex` and the
+    columns in `names` are returned. Parquet, Arrow and local CSV resources
+    don't parse the other rows and columns at all.
+    """
+    select = None if window is None else partial(window_slice, window=window)
+    if columnar.resource_format(r):
+        return columnar.read_columns(r, select, names)
+    result = sequence_columns(r, select, names)
+    if result is None:
+        rows = r.read()
+        columns = list(zip(*rows)) or [()] * len(r.headers)
+        result = {
+            name: [float(v) if isinstance(v, Decimal) else v for v in column]
+            for name, column in zip(r.headers, columns)
+            if names is None or name == "timeindex" or name in names
+        }
+        fields = r.descriptor.get("schema", {}).get("fields", [])
+        if any(timestamps.is_epoch(field) for field in fields):
+            result["timeindex"] = timestamps.from_epoch(result["timeindex"])
+        result = window_columns(result, window)
+    return result
+
+
+def sequences(r, timeindices=None, data=None):
+    """Parses the resource `r` as a sequence.
+
+    The columns are read via :func:`sequence_data`, unless they are passed
+    in as `data` already. The `timeindex` column is stored in
+    `timeindices` under the name of `r`, if given, and dropped from the
+    result.
+    """
+    result = sequence_data(r) if data is None else data
     if timeindices is not None:
-        timeindices[r.name] = result["timeindex"]
+        timeindices[r.name] = pd.DatetimeIndex(result["timeindex"])
     result = {name: result[name] for name in result if name != "timeindex"}
     return result
 
 
+def parse_resource(r, sequence=False, window=None, names=None, keep=None):
+    """Parses and casts resource `r`, bypassing any caches.
+
+    Returns the columns `names` of `r` (see :func:`sequence_data`) in the
+    time `window` if `sequence` is set and its rows as dictionaries (see
+    :func:`table_rows`) for which `keep` is true otherwise. Numbers are
+    always returned as `float`, never as `Decimal`.
+    """
+    if sequence:
+        return sequence_data(r, window, names)
+    if columnar.resource_format(r):
+        rows = columnar.read_rows(r)
+    else:
+        rows = table_rows(r, keep)
+    if rows is None:
+        rows = r.read(keyed=True)
+        for row in rows:
+            for name, value in row.items():
+                if isinstance(value, Decimal):
+                    row[name] = float(value)
+    if keep is not None:
+        rows = [row for row in rows if keep(row)]
+    return rows
+
+
+def _parse_descriptor(descriptor, base_path, *args):
+    # Resources can't be pickled, so worker processes recreate them.
+    return parse_resource(dp.Resource(descriptor, base_path=base_path), *args)
+
+
+def listify(x, n=None):
+    return x if isinstance(x, list) else repeat(x) if not n else repeat(x, n)
+
+
+def in_directory(r, directory):
+    """Checks whether all paths of resource `r` are in `directory`."""
+    return all(
+        re.match(r"^{}/.*$".format(directory), p)
+        for p in listify(r.descriptor["path"], 1)
+    )
+
+
+def _as_array(values):
+    values = np.asarray(values)
+    if values.dtype == object:
+        try:
+            values = values.astype("float64")
+        except (TypeError, ValueError):
+            pass
+    return values
+
+
+def create_periodic_values(values, period_lengths):
+    """
+    Create periodic values from given values and period lengths.
+    The values are repeated for each period for the whole length e.g.
+    8760 values for hourly data in one period.
+
+    Parameters
+    ----------
+    values : list
+        List of values to be repeated, one for each period.
+    period_lengths : numpy.ndarray
+        Number of timesteps of every period.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of periodic values.
+    """
+    # check if length of list equals number of periods
+    if len(values) != len(period_lengths):
+        raise ValueError("Length of values does not equal number of periods.")
+    return np.repeat(_as_array(values), period_lengths)
+
+
+def create_yearly_values(values, year_spans):
+    """
+    Creates a value for every year (between two periods/explicit years)
+    Value of investment period is continued until next period.
+    E.g (1,2023), (2,2025) -> [1,1,2]
+
+    Parameters
+    ----------
+    values : list
+        Values to be interpolated, one for each period.
+    year_spans : numpy.ndarray
+        Number of years every value is continued for, see
+        :func:`year_spans`.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array with one value for every year.
+    """
+    return np.repeat(_as_array(values), year_spans)
+
+
+def year_spans(period_years):
+    """Returns the number of years between the start of a period and the
+    start of the next one, counting one year for the last period.
+    """
+    return np.append(np.diff(np.asarray(period_years, dtype="int64")), 1)
+
+
+def _condition(condition):
+    if callable(condition):
+        return condition
+    if isinstance(condition, str):
+        return lambda value: isinstance(value, str) and fnmatchcase(
+            value, condition
+        )
+    if isinstance(condition, (list, tuple, set, frozenset)):
+        conditions = [_condition(c) for c in condition]
+        return lambda value: any(c(value) for c in conditions)
+    return lambda value: value == condition
+
+
+class RowFilter:
+    """Predicate on rows which is true if a row matches all `filters`.
+
+    `filters` maps field names to conditions on the values of these fields.
+    A condition is either
+
+      - a callable, returning whether a value matches,
+      - a string, which is matched against string values as a shell-style
+        pattern (see :mod:`fnmatch`), e.g. "DE-*",
+      - a list, tuple or set of conditions, one of which has to match, or
+      - any other value, which has to be equal to the field's value.
+
+    Rows without one of the fields don't match.
+    """
+
+    def __init__(self, filters):
+        self.conditions = {
+            field: _condition(condition)
+            for field, condition in filters.items()
+        }
+        self.fields = tuple(self.conditions)
+
+    def __call__(self, row):
+        return all(
+            field in row and condition(row[field])
+            for field, condition in self.conditions.items()
+        )
+
+
+class PackageReader:
+    """Reads and casts every resource of a datapackage at most once.
+
+    The rows of each resource are cached on first access, so resources
+    which are used more than once while deserializing a package, e.g. the
+    bus resource which every other element resource references, are read
+    from disk only once. Foreign key relations are resolved against copies
+    of these cached rows instead of re-reading the referenced resources,
+    so a reader can be used to deserialize a package more than once (see
+    :meth:`reset`).
+
+    Parameters
+    ----------
+    package: datapackage.Package
+        The package to read resources from.
+    cache: :class:`~oemof.tabular.datapackage.cache.ResourceCache`
+        Optional on-disk cache. Resources found in it are loaded from there
+        instead of being parsed, freshly parsed resources are stored in it.
+    mmap: boolean
+        Load sequences from memory-mapped `.npy` sidecar files (see
+        :mod:`~oemof.tabular.datapackage.sidecars`), writing them first if
+        they are missing or outdated.
+    workers: int
+        Number of workers used by :meth:`prefetch` to parse resources
+        concurrently. If `None`, resources are parsed one after the other
+        when they are first needed.
+    executor: string
+        Kind of workers, either "process" or "thread" (see
+        :mod:`~oemof.tabular.datapackage.parallel`).
+    window: tuple or slice
+        Time window of the sequences to read (see :func:`window_slice`).
+        Rows of sequences outside of it are skipped while parsing, unless
+        `mmap` is set, as sidecars are always written for the complete
+        sequences.
+    filters: dict
+        Only rows matching `filters` (see :class:`RowFilter`) are read from
+        the element resources which no other element resource references.
+        Rows of referenced resources, e.g. buses, are only needed if they
+        are referenced, so they are not filtered.
+    parent: :class:`PackageReader`
+        Reader of the parent of `package`, if `package` is an overlay, i.e.
+        if it names the descriptor of its parent, relative to its own, under
+        the key `parent`. Created with the same options, except `filters`,
+        if not given. Sharing the reader of a parent between several
+        overlays means reading the parent only once.
+
+    Overlays hold only what they change about their parent: The resources
+    of the parent are read from the parent, unless the overlay has a
+    resource with the same name. The rows of such a resource are merged
+    into those of the parent by `name` (see :func:`merge_rows`), its
+    columns replace or are added to the columns of the sequence of the
+    parent, which has to have the same timeindex. The metadata of the
+    parent's resources applies to the merged resources.
+    """
+
+    cast_error_msg = (
+        "Metadata structure of resource `{}` does not match data "
+        "structure. Check the column names, types and their order."
+    )
+
+    def __init__(
+        self,
+        package,
+        cache=None,
+        mmap=False,
+        workers=None,
+        executor="process",
+        window=None,
+        filters=None,
+        parent=None,
+    ):
+        self.package = package
+        self.cache = cache
+        self.mmap = mmap
+        self.workers = workers
+        self.executor = executor
+        self.window = window
+        self.filters = filters
+        if parent is None and package.descriptor.get("parent"):
+            parent = PackageReader(
+                dp.Package(
+                    os.path.join(
+                        package.base_path or "", package.descriptor["parent"]
+                    )
+                ),
+                cache=cache,
+                mmap=mmap,
+                workers=workers,
+                executor=executor,
+                window=window,
+            )
+        self.parent = parent
+        #: The resources of the package itself by name.
+        self.own = {r.name: r for r in package.resources}
+        #: The resources of the package and its parents.
+        self.resources = list(package.resources)
+        if parent is not None:
+            self.resources = parent.resources + [
+                r for r in package.resources if not self.inherits(r.name)
+            ]
+        self.by_name = {r.name: r for r in self.resources}
+        self.predicates = {}
+        if filters:
+            elements = [
+                r for r in self.resources if in_directory(r, "data/elements")
+            ]
+            referenced = {
+                fk["reference"]["resource"]
+                for r in elements
+                for fk in r.descriptor.get("schema", {}).get("foreignKeys", ())
+                if fk["reference"].get("fields")
+                and fk["reference"]["resource"] not in ("", r.name)
+            }
+            keep = RowFilter(filters)
+            self.predicates = {
+                r.name: keep for r in elements if r.name not in referenced
+            }
+        #: The names of the columns to read per sequence resource, all
+        #: columns are read from resources which aren't listed.
+        self.usecols = {}
+        self.parsed = {}
+        self.rows = {}
+        self.working = {}
+        self.related = set()
+        self.fk_maps = {}
+        self.indexes = {}
+        self.columns = {}
+        self.timeindices = {}
+
+    def get_resource(self, name):
+        """Returns the resource called `name` or `None`."""
+        return self.by_name.get(name)
+
+    def inherits(self, name):
+        """Checks whether the parent has a resource called `name`."""
+        return (
+            self.parent is not None
+            and self.parent.get_resource(name) is not None
+        )
+
+    def resource(self, name):
+        """Returns the resource called `name` or an empty stand-in."""
+        r = self.get_resource(name)
+        if r is None:
+            r = HSN(name=name, headers=(), descriptor={"schema": {}})
+            # A missing resource has no rows, there is nothing to parse.
+            self.rows.setdefault(name, [])
+        return r
+
+    def foreign_keys(self, name):
+        """Returns the foreign keys of resource `name`.
+
+        The foreign keys are returned as a mapping from field names to
+        references and built only once per resource.
+        """
+        if name not in self.fk_maps:
+            self.fk_maps[name] = {
+                fk["fields"]: fk["reference"]
+                for fk in self.resource(name)
+                .descriptor["schema"]
+                .get("foreignKeys", ())
+            }
+        return self.fk_maps[name]
+
+    def cast_error(self, r, e):
+        return dp.exceptions.CastError(
+            "\n"
+            + self.cast_error_msg.format(r.name)
+            + "\n"
+            + "\n ".join(str(i) for i in (e.errors or [e])),
+            errors=e.errors,
+        )
+
+    def stored(self, r, sequence=False):
+        """Checks whether `r` can be loaded without parsing it, i.e. from
+        its sidecars or from the cache.
+        """
+        if sequence and self.mmap and sidecars.fresh(r):
+            return True
+        return bool(self.cache) and self.cache.contains(r, columns=sequence)
+
+    def pushdown(self, r, sequence):
+        """Returns the arguments of :func:`parse_resource` which cut `r`
+        while parsing it.
+
+        Sidecars are written for complete sequences, so sequences aren't cut
+        while parsing if `mmap` is set. Row filters can't be sent to worker
+        processes, so rows are filtered after parsing when using these. The
+        rows of an overlay's resource which changes its parent's are only
+        complete after merging, so they are filtered after merging.
+        """
+        if sequence:
+            if self.mmap:
+                return None, None, None
+            return self.window, self.usecols.get(r.name), None
+        if self.inherits(r.name) or (
+            self.workers is not None and self.executor == "process"
+        ):
+            return None, None, None
+        return None, None, self.predicates.get(r.name)
+
+    def referenced_columns(self, resources):
+        """Returns the names of the sequence columns referenced by the rows
+        of `resources`, per sequence resource.
+
+        Every sequence resource is listed, even if none of its columns is
+        referenced.
+        """
+        columns = {
+            r.name: set()
+            for r in self.resources
+            if in_directory(r, "data/sequences")
+        }
+        for r in resources:
+            rows = self.cached(r)
+            for field, reference in self.foreign_keys(r.name).items():
+                if reference.get("fields") or (
+                    reference["resource"] not in columns
+                ):
+                    continue
+                columns[reference["resource"]].update(
+                    row[field] for row in rows if row.get(field) is not None
+                )
+        return columns
+
+    def prefetch(self, resources):
+        """Parses `resources` concurrently.
+
+        Resources which have been read already or which can be loaded from
+        the cache or from sidecars are skipped. The others are parsed on a
+        pool of `workers` workers and kept until :meth:`read` or
+        :meth:`sequences` ask for them, so they are merged in the order in
+        which they are needed, independent of which worker finished first.
+        Cast errors are raised only then, too. Resources in
+        `data/sequences` are parsed as sequences, all others as rows. Does
+        nothing if `workers` is `None`. The resources an overlay inherits
+        are prefetched by the reader of its parent.
+        """
+        if self.workers is None:
+            return
+        resources = list(resources)
+        if self.parent is not None:
+            self.parent.prefetch(
+                self.parent.get_resource(r.name)
+                for r in resources
+                if self.inherits(r.name)
+            )
+        todo = []
+        for r in resources:
+            sequence = in_directory(r, "data/sequences")
+            if r.name not in self.own:
+                continue
+            r = self.own[r.name]
+            if (
+                r.name in (self.columns if sequence else self.rows)
+                or (r.name, sequence) in self.parsed
+                or self.stored(r, sequence)
+            ):
+                continue
+            todo.append((r, sequence))
+        if self.executor == "process":
+            function = _parse_descriptor
+            arguments = [
+                (
+                    r.descriptor,
+                    self.package.base_path,
+                    sequence,
+                    *self.pushdown(r, sequence),
+                )
+                for r, sequence in todo
+            ]
+        else:
+            function = parse_resource
+            arguments = [
+                (r, sequence, *self.pushdown(r, sequence))
+                for r, sequence in todo
+            ]
+        futures = parallel.run(
+            function, arguments, self.workers, self.executor
+        )
+        for (r, sequence), future in zip(todo, futures):
+            self.parsed[r.name, sequence] = future
+
+    def parse(self, r, sequence=False):
+        """Parses `r` (see :func:`parse_resource`) unless it has been
+        prefetched already.
+        """
+        future = self.parsed.pop((r.name, sequence), None)
+        try:
+            if future is not None:
+                return future.result()
+            return parse_resource(r, sequence, *self.pushdown(r, sequence))
+        except dp.exceptions.CastError as e:
+            raise self.cast_error(r, e)
+
+    def load_rows(self, r):
+        """Returns the rows of resource `r` of the package itself, loaded
+        from the cache or parsed.
+
+        Rows which have been filtered while parsing are not stored in the
+        cache.
+        """
+        rows = self.cache.load_rows(r) if self.cache else None
+        if rows is None:
+            rows = self.parse(r)
+            if self.cache and self.pushdown(r, False)[2] is None:
+                self.cache.store_rows(r, rows)
+        return rows
+
+    def read(self, r):
+        """Returns the rows of resource `r` as dictionaries.
+
+        The rows are shallow copies of the cached rows (see :meth:`cached`),
+        as deserializing an energy system replaces their foreign keys and
+        sequence names.
+        """
+        return [dict(row) for row in self.cached(r)]
+
+    def cached(self, r):
+        """Returns the cached rows of resource `r`, reading them first.
+
+        Only the rows matching the filters of `r` are returned, if there are
+        any. The rows of a resource the package shares with its parent are
+        merged into the parent's rows. The rows must not be changed.
+        """
+        if r.name not in self.rows:
+            keep = self.predicates.get(r.name)
+            own = self.own.get(r.name)
+            rows = [] if own is None else self.load_rows(own)
+            if self.inherits(r.name):
+                rows = merge_rows(
+                    self.parent.cached(self.parent.get_resource(r.name)), rows
+                )
+            if keep is not None:
+                rows = [row for row in rows if keep(row)]
+            self.rows[r.name] = rows
+        return self.rows[r.name]
+
+    def sequences(self, r):
+        """Returns the columns of sequence resource `r` in the time window.
+
+        Only the columns listed in :attr:`usecols` are returned. See
+        :func:`sequences` for the details. Complete sequences loaded from
+        sidecars or from the cache are cut to the time window and columns,
+        which doesn't copy them. Sequences which have been cut while parsing
+        are not stored in the cache.
+        """
+        if r.name not in self.columns:
+            own = self.own.get(r.name)
+            columns = None if own is None else self.load_columns(own)
+            if self.inherits(r.name):
+                inherited = self.parent.get_resource(r.name)
+                inherited = self.parent.sequences(inherited)
+                timeindex = self.parent.timeindices[r.name]
+                if columns is not None and not timeindex.equals(
+                    self.timeindices[r.name]
+                ):
+                    raise ValueError(
+                        f"Sequence `{r.name}` has another timeindex than the"
+                        " sequence of the parent package it changes."
+                    )
+                self.timeindices[r.name] = timeindex
+                columns = select_columns(
+                    {**inherited, **(columns or {})},
+                    self.usecols.get(r.name),
+                )
+            self.columns[r.name] = columns
+        return self.columns[r.name]
+
+    def load_columns(self, r):
+        """Returns the columns of sequence resource `r` of the package
+        itself, see :meth:`sequences`.
+        """
+        window, names = self.window, self.usecols.get(r.name)
+        data = sidecars.load(r) if self.mmap else None
+        mapped = data is not None
+        if data is None and self.cache:
+            data = self.cache.load_columns(r)
+        if data is None:
+            data = self.parse(r, sequence=True)
+            if self.pushdown(r, True) != (None, None, None):
+                window, names = None, None
+            elif self.cache:
+                self.cache.store_columns(r, data)
+        if self.mmap and not mapped:
+            data = sidecars.write(r, data)
+        return sequences(
+            r,
+            self.timeindices,
+            select_columns(window_columns(data, window), names),
+        )
+
+    def reset(self):
+        """Drops the rows whose relations have been resolved, so that
+        :meth:`relate` resolves them anew on fresh copies of the cached
+        rows.
+        """
+        self.working = {}
+        self.related = set()
+        self.indexes = {}
+
+    def working_rows(self, r):
+        """Returns the copies of the rows of resource `r` whose relations
+        are resolved by :meth:`relate`, copying them first.
+        """
+        if r.name not in self.working:
+            self.working[r.name] = self.read(r)
+        return self.working[r.name]
+
+    def index(self, r, fields):
+        """Returns a hash index of the :meth:`working_rows` of resource `r`.
+
+        The index maps the values of `fields` to the first row with these
+        values. It is built once per package and shared by all foreign keys
+        referencing the same fields of `r`.
+        """
+        key = (r.name, fields)
+        if key not in self.indexes:
+            index = {}
+            for row in self.working_rows(r):
+                index.setdefault(tuple(row[f] for f in fields), row)
+            self.indexes[key] = index
+        return self.indexes[key]
+
+    def relate(self, r):
+        """Resolves the foreign key relations of resource `r`.
+
+        Just like `datapackage.Resource.read(keyed=True, relations=True)`
+        the values of foreign key fields which reference fields of another
+        resource are replaced by the referenced row, which is looked up in
+        the referenced resource's :meth:`index`. Foreign keys without
+        reference fields, i.e. references to sequence columns, are left as
+        they are. The relations are resolved on the :meth:`working_rows` of
+        `r`, those of every resource only once until :meth:`reset` is
+        called.
+
+        Returns
+        -------
+        list of str
+            A description of every dangling reference found.
+        """
+        rows = self.working_rows(r)
+        if r.name in self.related:
+            return []
+        self.related.add(r.name)
+        violations = []
+        for fk in r.descriptor.get("schema", {}).get("foreignKeys", ()):
+            reference = fk["reference"]
+            ref_fields = tuple(listify(reference.get("fields", []), 1))
+            if not ref_fields:
+                continue
+            fields = tuple(listify(fk["fields"], 1))
+            if reference["resource"]:
+                referenced = self.get_resource(reference["resource"])
+                if referenced is None:
+                    violations.append(
+                        "Resource `{}` referenced by `{}` does not "
+                        "exist.".format(reference["resource"], r.name)
+                    )
+                    continue
+            else:
+                referenced = r
+            index = self.index(referenced, ref_fields)
+            for row_number, row in enumerate(rows, start=2):
+                key = tuple(row[f] for f in fields)
+                if all(k is None for k in key):
+                    continue
+                target = index.get(key)
+                if target is None:
+                    violations.append(
+                        'Foreign key "{}" violation in row "{}" of `{}`: '
+                        "{} not found in `{}`.".format(
+                            list(fields),
+                            row_number,
+                            r.name,
+                            key[0] if len(key) == 1 else list(key),
+                            referenced.name,
+                        )
+                    )
+                    continue
+                for field in fields:
+                    row[field] = target
+        return violations
+
+    def relation_error(self, violations):
+        """Returns one error listing all dangling references in
+        `violations` (see :meth:`relate`).
+        """
+        return dp.exceptions.RelationError(
+            "{} dangling foreign key(s):\n  {}".format(
+                len(violations), "\n  ".join(violations)
+            )
+        )
+
+    def read_related(self, r):
+        """Returns the rows of `r` with foreign key relations resolved.
+
+        See :meth:`relate`.
+
+        Raises
+        ------
+        datapackage.exceptions.RelationError
+            Listing all dangling references of `r`.
+        """
+        violations = self.relate(r)
+        if violations:
+            raise self.relation_error(violations)
+        return self.working_rows(r)
+
+    def validate(self):
+        """Reads every tabular resource, reporting all cast errors at once.
+
+        Raises
+        ------
+        datapackage.exceptions.CastError
+            Listing the errors of every resource which could not be cast.
+        """
+        errors = []
+        resources = [r for r in self.resources if r.tabular]
+        self.prefetch(resources)
+        for r in resources:
+            try:
+                if in_directory(r, "data/sequences"):
+                    self.sequences(r)
+                else:
+                    self.cached(r)
+            except dp.exceptions.CastError as e:
+                errors.append(e)
+        if errors:
+            raise dp.exceptions.CastError(
+                "".join(str(e) for e in errors), errors=errors
+            )
+
+
+def read_periods(reader, time_window=None):
+    """Reads the `periods` resource of a multi-period package.
+
+    Returns the timeindex, the time increments and the periods of the
+    package, cut to the `time_window` (see :func:`window_slice`), along
+    with the data needed to unpack values given per period (see
+    :func:`unpack_sequences`). Returns an empty dictionary if the package
+    has no `periods` resource.
+    """
+    period_data = {}
+    periods = reader.get_resource("periods")
+    if periods:
+        rows = reader.read(periods)
+        # Values given per period are cut to the periods in the time window.
+        labels = sorted({row["periods"] for row in rows})
+        df_periods = pd.DataFrame.from_dict(window_rows(rows, time_window))
+        period_data["count"] = len(labels)
+        period_data["selection"] = [
+            labels.index(period)
+            for period in sorted(df_periods["periods"].unique())
+        ]
+        period_data["timeincrement"] = df_periods["timeincrement"].values
+        period_data["timeindex"] = pd.DatetimeIndex(df_periods["timeindex"])
+        complete = pd.DataFrame.from_dict(rows).groupby("periods")
+        period_data["periods"] = [
+            pd.DatetimeIndex(
+                df["timeindex"].values,
+                freq=window_freq(
+                    pd.DatetimeIndex(df["timeindex"]),
+                    lambda: complete.get_group(period)["timeindex"],
+                ),
+                name="timeindex",
+            )
+            for period, df in df_periods.groupby("periods")
+        ]
+        period_data["years"] = period_data["timeindex"].year.unique().values
+        period_data["period_lengths"] = np.array(
+            [len(period) for period in period_data["periods"]]
+        )
+        period_data["year_spans"] = year_spans(period_data["years"])
+    return period_data
+
+
+def unpack_sequences(facade, period_data):
+    """
+    Depending on dtype and content:
+    Periodically changing values [given as array] are either unpacked into
+        - full periods (every timestep per explicit year)
+        - yearly values (one value each implicit & explicit years)
+        - kept as periodical values (one value each explicit year)
+
+    Decision happens based on
+        - value
+        - name
+        - entry in yearly/periodical values list.
+
+    Parameters
+    ----------
+    facade
+    period_data
+
+    Returns
+    -------
+    facade
+    """
+
+    yearly_values = ["fixed_costs", "marginal_costs"]
+    periodical_values = [
+        "capacity",
+        "capacity_cost",
+        "capacity_potential",
+        "storage_capacity",
+    ]
+
+    for value_name, value in facade.items():
+        # check if multi-period and value is list
+        if period_data and isinstance(value, list):
+            # check if length of list equals number of periods
+            if len(value) == period_data["count"]:
+                # keep the values of the periods in the time window
+                value = [value[i] for i in period_data["selection"]]
+                facade[value_name] = value
+                if value_name in periodical_values:
+                    # special period parameters don't need to be
+                    # converted into timeseries
+                    continue
+                elif value_name in yearly_values:
+                    # special period parameter need to be
+                    # converted into timeseries with value for each
+                    # year
+                    facade[value_name] = create_yearly_values(
+                        value, period_data["year_spans"]
+                    )
+                    msg = (
+                        f"\nThe parameter '{value_name}' of a "
+                        f"'{facade['type']}' facade is converted "
+                        "into a yearly list. This might not be "
+                        "possible for every parameter and lead to "
+                        "ambiguous error messages.\nPlease be "
+                        "aware, when using this feature!"
+                    )
+                    warnings.warn(msg, UserWarning)
+
+                else:
+                    # create timeseries with periodic values
+                    facade[value_name] = create_periodic_values(
+                        value, period_data["period_lengths"]
+                    )
+                    msg = (
+                        f"\nThe parameter '{value_name}' of a "
+                        f"'{facade['type']}' facade is converted "
+                        "into a periodic timeseries. This might "
+                        "not be possible for every parameter and "
+                        "lead to ambiguous error messages.\nPlease"
+                        " be aware, when using this feature!"
+                    )
+                    warnings.warn(msg, UserWarning)
+    return facade
+
+
+def facade_factory(attributemap, objects, lazy=False):
+    """Returns the function creating the nodes of a package.
+
+    The function, `create(cls, init, attributes)`, creates an instance of
+    `cls` from `init` and sets `attributes` on it, with their names mapped
+    via `attributemap`. Created instances are registered in `objects` under
+    their name. If `lazy` is set, facades are created without building
+    their solph components.
+    """
+
+    def create(cls, init, attributes):
+        """Creates an instance of `cls` and sets `attributes`."""
+        init.update(attributes)
+        kwargs = remap(init, attributemap, cls)
+        if lazy and isinstance(cls, type) and issubclass(cls, Facade):
+            kwargs["build_solph_components"] = False
+        instance = cls(**kwargs)
+        for k, v in remap(attributes, attributemap, cls).items():
+            if not hasattr(instance, k):
+                setattr(instance, k, v)
+            name = getattr(instance, "name", getattr(instance, "label", None))
+            if name is not None:
+                objects[name] = instance
+        return instance
+
+    return create
+
+
 def read_facade(
     facade,
     facades,
@@ -54,9 +1494,15 @@ def read_facade(
     objects,
     sequence_names,
     fks,
-    resources,
+    foreign_keys,
 ):
-    """Parse the resource `r` as a facade."""
+    """Parse the resource `r` as a facade.
+
+    Foreign keys in `fks` which reference other elements are followed
+    recursively. `foreign_keys` has to be a callable returning the foreign
+    keys of the referenced resource (see :meth:`PackageReader.foreign_keys`)
+    so that these are looked up instead of being rebuilt for every row.
+    """
     # TODO: Generate better error messages, if keys which are assumed to be
     # present, e.g. because they are used as foreign keys or because our
     # way of reading data packages needs them, are missing.
@@ -71,14 +1517,6 @@ def read_facade(
         elif facade[field][reference["fields"]] in facades:
             facade[field] = facades[facade[field][reference["fields"]]]
         else:
-            foreign_keys = {
-                fk["fields"]: fk["reference"]
-                for fk in (
-                    resources(reference["resource"])
-                    .descriptor["schema"]
-                    .get("foreignKeys", ())
-                )
-            }
             facade[field] = read_facade(
                 facade[field],
                 facades,
@@ -87,8 +1525,8 @@ def read_facade(
                 data,
                 objects,
                 sequence_names,
+                foreign_keys(reference["resource"]),
                 foreign_keys,
-                resources,
             )
     # TODO: Do we really want to strip whitespace?
     mapping = typemap.get(facade.get("type").strip())
@@ -105,12 +1543,74 @@ def read_facade(
     return instance
 
 
-def deserialize_energy_system(cls, path, typemap={}, attributemap={}):
-    cast_error_msg = (
-        "Metadata structure of resource `{}` does not match data "
-        "structure. Check the column names, types and their order."
-    )
-
+def deserialize_energy_system(
+    cls,
+    path,
+    typemap={},
+    attributemap={},
+    validate=False,
+    cache=None,
+    mmap_sequences=False,
+    workers=None,
+    executor="process",
+    lazy=False,
+    time_window=None,
+    filters=None,
+    reader=None,
+):
+    """Creates an energy system of type `cls` from the datapackage `path`.
+
+    Every resource is read and cast at most once (see
+    :class:`PackageReader`). Resources which aren't needed to build the
+    energy system are not read at all, unless `validate` is set, in which
+    case every resource is read upfront and the cast errors of all of them
+    are reported together.
+
+    Parsed resources can be kept in an on-disk cache by passing `cache`,
+    either as a :class:`~oemof.tabular.datapackage.cache.ResourceCache`,
+    as the path of the cache directory or as `True` to use the default
+    cache directory. Unchanged resources are then loaded from the cache
+    on subsequent calls instead of being parsed again.
+
+    If `mmap_sequences` is set, sequences are loaded from memory-mapped
+    `.npy` sidecar files which are written next to the sequence resources
+    on first use (see :mod:`~oemof.tabular.datapackage.sidecars`). The
+    profiles of the facades are then read-only views into these files.
+
+    If `workers` is given, all resources needed to build the energy system
+    are parsed concurrently on a pool of `workers` processes or, if
+    `executor` is "thread", threads (see :meth:`PackageReader.prefetch`)
+    before any facade is created.
+
+    If `lazy` is set, the facades are created with
+    `build_solph_components=False`, i.e. as plain records of their
+    attributes which can still be changed or dropped cheaply. Their solph
+    components have to be built via
+    :func:`~oemof.tabular._facade.build_facades` before a model is created
+    from the energy system.
+
+    If a `time_window` is given, either as pair `(start, end)` of timestamps
+    or as `slice` of timestep positions (see :func:`window_slice`), only the
+    timesteps in it are loaded. The rows of the sequences outside of the
+    window aren't parsed at all (see :class:`PackageReader`) and the
+    `periods` and `temporal` resources are cut to the window as well.
+    Periods without any timestep in the window are dropped, together with
+    their values of parameters given per period.
+
+    If `filters` are given, e.g. `{"carrier": ["wind", "solar"], "name":
+    "DE-*"}` (see :class:`RowFilter` for all options), only the elements
+    matching them are loaded. Rows which don't match are skipped while
+    parsing. Elements which are referenced by the selected ones, e.g. their
+    buses, are loaded whether they match or not, all others, e.g. buses
+    which are no longer connected, are dropped. Only the columns of the
+    sequences which are referenced by the loaded elements are read. Filters
+    which don't select any element raise a `ValueError`.
+
+    An existing :class:`PackageReader` of the package can be passed as
+    `reader`, e.g. to reuse resources it has read already. The options
+    `cache`, `mmap_sequences`, `workers`, `executor`, `time_window` and
+    `filters` are then taken from the reader and the arguments are ignored.
+    """
     default_typemap = {
         "bus": Bus,
         "hub": Bus,
@@ -128,22 +1628,38 @@ def deserialize_energy_system(cls, path, typemap={}, attributemap={}):
         if value.get("name") is None:
             attributemap[k]["name"] = "label"
 
-    package = dp.Package(path)
-    # This is necessary because before reading a resource for the first
-    # time its `headers` attribute is `None`.
-    for r in package.resources:
-        try:
-            r.read()
-        except dp.exceptions.CastError as e:
-            raise dp.exceptions.CastError(
-                "\n"
-                + (cast_error_msg).format(r.name)
-                + "\n"
-                + "\n ".join([str(i) for i in e.errors])
-            )
-    empty = HSN()
-    empty.read = lambda *xs, **ks: ()
-    empty.headers = ()
+    if reader is None:
+        if cache is True:
+            cache = ResourceCache()
+        elif cache is not None and not isinstance(cache, ResourceCache):
+            cache = ResourceCache(cache)
+        reader = PackageReader(
+            dp.Package(path),
+            cache=cache,
+            mmap=mmap_sequences,
+            workers=workers,
+            executor=executor,
+            window=time_window,
+            filters=filters,
+        )
+    package = reader.package
+    time_window = reader.window
+    filtered = bool(reader.predicates)
+    if validate:
+        reader.validate()
+    # With filters, the sequence columns to read are known only once the
+    # elements have been read.
+    reader.prefetch(
+        r
+        for r in reader.resources
+        if r.tabular
+        and (
+            in_directory(r, "data/elements")
+            or (in_directory(r, "data/sequences") and not filtered)
+            or r.name
+            in ("components", "elements", "hubs", "periods", "temporal")
+        )
+    )
 
     # check version that was used to create metadata
     oemof_tabular_version = package.descriptor.get("oemof_tabular_version")
@@ -160,29 +1676,35 @@ def deserialize_energy_system(cls, path, typemap={}, attributemap={}):
 
     data = {}
 
-    def listify(x, n=None):
-        return (
-            x if isinstance(x, list) else repeat(x) if not n else repeat(x, n)
-        )
-
-    def resource(r):
-        return package.get_resource(r) or empty
-
-    timeindices = {}
-
-    for r in package.resources:
-        if all(
-            re.match(r"^data/sequences/.*$", p)
-            for p in listify(r.descriptor["path"], 1)
+    resource = reader.resource
+    timeindices = reader.timeindices
+
+    element_resources = [
+        r for r in reader.resources if in_directory(r, "data/elements")
+    ]
+    sequence_resources = [
+        r for r in reader.resources if in_directory(r, "data/sequences")
+    ]
+    if filtered:
+        if not any(
+            reader.cached(r)
+            for r in element_resources
+            if r.name in reader.predicates
         ):
-            data.update({r.name: sequences(r, timeindices)})
+            raise ValueError(
+                "Filters {!r} don't select any element.".format(reader.filters)
+            )
+        reader.usecols = reader.referenced_columns(element_resources)
+        reader.prefetch(sequence_resources)
+    for r in sequence_resources:
+        data.update({r.name: reader.sequences(r)})
     sequence_names = set(data.keys())
 
     data.update(
         {
             name: {
                 r["name"]: {key: r[key] for key in r}
-                for r in resource(name).read(keyed=True)
+                for r in reader.read(resource(name))
             }
             for name in ("hubs", "components")
         }
@@ -206,7 +1728,7 @@ def deserialize_energy_system(cls, path, typemap={}, attributemap={}):
             ),
             "type": e["type"],
         }
-        for e in resource("elements").read(keyed=True)
+        for e in reader.read(resource("elements"))
         for inputs, outputs in (
             (
                 [p.strip() for p in e["predecessors"].split(",") if p],
@@ -295,18 +1817,7 @@ def deserialize_energy_system(cls, path, typemap={}, attributemap={}):
     }
 
     objects = {}
-
-    def create(cls, init, attributes):
-        """Creates an instance of `cls` and sets `attributes`."""
-        init.update(attributes)
-        instance = cls(**remap(init, attributemap, cls))
-        for k, v in remap(attributes, attributemap, cls).items():
-            if not hasattr(instance, k):
-                setattr(instance, k, v)
-            name = getattr(instance, "name", getattr(instance, "label", None))
-            if name is not None:
-                objects[name] = instance
-        return instance
+    create = facade_factory(attributemap, objects, lazy)
 
     data["buses"] = {
         name: create(
@@ -327,38 +1838,50 @@ def deserialize_energy_system(cls, path, typemap={}, attributemap={}):
         for mapping in (typemap.get(bus.get("type", "bus")),)
     }
 
-    def resolve_object_references(source, f=None):
+    def object_index(f=None):
+        """Maps names to the objects of the resources in `data` selected by
+        `f`.
+        """
+        index = {}
+        for r in data:
+            if (not f) or f(r):
+                for n, o in data[r].items():
+                    index.setdefault(n, []).append(o)
+        return index
+
+    def resolve_object_references(source, index):
         """
         Check whether any key in `source` is a reference to a `name`d object.
+
+        Names are looked up in `index` (see `object_index`).
         """
 
-        def find(n, d):
-            found = []
-            for resource in d:
-                if n in d[resource]:
-                    assert getattr(d[resource][n], "label", n) == n
-                    found.append(d[resource][n])
-                assert len(found) <= 1
+        def find(n):
+            found = index.get(n, ())
+            assert len(found) <= 1
+            for o in found:
+                assert getattr(o, "label", n) == n
             return found
 
-        filtered = {r: data[r] for r in data if (not f) or f(r)}
-        for key, name in source.items():
-            found = find(key, filtered)
+        for key, name in list(source.items()):
+            found = find(key)
             if len(found) > 0:
                 v = source[key]
                 del source[key]
                 key = found[0]
                 source[key] = v
             if isinstance(name, str):
-                found = find(name, filtered)
+                found = find(name)
                 if len(found) > 0:
                     source[key] = found[0]
 
             if isinstance(source[key], cabc.MutableMapping):
-                resolve_object_references(source[key], f=f)
+                resolve_object_references(source[key], index)
 
         return source
 
+    buses = object_index(f=lambda r: r == "buses")
+
     data["components"] = {
         name: create(
             typemap[element.get("type", DEFAULT)],
@@ -377,224 +1900,83 @@ def deserialize_energy_system(cls, path, typemap={}, attributemap={}):
                     for bus, kwargs in sorted(element["outputs"].items())
                 },
             },
-            resolve_object_references(
-                element["parameters"], f=lambda r: r == "buses"
-            ),
+            resolve_object_references(element["parameters"], buses),
         )
         for name, element in sorted(data["elements"].items())
         for flow in (typemap.get(FLOW_TYPE, HSN),)
     }
 
-    period_data = {}
-    if package.get_resource("periods"):
-        df_periods = pd.DataFrame.from_dict(
-            package.get_resource("periods").read(keyed=True)
-        )
-        period_data["timeincrement"] = df_periods["timeincrement"].values
-        period_data["timeindex"] = pd.DatetimeIndex(df_periods["timeindex"])
-        period_data["periods"] = [
-            pd.DatetimeIndex(df["timeindex"])
-            for period, df in df_periods.groupby("periods")
-        ]
-        period_data["periods"] = [
-            pd.DatetimeIndex(i.values, freq=i.inferred_freq, name="timeindex")
-            for i in period_data["periods"]
-        ]
-        period_data["years"] = period_data["timeindex"].year.unique().values
+    period_data = read_periods(reader, time_window)
 
-    def create_periodic_values(values, periods_index):
-        """
-        Create periodic values from given values and period_data.
-        The values are repeated for each period for the whole length e.g.
-        8760 values for hourly data in one period.
-
-        Parameters
-        ----------
-        values : list
-            List of values to be repeated.
-        periods_index : list
-            List containing periods datetimeindex.
-
-        Returns
-        -------
-        list
-            List of periodic values.
-        """
-        # check if length of list equals number of periods
-        if len(values) != len(periods_index):
-            raise ValueError(
-                "Length of values does not equal number of periods."
+    facades = {}
+    # Relations of all element resources are resolved before any facade is
+    # created, because creating facades replaces the foreign key values of
+    # the (shared) working rows with the created objects.
+    reader.reset()
+    violations = []
+    for r in element_resources:
+        try:
+            violations.extend(reader.relate(r))
+        except Exception as e:
+            raise dp.exceptions.LoadError(
+                (
+                    "Could not read data for resource with name `{}`. "
+                    " Maybe wrong foreign keys?\n"
+                    "Exception was: {}"
+                ).format(r.name, e)
+            )
+    if violations:
+        raise dp.exceptions.LoadError(
+            "Could not read data for element resources. Maybe wrong "
+            "foreign keys?\nException was: {}".format(
+                reader.relation_error(violations)
             )
-
-        # create timeseries with periodic values
-        periodic_values = pd.concat(
-            [
-                pd.Series(repeat(values[i], len(period)), index=period)
-                for i, period in enumerate(periods_index)
-            ]
         )
-
-        return periodic_values.tolist()
-
-    def create_yearly_values(
-        values: typing.Iterable[float], period_years: typing.Iterable[int]
-    ):
-        """
-        Creates a value for every year (between two periods/explicit years)
-        Value of investment period is continued until next period.
-        E.g (1,2023), (2,2025) -> [1,1,2]
-        Parameters
-        ----------
-        values values to be interpolated
-        years years of periods
-
-        Returns list
-        -------
-
-        """
-        results = pd.Series()
-        for i in range(len(period_years) - 1):
-            diff = period_years[i + 1] - period_years[i]
-            period_results = pd.Series(repeat(values[i], diff))
-            results = pd.concat([results, period_results])
-        results = pd.concat([results, pd.Series(values[-1])])
-        return results.tolist()
-
-    def unpack_sequences(facade, period_data):
-        """
-        Depending on dtype and content:
-        Periodically changing values [given as array] are either unpacked into
-            - full periods (every timestep per explicit year)
-            - yearly values (one value each implicit & explicit years)
-            - kept as periodical values (one value each explicit year)
-
-        Decision happens based on
-            - value
-            - name
-            - entry in yearly/periodical values list.
-
-        Parameters
-        ----------
-        facade
-        period_data
-
-        Returns
-        -------
-        facade
-        """
-
-        yearly_values = ["fixed_costs", "marginal_costs"]
-        periodical_values = [
-            "capacity",
-            "capacity_cost",
-            "capacity_potential",
-            "storage_capacity",
+    related = {r.name: reader.working_rows(r) for r in element_resources}
+    if filtered:
+        # Referenced elements are created when the first element referencing
+        # them is, so unreferenced ones are dropped.
+        element_resources = [
+            r for r in element_resources if r.name in reader.predicates
         ]
 
-        for value_name, value in facade.items():
-            if isinstance(value, Decimal):
-                facade[value_name] = float(value)
-            # check if multi-period and value is list
-            if period_data and isinstance(value, list):
-                # check if length of list equals number of periods
-                if len(value) == len(period_data["periods"]):
-                    if value_name in periodical_values:
-                        # special period parameters don't need to be
-                        # converted into timeseries
-                        facade[value_name] = [
-                            float(vv) if isinstance(vv, Decimal) else vv
-                            for vv in value
-                        ]
-                        continue
-                    elif value_name in yearly_values:
-                        # special period parameter need to be
-                        # converted into timeseries with value for each
-                        # year
-                        facade[value_name] = create_yearly_values(
-                            value, period_data["years"]
-                        )
-                        msg = (
-                            f"\nThe parameter '{value_name}' of a "
-                            f"'{facade['type']}' facade is converted "
-                            "into a yearly list. This might not be "
-                            "possible for every parameter and lead to "
-                            "ambiguous error messages.\nPlease be "
-                            "aware, when using this feature!"
-                        )
-                        warnings.warn(msg, UserWarning)
+    for r in element_resources:
+        foreign_keys = reader.foreign_keys(r.name)
 
-                    else:
-                        # create timeseries with periodic values
-                        facade[value_name] = create_periodic_values(
-                            value, period_data["periods"]
-                        )
-                        msg = (
-                            f"\nThe parameter '{value_name}' of a "
-                            f"'{facade['type']}' facade is converted "
-                            "into a periodic timeseries. This might "
-                            "not be possible for every parameter and "
-                            "lead to ambiguous error messages.\nPlease"
-                            " be aware, when using this feature!"
-                        )
-                        warnings.warn(msg, UserWarning)
-        return facade
-
-    facades = {}
-    for r in package.resources:
-        if all(
-            re.match(r"^data/elements/.*$", p)
-            for p in listify(r.descriptor["path"], 1)
-        ):
-            try:
-                facade_data = r.read(keyed=True, relations=True)
-            except dp.exceptions.CastError:
-                raise dp.exceptions.LoadError((cast_error_msg).format(r.name))
-            except Exception as e:
-                raise dp.exceptions.LoadError(
-                    (
-                        "Could not read data for resource with name `{}`. "
-                        " Maybe wrong foreign keys?\n"
-                        "Exception was: {}"
-                    ).format(r.name, e)
-                )
-
-            foreign_keys = {
-                fk["fields"]: fk["reference"]
-                for fk in r.descriptor["schema"].get("foreignKeys", ())
-            }
+        for facade in related[r.name]:
+            # convert decimal to float
 
-            for facade in facade_data:
-                # convert decimal to float
-
-                read_facade(
-                    unpack_sequences(facade=facade, period_data=period_data),
-                    facades,
-                    create,
-                    typemap,
-                    data,
-                    objects,
-                    sequence_names,
-                    foreign_keys,
-                    resource,
-                )
+            read_facade(
+                unpack_sequences(facade=facade, period_data=period_data),
+                facades,
+                create,
+                typemap,
+                data,
+                objects,
+                sequence_names,
+                foreign_keys,
+                reader.foreign_keys,
+            )
 
     # TODO: Find concept how to deal with timeindices and clean up based on
     # concept
     lst = [idx for idx in timeindices.values()]
-    if lst[1:] == lst[:-1]:
+    if all(a.equals(b) for a, b in zip(lst, lst[1:])):
         # look for temporal resource and if present, take as timeindex from it
-        if package.get_resource("temporal"):
+        if reader.get_resource("temporal"):
+            rows = reader.read(reader.get_resource("temporal"))
             temporal = (
-                pd.DataFrame.from_dict(
-                    package.get_resource("temporal").read(keyed=True)
-                )
+                pd.DataFrame.from_dict(window_rows(rows, time_window))
                 .set_index("timeindex")
                 .astype(float)
             )
             # for correct freq setting of timeindex
             temporal.index = pd.DatetimeIndex(
                 temporal.index.values,
-                freq=temporal.index.inferred_freq,
+                freq=window_freq(
+                    pd.DatetimeIndex(temporal.index),
+                    lambda: [row["timeindex"] for row in rows],
+                ),
                 name="timeindex",
             )
             timeindex = temporal.index
@@ -604,7 +1986,7 @@ def deserialize_energy_system(cls, path, typemap={}, attributemap={}):
         # from dict
         else:
             # look for periods resource and if present, take periods from it
-            if package.get_resource("periods"):
+            if reader.get_resource("periods"):
                 es = cls(
                     timeindex=period_data["timeindex"],
                     timeincrement=period_data["timeincrement"],
@@ -614,9 +1996,17 @@ def deserialize_energy_system(cls, path, typemap={}, attributemap={}):
 
             # if lst is not empty
             elif lst:
-                idx = pd.DatetimeIndex(lst[0])
+                name, idx = next(iter(timeindices.items()))
+                idx = pd.DatetimeIndex(idx)
                 timeindex = pd.DatetimeIndex(
-                    idx.values, freq=idx.inferred_freq, name="timeindex"
+                    idx.values,
+                    freq=window_freq(
+                        idx,
+                        lambda: sequence_data(
+                            reader.get_resource(name), names=()
+                        )["timeindex"],
+                    ),
+                    name="timeindex",
                 )
                 temporal = None
                 es = cls(timeindex=timeindex, temporal=temporal)
@@ -630,19 +2020,13 @@ def deserialize_energy_system(cls, path, typemap={}, attributemap={}):
                 )
                 es = cls(timeindex=timeindex)
 
-        es.add(
-            *chain(
+        add_nodes(
+            es,
+            chain(
                 data["components"].values(),
                 data["buses"].values(),
                 facades.values(),
-                chain(
-                    *[
-                        f.subnodes
-                        for f in facades.values()
-                        if hasattr(f, "subnodes")
-                    ]
-                ),
-            )
+            ),
         )
 
         es.typemap = typemap
@@ -657,24 +2041,15 @@ def deserialize_constraints(model, path, constraint_type_map=None):
     if constraint_type_map is None:
         constraint_type_map = {}
 
-    def listify(x, n=None):
-        return (
-            x if isinstance(x, list) else repeat(x) if not n else repeat(x, n)
-        )
-
-    package = dp.Package(path)
+    reader = PackageReader(dp.Package(path))
 
     # read all resources in data/constraints
-    resources = []
-    for r in package.resources:
-        if all(
-            re.match(r"^data/constraints/.*$", p)
-            for p in listify(r.descriptor["path"], 1)
-        ):
-            resources.append(r)
+    resources = [
+        r for r in reader.resources if in_directory(r, "data/constraints")
+    ]
 
     for resource in resources:
-        resource_data = resource.read(keyed=True, relations=True)
+        resource_data = reader.read(resource)
 
         for rw in resource_data:
             constraint_type = rw["type"]
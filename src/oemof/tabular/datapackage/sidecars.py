@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Memory-mapped `.npy` sidecar files for sequence resources.
+
+For a sequence resource stored in `data/sequences/load_profile.csv` the
+sidecars are
+
+  - `data/sequences/load_profile.npy` holding the values of all columns but
+    the `timeindex` as one float64 array of shape `(timesteps, columns)` in
+    column-major order, and
+  - `data/sequences/load_profile.timeindex.npy` holding the `timeindex` as
+    `datetime64[ns]` array, and
+  - `data/sequences/load_profile.sidecar.json` holding the names of the
+    columns and the size, modification time and SHA-256 hash of the file
+    the sidecars were written for.
+
+Sidecars are loaded as read-only memory maps. The profiles handed to the
+facades are views into these maps, i.e. they are neither copied when the
+facades are created nor when `oemof.solph` wraps them in a sequence, and
+processes loading the same package share one physical copy of the data
+through the operating system's page cache.
+
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+EXTENSION = ".npy"
+TIMEINDEX_EXTENSION = ".timeindex.npy"
+METADATA_EXTENSION = ".sidecar.json"
+
+
+def is_sidecar(filename):
+    """Checks whether `filename` is a sidecar file."""
+    return str(filename).endswith((EXTENSION, METADATA_EXTENSION))
+
+
+def paths(r):
+    """Returns the paths of the sidecars of resource `r`.
+
+    Returns `None` if `r` isn't stored in a single, local file.
+    """
+    if (
+        not r.local
+        or r.multipart
+        or r.descriptor.get("data") is not None
+        or not isinstance(r.source, str)
+    ):
+        return None
+    stem = os.path.splitext(r.source)[0]
+    return (
+        stem + EXTENSION,
+        stem + TIMEINDEX_EXTENSION,
+        stem + METADATA_EXTENSION,
+    )
+
+
+def names(r):
+    """Returns the names of the value columns of resource `r`."""
+    return [
+        field["name"]
+        for field in r.descriptor.get("schema", {}).get("fields", [])
+        if field["name"] != "timeindex"
+    ]
+
+
+def _digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(2**20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _save(path, metadata):
+    with open(path + ".tmp", "w") as f:
+        json.dump(metadata, f)
+    os.replace(path + ".tmp", path)
+
+
+def fresh(r):
+    """Checks whether resource `r` has sidecars which were written for its
+    current file and schema.
+
+    The names of the columns and the size of the file have to match those
+    the sidecars were written for. Files with another modification time,
+    e.g. because they were restored by `git checkout` or `cp -p`, are
+    compared by their hash.
+    """
+    sidecars = paths(r)
+    if sidecars is None or not all(os.path.exists(p) for p in sidecars):
+        return False
+    try:
+        with open(sidecars[2]) as f:
+            metadata = json.load(f)
+    except ValueError:
+        return False
+    stat = os.stat(r.source)
+    if metadata.get("columns") != names(r) or (
+        metadata.get("size") != stat.st_size
+    ):
+        return False
+    if metadata.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    if metadata.get("sha256") != _digest(r.source):
+        return False
+    # The file is unchanged, so the hash needn't be checked again.
+    metadata["mtime_ns"] = stat.st_mtime_ns
+    try:
+        _save(sidecars[2], metadata)
+    except OSError:
+        pass
+    return True
+
+
+def load(r):
+    """Loads the sidecars of resource `r` as read-only memory maps.
+
+    Returns the columns of `r` in the form returned by
+    :func:`~oemof.tabular.datapackage.reading.sequence_data`, or `None` if
+    there are no sidecars, if they weren't written for the resource's
+    current file and schema (see :func:`fresh`) or if they don't match it.
+    """
+    if not fresh(r):
+        return None
+    sidecars = paths(r)
+    values = np.load(sidecars[0], mmap_mode="r")
+    timeindex = np.load(sidecars[1], mmap_mode="r")
+    columns = names(r)
+    if values.ndim != 2 or values.shape != (len(timeindex), len(columns)):
+        return None
+    result = {"timeindex": pd.DatetimeIndex(timeindex)}
+    result.update({name: values[:, i] for i, name in enumerate(columns)})
+    return result
+
+
+def write(r, data):
+    """Writes the sequence `data` of resource `r` to its sidecars.
+
+    `data` has to contain the columns of `r` as returned by
+    :func:`~oemof.tabular.datapackage.reading.sequence_data`. Returns the
+    memory-mapped sidecars (see :func:`load`), or `data` unchanged if the
+    sidecars couldn't be written, e.g. because the package isn't writable or
+    not all columns are numeric.
+    """
+    sidecars = paths(r)
+    if sidecars is None:
+        return data
+    try:
+        values = np.column_stack(
+            [np.asarray(data[name], dtype="float64") for name in names(r)]
+            or [np.empty((len(data["timeindex"]), 0))]
+        )
+    except (TypeError, ValueError):
+        return data
+    timeindex = pd.DatetimeIndex(data["timeindex"]).values
+    stat = os.stat(r.source)
+    metadata = {
+        "columns": names(r),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": _digest(r.source),
+    }
+    try:
+        for path, array in zip(
+            sidecars[:2], (np.asfortranarray(values), timeindex)
+        ):
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, path)
+        # The metadata is written last, so it always describes complete
+        # sidecars.
+        _save(sidecars[2], metadata)
+    except OSError:
+        return data
+    return load(r) or data
+
+
+def remove(r):
+    """Removes the sidecars of resource `r`, if there are any."""
+    for path in paths(r) or ():
+        if os.path.exists(path):
+            os.remove(path)
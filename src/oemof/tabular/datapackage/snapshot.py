@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Snapshots of deserialized energy systems.
+
+Creating an energy system from a datapackage parses, casts and relates all
+of its resources and creates every facade with its solph components. A
+snapshot stores the result, i.e. all nodes including their flows and
+subnodes, the `timeindex`, the `periods` and the `temporal` data, so that
+restoring it only has to unpickle the nodes.
+
+A snapshot is a single file consisting of
+
+  - a header line holding the snapshot's metadata as JSON, i.e. the
+    versions of the snapshot format, of `oemof.tabular` and of
+    `oemof.solph` which wrote it and the sizes of the following parts,
+  - the energy system pickled with protocol 5 and
+  - the data of the NumPy arrays and pandas objects, e.g. the sequences of
+    the facades, stored out of band, each aligned to :data:`ALIGNMENT`
+    bytes.
+
+Restoring a snapshot reads the file into one buffer and the arrays are
+restored as views into it instead of being copied element by element.
+Snapshots written by other versions are rejected, as the pickled nodes
+depend on the classes of `oemof.tabular` and `oemof.solph`.
+
+"""
+import gc
+import io
+import json
+import os
+import pickle
+
+from oemof.network.network.entity import Entity
+from oemof.solph import __version__ as oemof_solph_version
+
+from oemof.tabular import __version__
+
+#: Bump this, whenever the layout of snapshots changes.
+SNAPSHOT_FORMAT = 1
+
+#: Alignment of the arrays in a snapshot in bytes.
+ALIGNMENT = 64
+
+#: Attributes of an energy system which are derived from its nodes or its
+#: class and not stored in a snapshot.
+DERIVED = ("_groupings", "_groups", "_first_ungrouped_node_index_")
+
+
+def header():
+    """Returns the versions a snapshot has to be written with to be
+    restored.
+    """
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "oemof_tabular_version": __version__,
+        "oemof_solph_version": oemof_solph_version,
+    }
+
+
+def _padding(size):
+    return -size % ALIGNMENT
+
+
+def _entity(cls, label):
+    entity = cls.__new__(cls)
+    entity.label = label
+    return entity
+
+
+class _Pickler(pickle.Pickler):
+    """Pickles nodes together with their labels.
+
+    Nodes are hashed by their labels, so unpickling the inputs and outputs
+    of a node, which map nodes to flows, fails for nodes which aren't
+    completely unpickled yet, unless their labels are restored first.
+    """
+
+    def reducer_override(self, obj):
+        if not isinstance(obj, Entity):
+            return NotImplemented
+        reduced = obj.__reduce_ex__(5)
+        return (_entity, (type(obj), obj.label)) + reduced[2:]
+
+
+def write_snapshot(es, path):
+    """Writes a snapshot of energy system `es` to `path`.
+
+    The snapshot is written to a temporary file first, so an existing
+    snapshot at `path` is only replaced by a complete one.
+    """
+    state = {k: v for k, v in vars(es).items() if k not in DERIVED}
+    buffers = []
+    data = io.BytesIO()
+    _Pickler(data, protocol=5, buffer_callback=buffers.append).dump(state)
+    data = data.getbuffer()
+    buffers = [b.raw() for b in buffers]
+    metadata = dict(
+        header(),
+        pickle=data.nbytes,
+        buffers=[b.nbytes for b in buffers],
+    )
+    line = json.dumps(metadata).encode() + b"\n"
+    with open(path + ".tmp", "wb") as f:
+        f.write(line)
+        f.write(b"\0" * _padding(len(line)))
+        for part in [data] + buffers:
+            f.write(part)
+            f.write(b"\0" * _padding(len(part)))
+    os.replace(path + ".tmp", path)
+
+
+def read_snapshot(cls, path):
+    """Restores an energy system of type `cls` from the snapshot at `path`.
+
+    The groupings of the restored energy system are those of `cls()`. Its
+    groups are computed from its nodes when they are first accessed.
+
+    Raises
+    ------
+    ValueError
+        If the snapshot was written with another version of the snapshot
+        format, `oemof.tabular` or `oemof.solph`.
+    """
+    with open(path, "rb") as f:
+        line = f.readline()
+        try:
+            metadata = json.loads(line)
+        except ValueError:
+            raise ValueError(f"'{path}' is not an energy system snapshot.")
+        versions = {k: metadata.get(k) for k in header()}
+        if versions != header():
+            raise ValueError(
+                f"Snapshot '{path}' was written by {versions}, but only "
+                f"snapshots written by {header()} can be restored. Create "
+                "the energy system from its datapackage and write the "
+                "snapshot again."
+            )
+        f.seek(len(line) + _padding(len(line)))
+        content = bytearray(os.fstat(f.fileno()).st_size - f.tell())
+        f.readinto(content)
+
+    content = memoryview(content)
+    offset = 0
+    parts = []
+    for size in [metadata["pickle"]] + metadata["buffers"]:
+        parts.append(content[offset : offset + size])
+        offset += size + _padding(size)
+
+    # Unpickling creates lots of containers, each of which would otherwise
+    # count towards triggering another collection of all of them.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        state = pickle.loads(parts[0], buffers=parts[1:])
+    finally:
+        if enabled:
+            gc.enable()
+    es = cls()
+    vars(es).update(state)
+    return es
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized conversion of the `timeindex` of sequences from and to text.
+
+The `timeindex` of a sequence resource is stored either
+
+  - as ISO 8601 timestamps in :data:`FORMAT`, e.g. `2020-01-01T00:00:00Z`,
+    i.e. as `datetime` field in the default format, or
+  - more compactly as the number of seconds since `1970-01-01T00:00:00Z`,
+    i.e. as `integer` field, which :func:`is_epoch` recognizes.
+
+Formatting timestamps one by one via `strftime` and parsing them via
+`strptime` or format inference is slow for long sequences. The functions
+in this module convert whole arrays at once via NumPy's `datetime64`
+conversions instead. Timestamps are naive, i.e. they are the wall times
+written to the file, as `pandas` writes them with `date_format=FORMAT`.
+
+"""
+import numpy as np
+import pandas as pd
+
+#: The format of the `timeindex` of sequences written by `oemof.tabular`.
+FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def is_epoch(field):
+    """Tells whether `field` is a `timeindex` in seconds since the epoch."""
+    return field.get("name") == "timeindex" and field.get("type") == "integer"
+
+
+def _seconds(index):
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.values.astype("datetime64[s]")
+
+
+def format_iso(index):
+    """Returns the timestamps of `index` as array of strings in
+    :data:`FORMAT`."""
+    return np.char.add(np.datetime_as_string(_seconds(index), unit="s"), "Z")
+
+
+def to_epoch(index):
+    """Returns the timestamps of `index` as int64 array of seconds since the
+    epoch."""
+    return _seconds(index).astype("int64")
+
+
+def parse_iso(values):
+    """Parses strings in :data:`FORMAT` into a `pandas.DatetimeIndex`.
+
+    Raises
+    ------
+    ValueError
+        If not all `values` are strings in :data:`FORMAT`.
+    """
+    strings = np.asarray(values, dtype=str)
+    # NumPy parses more than `FORMAT`, e.g. dates without times, so the
+    # parsed timestamps have to format to exactly the given strings.
+    parsed = strings.astype("U19").astype("datetime64[s]")
+    if not np.array_equal(format_iso(parsed), strings):
+        raise ValueError(f"Timestamps don't match format '{FORMAT}'.")
+    return pd.DatetimeIndex(parsed.astype("datetime64[ns]"))
+
+
+def from_epoch(values):
+    """Returns the seconds since the epoch `values` as
+    `pandas.DatetimeIndex`."""
+    seconds = np.asarray(values, dtype="int64").astype("datetime64[s]")
+    return pd.DatetimeIndex(seconds.astype("datetime64[ns]"))
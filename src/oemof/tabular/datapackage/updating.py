@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+"""
+Parameter updates of models which have been built already.
+
+Constructing a `oemof.solph.Model` often takes longer than solving it. For
+sensitivity runs, which only change parameters like `marginal_cost`,
+`capacity_cost`, `capacity` or profiles, :func:`update_model` applies these
+changes to an existing model instead, so that the model is built only once
+for all runs. Changes can be read from a scenario delta, i.e. a small
+datapackage holding only the changed values, via :func:`read_changes`.
+
+"""
+import collections.abc as cabc
+import inspect
+import logging
+from collections import UserList
+from contextlib import contextmanager
+
+import datapackage as dp
+import numpy as np
+from oemof.network.network import Node
+from oemof.solph import Bus, Investment
+from pyomo.environ import Block, Objective
+
+from .._facade import Facade
+from .reading import PackageReader, in_directory
+
+#: Attributes which only enter the objective.
+OBJECTIVE = frozenset(
+    ["variable_costs", "fixed_costs", "storage_costs", "ep_costs", "offset"]
+)
+
+#: Flow attributes which only enter the bounds of the flow variables, as
+#: long as the flow isn't an investment or a nonconvex flow.
+BOUNDS = frozenset(["fix", "max", "min", "nominal_value"])
+
+#: Flow attributes which, apart from the bounds of the flow variables, also
+#: enter the constraints on the nominal value of a flow.
+NOMINAL = (
+    "full_load_time_max",
+    "full_load_time_min",
+    "positive_gradient_limit",
+    "negative_gradient_limit",
+)
+
+#: Attributes of facades which solph doesn't use.
+BOOKKEEPING = frozenset(["subnodes", "solph_components_built", "_init_names"])
+
+
+def _equal(a, b):
+    """Compares attribute values, nodes by their label."""
+    if a is b:
+        return True
+    if isinstance(a, Node) or isinstance(b, Node):
+        return (
+            isinstance(a, Node) and isinstance(b, Node) and a.label == b.label
+        )
+    if isinstance(a, cabc.Mapping) and isinstance(b, cabc.Mapping):
+        a = {getattr(k, "label", k): v for k, v in a.items()}
+        b = {getattr(k, "label", k): v for k, v in b.items()}
+        return a.keys() == b.keys() and all(_equal(a[k], b[k]) for k in a)
+    if isinstance(a, (str, bytes)) or isinstance(b, (str, bytes)):
+        return a == b
+    if all(isinstance(x, UserList) and hasattr(x, "default") for x in (a, b)):
+        # Scalars wrapped by `oemof.solph.sequence` grow when accessed.
+        return _equal(a.default, b.default)
+    if isinstance(a, cabc.Iterable) and isinstance(b, cabc.Iterable):
+        a, b = list(a), list(b)
+        try:
+            return np.array_equal(
+                np.asarray(a, dtype="float64"),
+                np.asarray(b, dtype="float64"),
+                equal_nan=True,
+            )
+        except (TypeError, ValueError):
+            return len(a) == len(b) and all(map(_equal, a, b))
+    if type(a) is type(b) and hasattr(a, "__dict__"):
+        return _equal(vars(a), vars(b))
+    return bool(a == b)
+
+
+def _differences(old, new, ignore=()):
+    """Returns the names of the attributes of `old` which differ in `new`.
+
+    Attributes `new` doesn't have are skipped.
+    """
+    a, b = vars(old), vars(new)
+    return sorted(
+        name
+        for name in a.keys() & b.keys()
+        if name not in ignore and not _equal(a[name], b[name])
+    )
+
+
+def _updates(old, new, what, ignore=(), bounds=()):
+    """Returns the updates turning the attributes of `old` into those of
+    `new` as triples `(object, attribute, value)`.
+
+    Raises
+    ------
+    ValueError
+        If `old` and `new` differ in attributes which aren't in
+        :data:`OBJECTIVE` or `bounds`.
+    """
+    updates = []
+    for name in _differences(old, new, ignore):
+        value = getattr(new, name)
+        if name in OBJECTIVE or name in bounds:
+            updates.append((old, name, value))
+        elif name == "investment" and all(
+            isinstance(i, Investment) for i in (getattr(old, name), value)
+        ):
+            updates.extend(_updates(getattr(old, name), value, what))
+        else:
+            raise ValueError(
+                "Changing `{}` of {} changes the structure of the model, "
+                "which has to be rebuilt for that.".format(name, what)
+            )
+    return updates
+
+
+def _bounds(flow):
+    """Returns the attributes which only enter the bounds of `flow`."""
+    if flow.investment is not None or flow.nonconvex:
+        return ()
+    if any(
+        (
+            getattr(flow, name)[0] is not None
+            if isinstance(getattr(flow, name), cabc.Sequence)
+            else getattr(flow, name) is not None
+        )
+        for name in NOMINAL
+    ):
+        return BOUNDS - {"nominal_value"}
+    return BOUNDS
+
+
+def _solph_parameters(cls):
+    """Returns the arguments of the solph classes `cls` is derived from."""
+    return frozenset().union(
+        *(
+            inspect.signature(c.__init__).parameters
+            for c in cls.__mro__
+            if not issubclass(c, Facade) and c is not object
+        )
+    )
+
+
+def _nodes(node):
+    """Maps the labels of `node` and its subnodes to these."""
+    nodes = {}
+    todo = [node]
+    while todo:
+        n = todo.pop()
+        nodes[n.label] = n
+        todo.extend(getattr(n, "subnodes", ()))
+    return nodes
+
+
+def _edges(node):
+    return {
+        (node.label, target.label): flow
+        for target, flow in node.outputs.items()
+    } | {
+        (source.label, node.label): flow
+        for source, flow in node.inputs.items()
+    }
+
+
+def rebuild(facade, attributes):
+    """Creates a detached copy of `facade` with `attributes` changed.
+
+    Nodes the facade refers to, e.g. its buses, are replaced by stand-ins
+    with the same label, so the copy isn't connected to the energy system
+    of `facade`.
+
+    Raises
+    ------
+    ValueError
+        If `attributes` would connect the facade to other nodes.
+    """
+    kwargs = {
+        name: getattr(facade, name)
+        for name in facade._init_names
+        if name != "build_solph_components"
+    }
+    for name, value in attributes.items():
+        current = kwargs.get(name, getattr(facade, name, None))
+        if isinstance(current, Node):
+            if getattr(value, "label", value) != current.label:
+                raise ValueError(
+                    "Changing `{}` of `{}` changes the structure of the "
+                    "model, which has to be rebuilt for that.".format(
+                        name, facade.label
+                    )
+                )
+            continue
+        kwargs[name] = value
+    kwargs = {
+        name: Bus(label=value.label) if isinstance(value, Node) else value
+        for name, value in kwargs.items()
+    }
+    return type(facade)(**kwargs)
+
+
+@contextmanager
+def _quiet(name):
+    logger = logging.getLogger(name)
+    level = logger.level
+    logger.setLevel(logging.ERROR)
+    try:
+        yield
+    finally:
+        logger.setLevel(level)
+
+
+def _set_bounds(model, source, target):
+    """Sets the bounds of the flow variables of the flow from `source` to
+    `target` like `oemof.solph.Model` does when it is built.
+    """
+    flow = model.flows[source, target]
+    variables = [model.flow[source, target, p, t] for p, t in model.TIMEINDEX]
+    lower = 0 if (source, target) in model.UNIDIRECTIONAL_FLOWS else None
+    for variable in variables:
+        variable.unfix()
+        variable.setlb(lower)
+        variable.setub(None)
+    if flow.nominal_value is None:
+        return
+    if flow.fix[model.TIMESTEPS.at(1)] is not None:
+        for (p, t), variable in zip(model.TIMEINDEX, variables):
+            variable.fix(flow.fix[t] * flow.nominal_value)
+        return
+    for (p, t), variable in zip(model.TIMEINDEX, variables):
+        variable.setub(flow.max[t] * flow.nominal_value)
+        if not flow.nonconvex:
+            variable.setlb(flow.min[t] * flow.nominal_value)
+
+
+def _rebuild_objective(model):
+    """Rebuilds the objective of `model` from the `_objective_expression`
+    of its blocks, like `oemof.solph.Model` builds it.
+    """
+    sense = model.objective.sense
+    model.del_component(model.objective)
+    model.objective = Objective(
+        sense=sense,
+        expr=sum(
+            block._objective_expression()
+            for block in model.component_data_objects(Block)
+            if hasattr(block, "_objective_expression")
+        ),
+    )
+
+
+def update_model(model, changes):
+    """Applies parameter `changes` to the already built `model`.
+
+    `changes` maps the labels of facades to the attributes to change, e.g.
+    `{"wind": {"profile": [...], "marginal_cost": 2}}`. Every changed facade
+    is rebuilt detached from the energy system (see :func:`rebuild`) and
+    the solph parameters of the rebuilt copy, i.e. those of its flows,
+    investments and subnodes, are compared to the original ones:
+
+      - Parameters which only enter the objective, i.e. variable, fixed,
+        storage and investment costs, are updated and the objective is
+        rebuilt.
+      - Parameters which only enter the bounds of flow variables, i.e.
+        `fix`, `min`, `max` and `nominal_value` of flows which aren't
+        investment or nonconvex flows, are updated along with these
+        bounds.
+
+    Changes of any other parameter, e.g. of the `capacity` of an expandable
+    facade or the `storage_capacity` of a storage, would change the
+    constraints or even the structure of the model. These raise an error,
+    before anything has been changed. The facades keep the changed
+    attributes.
+
+    Parameters
+    ----------
+    model: oemof.solph.Model
+        The model to update.
+    changes: dict
+        The changed attributes by facade label, see :func:`read_changes`.
+
+    Returns
+    -------
+    model: oemof.solph.Model
+
+    Raises
+    ------
+    ValueError
+        If a facade doesn't exist or if a change can't be applied to the
+        model without rebuilding it.
+    """
+    nodes = {n.label: n for n in model.es.nodes}
+    updates = []
+    edges = set()
+    objective = False
+    for label, attributes in changes.items():
+        facade = nodes.get(label)
+        if not isinstance(facade, Facade):
+            raise ValueError(
+                "There is no facade `{}` in the energy system.".format(label)
+            )
+        new = rebuild(facade, attributes)
+        parameters = _solph_parameters(type(facade))
+        ignore = BOOKKEEPING | {
+            name for name in attributes if name not in parameters
+        }
+        old_nodes, new_nodes = _nodes(facade), _nodes(new)
+        if old_nodes.keys() != new_nodes.keys():
+            raise ValueError(
+                "Changing {} of `{}` changes its subnodes, the model has to "
+                "be rebuilt for that.".format(sorted(attributes), label)
+            )
+        for name, node in old_nodes.items():
+            what = "`{}`".format(name)
+            updates.extend(
+                _updates(
+                    node,
+                    new_nodes[name],
+                    what,
+                    ignore if node is facade else BOOKKEEPING,
+                )
+            )
+            old_edges, new_edges = _edges(node), _edges(new_nodes[name])
+            if old_edges.keys() != new_edges.keys():
+                raise ValueError(
+                    "Changing {} of `{}` changes its flows, the model has to "
+                    "be rebuilt for that.".format(sorted(attributes), label)
+                )
+            for key, flow in old_edges.items():
+                flow_updates = _updates(
+                    flow,
+                    new_edges[key],
+                    "the flow from `{}` to `{}`".format(*key),
+                    bounds=_bounds(flow),
+                )
+                if any(
+                    attribute in BOUNDS for _, attribute, _ in flow_updates
+                ):
+                    edges.add(key)
+                updates.extend(flow_updates)
+        objective |= any(name in OBJECTIVE for _, name, _ in updates)
+        updates.extend(
+            (facade, name, getattr(new, name, value))
+            for name, value in attributes.items()
+            if not isinstance(getattr(facade, name, None), Node)
+        )
+
+    for target, name, value in updates:
+        setattr(target, name, value)
+    flows = {(o.label, i.label): (o, i) for o, i in model.flows}
+    for key in edges:
+        _set_bounds(model, *flows[key])
+    if objective:
+        # Blocks add the expressions making up their part of the objective
+        # to themselves, so pyomo warns about each one being replaced.
+        with _quiet("pyomo.core"):
+            _rebuild_objective(model)
+    return model
+
+
+def read_changes(path):
+    """Reads the changes of a scenario delta datapackage.
+
+    The element resources of the delta hold one row per changed element,
+    with its `name` and the changed fields. Missing values aren't changes.
+    Fields referencing sequence resources of the delta via foreign keys are
+    replaced by the referenced sequences, just like when deserializing an
+    energy system.
+
+    Returns
+    -------
+    dict
+        The changes in the format expected by :func:`update_model`.
+
+    Raises
+    ------
+    datapackage.exceptions.LoadError
+        If a referenced sequence doesn't exist.
+    """
+    package = dp.Package(path)
+    reader = PackageReader(package)
+    data = {
+        r.name: reader.sequences(r)
+        for r in package.resources
+        if in_directory(r, "data/sequences")
+    }
+    changes = {}
+    for r in package.resources:
+        if not in_directory(r, "data/elements"):
+            continue
+        foreign_keys = reader.foreign_keys(r.name)
+        for row in reader.read(r):
+            attributes = changes.setdefault(row["name"], {})
+            for field, value in row.items():
+                if value is None or field in ("name", "type"):
+                    continue
+                reference = foreign_keys.get(field)
+                if reference is not None and reference["resource"] in data:
+                    if value not in data[reference["resource"]]:
+                        raise dp.exceptions.LoadError(
+                            "Sequence `{}` referenced by `{}` does not exist "
+                            "in `{}`.".format(
+                                value, row["name"], reference["resource"]
+                            )
+                        )
+                    value = data[reference["resource"]][value]
+                attributes[field] = value
+    return changes
+
+
+def update_from_datapackage(model, path):
+    """Applies the scenario delta datapackage `path` to `model`.
+
+    See :func:`read_changes` and :func:`update_model`.
+    """
+    return update_model(model, read_changes(path))
@@ -2,6 +2,12 @@ from oemof.solph import Bus
 from oemof.solph.buses.experimental import ElectricalBus
 from oemof.solph.flows.experimental import ElectricalLine
 
+from oemof.tabular._facade import (  # noqa: F401
+    add_nodes,
+    build_facades,
+    remove_nodes,
+)
+
 from .backpressure_turbine import BackpressureTurbine
 from .commodity import Commodity
 from .conversion import Conversion
@@ -0,0 +1,76 @@
+""" Microbenchmark of the instantiation of the facades in `TYPEMAP`.
+
+Run it via
+
+    python tests/benchmark_facades.py [NUMBER]
+
+to print how many instances of every facade are created per second, once
+with and once without building their solph components. Every facade is
+instantiated `NUMBER` times, 2000 times by default.
+"""
+
+import dataclasses
+import sys
+import timeit
+
+from oemof.solph import Bus
+
+from oemof.tabular._facade import Facade
+from oemof.tabular.facades import TYPEMAP
+
+VALUES = {
+    "amount": 100,
+    "capacity": 100,
+    "carrier": "carrier",
+    "condensing_efficiency": 0.5,
+    "cop": 3,
+    "efficiency": 0.9,
+    "electric_efficiency": 0.4,
+    "profile": [0.5] * 24,
+    "tech": "tech",
+    "thermal_efficiency": 0.4,
+}
+
+
+def arguments(facade):
+    """Returns keyword arguments for the required fields of `facade` and
+    its `capacity`. All instances of a facade share the same buses.
+    """
+    return {
+        f.name: (Bus(f.name) if f.name.endswith("bus") else VALUES[f.name])
+        for f in dataclasses.fields(facade)
+        if f.name == "capacity"
+        or f.default is dataclasses.MISSING
+        and f.default_factory is dataclasses.MISSING
+    }
+
+
+def benchmark(facade, number, build=True):
+    """Returns the number of instances of `facade` created per second."""
+    kwargs = arguments(facade)
+    if not build:
+        kwargs["build_solph_components"] = False
+    labels = iter(range(number))
+
+    def create():
+        facade(label=str(next(labels)), **kwargs)
+
+    return number / timeit.timeit(create, number=number)
+
+
+def main(number=2000):
+    print("{:<14}{:>16}{:>16}".format("facade", "built [1/s]", "lazy [1/s]"))
+    for name, facade in sorted(TYPEMAP.items()):
+        if not (isinstance(facade, type) and issubclass(facade, Facade)):
+            continue
+        print(
+            "{:<14}{:>16.0f}{:>16.0f}".format(
+                name,
+                benchmark(facade, number),
+                benchmark(facade, number, build=False),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
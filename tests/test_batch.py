@@ -0,0 +1,77 @@
+import importlib.resources
+import os
+
+import pandas as pd
+import pytest
+from oemof.solph import EnergySystem, Model
+
+from oemof.tabular import batch
+from oemof.tabular.datapackage import building
+from oemof.tabular.facades import TYPEMAP
+
+EXAMPLES_DIR = os.path.join(
+    importlib.resources.files("oemof.tabular"), "examples/datapackages"
+)
+BASE = os.path.join(EXAMPLES_DIR, "dispatch", "datapackage.json")
+
+
+def build(path, reader, marker):
+    """Builds the model of a scenario instead of solving it, failing once
+    for scenarios called `flaky`."""
+    if "flaky" in path and not os.path.exists(marker):
+        open(marker, "w").close()
+        raise RuntimeError("flaky")
+    es = EnergySystem.from_datapackage(
+        path, typemap=dict(TYPEMAP), reader=reader
+    )
+    with batch.solver_slot():
+        Model(es)
+    return pd.DataFrame(
+        {"capacity": [es.groups["wind"].capacity]},
+        index=pd.Index(["wind"], name="name"),
+    )
+
+
+def overlay(path, capacity):
+    building.write_elements(
+        "volatile.csv",
+        pd.DataFrame(
+            {"capacity": [capacity]}, index=pd.Index(["wind"], name="name")
+        ),
+        directory=str(path / "data" / "elements"),
+    )
+    building.infer_metadata(path=str(path), foreign_keys={}, parent=BASE)
+    return str(path / "datapackage.json")
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_run_batch(tmp_path, workers):
+    """Scenarios are retried, and their results are written per scenario."""
+    scenarios = {
+        "high": overlay(tmp_path / "high", 80),
+        "flaky": overlay(tmp_path / "flaky", 70),
+        "base": BASE,
+        "missing": str(tmp_path / "missing" / "datapackage.json"),
+    }
+    report = batch.run_batch(
+        scenarios,
+        str(tmp_path / "results"),
+        bases=[BASE],
+        workers=workers,
+        solvers=1,
+        retries=1,
+        function=build,
+        marker=str(tmp_path / "marker"),
+    )
+    assert report.attempts == {"high": 1, "flaky": 2, "base": 1, "missing": 2}
+    assert set(report.errors) == {"missing"}
+    assert report.results["high"] == os.path.join(
+        batch.partition(str(tmp_path / "results"), "high"), "results.csv"
+    )
+    results = batch.read_results(str(tmp_path / "results"))
+    assert dict(zip(results["scenario"], results["capacity"])) == {
+        "base": 50,
+        "flaky": 70,
+        "high": 80,
+    }
+    assert not batch._bases
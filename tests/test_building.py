@@ -0,0 +1,155 @@
+import importlib.resources
+import os
+import shutil
+
+import pandas as pd
+import pytest
+from datapackage import Package, exceptions
+
+from oemof.tabular.datapackage import building
+
+EXAMPLES_DIR = os.path.join(
+    importlib.resources.files("oemof.tabular"), "examples/datapackages"
+)
+
+
+def test_incremental_infer_metadata(tmp_path, monkeypatch):
+    """Only the metadata of new or changed files is inferred again."""
+    shutil.copytree(os.path.join(EXAMPLES_DIR, "dispatch"), tmp_path / "p")
+    metadata = tmp_path / "p" / "datapackage.json"
+    building.infer_metadata(path=str(tmp_path / "p"), incremental=True)
+    expected = metadata.read_text()
+    assert (tmp_path / "p" / "datapackage.manifest.json").exists()
+
+    inferred = []
+    infer_descriptor = building.infer_descriptor
+    monkeypatch.setattr(
+        building,
+        "infer_descriptor",
+        lambda path: inferred.append(path) or infer_descriptor(path),
+    )
+    building.infer_metadata(path=str(tmp_path / "p"), incremental=True)
+    assert inferred == [] and metadata.read_text() == expected
+
+    elements = tmp_path / "p" / "data" / "elements"
+    os.utime(elements / "bus.csv", ns=(0, 0))
+    lines = (elements / "volatile.csv").read_text().splitlines()
+    (elements / "volatile.csv").write_text(
+        "\n".join([lines[0] + ";note"] + [line + ";x" for line in lines[1:]])
+    )
+    building.infer_metadata(path=str(tmp_path / "p"), incremental=True)
+    assert inferred == ["data/elements/volatile.csv"]
+    fields = Package(str(metadata)).get_resource("volatile").schema.field_names
+    assert "note" in fields
+
+
+def test_package_from_resources(tmp_path):
+    """Resources are assembled into a package which is validated once."""
+    shutil.copytree(os.path.join(EXAMPLES_DIR, "dispatch"), tmp_path / "p")
+    building.infer_metadata(path=str(tmp_path / "p"), keep_resources=True)
+    expected = Package(str(tmp_path / "p" / "datapackage.json"))
+
+    shutil.copytree(tmp_path / "p" / "resources", tmp_path / "r")
+    with pytest.raises(exceptions.ValidationError):
+        building.assemble_package(
+            {"profile": "tabular-data-package"},
+            [{"name": "empty", "path": "x.csv", "schema": {"fields": []}}],
+            str(tmp_path / "strict.json"),
+            strict=True,
+        )
+    assert not (tmp_path / "strict.json").exists()
+
+    building.package_from_resources(
+        str(tmp_path / "p" / "resources"), str(tmp_path / "p")
+    )
+    assert not (tmp_path / "p" / "resources").exists()
+    p = Package(str(tmp_path / "p" / "datapackage.json"))
+    assert sorted(
+        p.descriptor["resources"], key=lambda r: r["name"]
+    ) == sorted(expected.descriptor["resources"], key=lambda r: r["name"])
+
+    (tmp_path / "r" / "extra.json").write_text(
+        (tmp_path / "r" / "bus.json")
+        .read_text()
+        .replace('"name": "bus"', '"name": "extra"')
+    )
+    (tmp_path / "datapackage.json").write_text(
+        '{"name": "x", "profile": "tabular-data-package"}'
+    )
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        os.rename("r", "resources")
+        building.update_package_descriptor()
+    finally:
+        os.chdir(cwd)
+    names = Package(str(tmp_path / "datapackage.json")).resource_names
+    assert sorted(names) == sorted(expected.resource_names + ["extra"])
+    assert not (tmp_path / "resources").exists()
+
+
+def test_package_writer(tmp_path):
+    """Buffered writes yield the same files as one write per call."""
+    index = pd.date_range("2020-01-01", periods=3, freq="h", tz="UTC")
+    columns = [
+        pd.DataFrame({f"profile-{i}": [i, 0.5, 1]}, index=index)
+        for i in range(3)
+    ]
+    elements = [
+        pd.DataFrame(
+            {"capacity": [i, 2 * i]},
+            index=pd.Index(["pv", f"wind-{i}"], name="name"),
+        )
+        for i in range(3)
+    ]
+
+    def write(package, write_elements, write_sequences):
+        building.write_elements(
+            "volatile.csv",
+            elements[0],
+            directory=str(tmp_path / package / "data" / "elements"),
+        )
+        write_elements("volatile.csv", elements[1], overwrite=True)
+        write_elements("volatile.csv", elements[2], overwrite=True)
+        for frame in columns:
+            write_sequences("volatile_profile.csv", frame)
+
+    def directory(name):
+        return str(tmp_path / "p" / "data" / name)
+
+    write(
+        "p",
+        lambda f, e, **kw: building.write_elements(
+            f, e, directory=directory("elements"), **kw
+        ),
+        lambda f, s: building.write_sequences(
+            f, s, directory=directory("sequences")
+        ),
+    )
+
+    path = tmp_path / "q" / "data" / "elements" / "volatile.csv"
+    with building.PackageWriter(
+        str(tmp_path / "q"), metadata={"foreign_keys": {}}
+    ) as writer:
+        write("q", writer.write_elements, writer.write_sequences)
+        before = path.read_bytes()
+        with pytest.raises(ValueError, match="profile-0"):
+            writer.write_sequences("volatile_profile.csv", columns[0])
+        with pytest.raises(ValueError, match="wind-2"):
+            writer.write_elements("volatile.csv", elements[2])
+        assert path.read_bytes() == before
+
+    for resource in [
+        "sequences/volatile_profile.csv",
+        "elements/volatile.csv",
+    ]:
+        assert (tmp_path / "q" / "data" / resource).read_bytes() == (
+            tmp_path / "p" / "data" / resource
+        ).read_bytes()
+    package = Package(str(tmp_path / "q" / "datapackage.json"))
+    assert package.get_resource("volatile_profile").schema.field_names == [
+        "timeindex",
+        "profile-0",
+        "profile-1",
+        "profile-2",
+    ]
@@ -1,9 +1,17 @@
+import oemof.network
 import oemof.solph
+import pytest
 from oemof.network.energy_system import EnergySystem
-from oemof.network.network import Bus
+from oemof.network.network import Bus, Node
 
 import oemof.tabular
-from oemof.tabular.facades import Reservoir
+from oemof.tabular import _facade
+from oemof.tabular.facades import (
+    Reservoir,
+    add_nodes,
+    build_facades,
+    remove_nodes,
+)
 
 
 def test_version_specification():
@@ -39,3 +47,132 @@ def test_adding_subnodes():
     es.add(reservoir)
     for sn in reservoir.subnodes:
         assert sn.label in es.groups
+
+
+def test_adding_nodes_in_bulk():
+    """`add_nodes` adds facades and their subnodes exactly once, without
+    a signal receiver per facade.
+    """
+    receivers = len(EnergySystem.signals[EnergySystem.add].receivers)
+    es = EnergySystem()
+    bus = Bus("bus")
+    reservoirs = [
+        Reservoir(
+            label="r{}".format(i),
+            bus=bus,
+            storage_capacity=1000,
+            capacity=50,
+            efficiency=0.93,
+            carrier="carrier",
+            tech="tech",
+            profile=[2, 3, 1],
+        )
+        for i in range(3)
+    ]
+    assert len(EnergySystem.signals[EnergySystem.add].receivers) == receivers
+    add_nodes(es, [bus, *reservoirs])
+    labels = [n.label for n in es.nodes]
+    assert sorted(labels) == sorted(
+        ["bus", "r0", "r1", "r2", "r0-inflow", "r1-inflow", "r2-inflow"]
+    )
+
+
+def test_adding_nodes_in_bulk_signals_receivers():
+    """Receivers of the `add` signal are called for every node added by
+    `add_nodes`, including subnodes, without adding subnodes twice.
+    """
+    added = []
+
+    def receiver(node, **kwargs):
+        added.append((node.label, kwargs["EnergySystem"]))
+
+    signal = EnergySystem.signals[EnergySystem.add]
+    signal.connect(receiver)
+    try:
+        es = EnergySystem()
+        bus = Bus("bus")
+        reservoir = Reservoir(
+            label="r",
+            bus=bus,
+            storage_capacity=1000,
+            capacity=50,
+            efficiency=0.93,
+            carrier="carrier",
+            tech="tech",
+            profile=[2, 3, 1],
+        )
+        add_nodes(es, [bus, reservoir])
+    finally:
+        signal.disconnect(receiver)
+    assert sorted(added) == [("bus", es), ("r", es), ("r-inflow", es)]
+    assert sorted(n.label for n in es.nodes) == ["bus", "r", "r-inflow"]
+
+
+def test_adding_subnodes_only_of_facades():
+    """Only the subnodes of facades are added along with a node."""
+    es = EnergySystem()
+    node = Node("node")
+    node.subnodes = [Node("subnode")]
+    es.add(node)
+    assert [n.label for n in es.nodes] == ["node"]
+
+
+def test_removing_nodes(monkeypatch):
+    """`remove_nodes` removes facades, their subnodes and their edges."""
+    assert oemof.network.__version__ in _facade.NETWORK_VERSIONS
+    es = EnergySystem()
+    bus = Bus("bus")
+    reservoir = Reservoir(
+        label="r",
+        bus=bus,
+        storage_capacity=1000,
+        capacity=50,
+        efficiency=0.93,
+        carrier="carrier",
+        tech="tech",
+        profile=[2, 3, 1],
+    )
+    add_nodes(es, [bus, reservoir])
+    assert "r-inflow" in es.groups
+
+    monkeypatch.setattr(_facade, "oemof_network_version", "0")
+    with pytest.raises(NotImplementedError, match="oemof.network 0"):
+        remove_nodes(es, [reservoir])
+    assert reservoir in bus.inputs and reservoir in es.nodes
+    monkeypatch.undo()
+
+    assert remove_nodes(es, [reservoir]) == {
+        reservoir,
+        *reservoir.subnodes,
+    }
+    assert [n.label for n in es.nodes] == ["bus"]
+    assert "r" not in es.groups and "r-inflow" not in es.groups
+    assert not bus.inputs and not bus.outputs
+
+
+def test_deferred_building():
+    """Facades created with `build_solph_components=False` are built by
+    `build_facades`, which adds their subnodes to the energy system.
+    """
+    es = EnergySystem()
+    bus = Bus("bus")
+    reservoir = Reservoir(
+        label="r",
+        bus=bus,
+        storage_capacity=1000,
+        capacity=50,
+        efficiency=0.93,
+        carrier="carrier",
+        tech="tech",
+        profile=[2, 3, 1],
+        build_solph_components=False,
+    )
+    es.add(bus, reservoir)
+    assert not reservoir.outputs
+    assert "r-inflow" not in es.groups
+    build_facades(es)
+    assert bus in reservoir.outputs
+    assert "r-inflow" in es.groups
+    nodes = len(es.nodes)
+    build_facades(es)
+    assert len(es.nodes) == nodes
@@ -0,0 +1,82 @@
+import filecmp
+import importlib.resources
+import os
+
+import pandas as pd
+import pytest
+from datapackage import Package
+from oemof.solph import EnergySystem
+
+from oemof.tabular.datapackage import building
+from oemof.tabular.datapackage.processing import copy_datapackage
+from oemof.tabular.facades import TYPEMAP
+
+EXAMPLES_DIR = os.path.join(
+    importlib.resources.files("oemof.tabular"), "examples/datapackages"
+)
+SOURCE = os.path.join(EXAMPLES_DIR, "dispatch", "datapackage.json")
+
+
+def test_copy_datapackage_links_files(tmp_path):
+    """Linked copies reuse the source's metadata and never change it."""
+    destination = copy_datapackage(
+        SOURCE,
+        str(tmp_path / "copy"),
+        subset="data",
+        link=True,
+        rewrite=["volatile_profile"],
+    )
+    source = Package(SOURCE)
+    copy = Package(os.path.join(destination, "datapackage.json"))
+    assert copy.descriptor["resources"] == [
+        r
+        for r in source.descriptor["resources"]
+        if r["name"] != "volatile_profile"
+    ]
+    assert not os.path.exists(
+        os.path.join(destination, "data", "sequences", "volatile_profile.csv")
+    )
+
+    load = os.path.join("data", "sequences", "load_profile.csv")
+    original = os.path.join(EXAMPLES_DIR, "dispatch", load)
+    with open(original, "rb") as f:
+        content = f.read()
+    assert filecmp.cmp(original, os.path.join(destination, load), False)
+    building.write_sequences(
+        "load_profile.csv",
+        pd.DataFrame(
+            {"electricity-load-profile": [1.0]},
+            index=pd.DatetimeIndex(["2011-01-01"]),
+        ),
+        directory=os.path.join(destination, "data", "sequences"),
+        replace=True,
+    )
+    with open(original, "rb") as f:
+        assert f.read() == content
+
+    copy = copy_datapackage(SOURCE, str(tmp_path / "full"), link=True)
+    es = EnergySystem.from_datapackage(
+        os.path.join(copy, "datapackage.json"), typemap=TYPEMAP
+    )
+    assert sorted(n.label for n in es.nodes) == sorted(
+        n.label
+        for n in EnergySystem.from_datapackage(SOURCE, typemap=TYPEMAP).nodes
+    )
+
+
+@pytest.mark.parametrize("link", [False, True])
+def test_aggregated_package_loads(tmp_path, link):
+    """Sequences written anew by the aggregation are described anew."""
+    pytest.importorskip("tsam.timeseriesaggregation")
+    from oemof.tabular.datapackage import aggregation
+
+    copy = aggregation.temporal_skip(SOURCE, 1, path=str(tmp_path), link=link)
+    es = EnergySystem.from_datapackage(
+        os.path.join(copy, "datapackage.json"), typemap=TYPEMAP
+    )
+    expected = EnergySystem.from_datapackage(SOURCE, typemap=TYPEMAP)
+    assert list(es.temporal["weighting"]) == [1, 1, 1]
+    for label in ["wind", "pv"]:
+        assert list(es.groups[label].profile) == list(
+            expected.groups[label].profile
+        )
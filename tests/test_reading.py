@@ -0,0 +1,726 @@
+import datetime
+import importlib.resources
+import os
+import shutil
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+from datapackage import Package, Resource, exceptions
+from oemof.network.energy_system import EnergySystem
+from oemof.solph import EnergySystem as SolphEnergySystem
+from oemof.solph import Model
+
+from oemof.tabular.datapackage import (
+    building,
+    incremental,
+    parallel,
+    reading,
+    sidecars,
+    timestamps,
+)
+from oemof.tabular.datapackage.cache import ResourceCache
+from oemof.tabular.facades import TYPEMAP, build_facades
+
+EXAMPLES_DIR = os.path.join(
+    importlib.resources.files("oemof.tabular"), "examples/datapackages"
+)
+
+
+def example_package(name):
+    return Package(os.path.join(EXAMPLES_DIR, name, "datapackage.json"))
+
+
+def sequence_resources(package):
+    return [
+        r
+        for r in package.resources
+        if r.descriptor["path"].startswith("data/sequences")
+    ]
+
+
+@pytest.mark.parametrize(
+    "example", ["dispatch", "foreignkeys", "investment_multi_period"]
+)
+def test_sequence_columns_match_datapackage(example):
+    """The columnar reader yields the values `datapackage` casts."""
+    for r in sequence_resources(example_package(example)):
+        columns = reading.sequence_columns(r)
+        assert columns is not None
+        for row_number, row in enumerate(r.read(keyed=True)):
+            for name, value in row.items():
+                if name == "timeindex":
+                    assert columns[name][row_number] == value
+                else:
+                    expected = (
+                        float(value) if isinstance(value, Decimal) else value
+                    )
+                    assert columns[name][row_number] == expected
+
+
+def test_sequence_columns_cast_error(tmp_path):
+    """Values which can't be cast raise a `CastError`."""
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "profile.csv").write_text(
+        "timeindex;wind\n2011-01-01T00:00:00Z;0.1\n2011-01-01T01:00:00Z;x\n"
+    )
+    package = Package(
+        {
+            "resources": [
+                {
+                    "name": "profile",
+                    "path": "data/profile.csv",
+                    "schema": {
+                        "fields": [
+                            {"name": "timeindex", "type": "datetime"},
+                            {"name": "wind", "type": "number"},
+                        ]
+                    },
+                }
+            ]
+        },
+        base_path=str(tmp_path),
+    )
+    with pytest.raises(exceptions.CastError):
+        reading.sequence_columns(package.get_resource("profile"))
+
+
+@pytest.mark.parametrize(
+    "example", ["dispatch", "foreignkeys", "investment_multi_period"]
+)
+def test_table_rows_match_datapackage(example):
+    """Rows are cast like `tableschema` does, but with floats."""
+    for r in example_package(example).resources:
+        rows = reading.table_rows(r)
+        assert rows == [
+            {
+                k: float(v) if isinstance(v, Decimal) else v
+                for k, v in row.items()
+            }
+            for row in r.read(keyed=True)
+        ]
+        assert not any(
+            isinstance(v, Decimal) for row in rows for v in row.values()
+        )
+
+
+def test_table_rows_errors(tmp_path):
+    shutil.copytree(os.path.join(EXAMPLES_DIR, "dispatch"), tmp_path / "p")
+    load = tmp_path / "p" / "data" / "elements" / "load.csv"
+    with open(load) as f:
+        content = f.read()
+    r = Package(str(tmp_path / "p" / "datapackage.json")).get_resource("load")
+
+    with open(load, "w") as f:
+        f.write(content + "demand0;1;electricity-load-profile;load;bus0\n")
+    with pytest.raises(exceptions.CastError, match="duplicates in row"):
+        reading.table_rows(r)
+
+    with open(load, "w") as f:
+        f.write(content.replace("5000", "lots"))
+    with pytest.raises(exceptions.CastError) as error:
+        reading.table_rows(r)
+    assert "lots" in str(error.value.errors[0])
+
+
+def test_sequences_returns_arrays():
+    """Sequences are handed out as NumPy arrays without the timeindex."""
+    timeindices = {}
+    for r in sequence_resources(example_package("dispatch")):
+        result = reading.sequences(r, timeindices)
+        assert "timeindex" not in result
+        assert all(isinstance(v, np.ndarray) for v in result.values())
+        assert len(timeindices[r.name]) == len(next(iter(result.values())))
+
+
+def test_resources_are_read_once(monkeypatch):
+    """Deserializing a package reads every resource at most once."""
+    reads = []
+    original_parse = reading.parse_resource
+
+    def parse(r, *args, **kwargs):
+        reads.append(r.name)
+        return original_parse(r, *args, **kwargs)
+
+    monkeypatch.setattr(reading, "parse_resource", parse)
+    EnergySystem.from_datapackage(
+        os.path.join(EXAMPLES_DIR, "dispatch", "datapackage.json"),
+        typemap=TYPEMAP,
+    )
+    assert reads
+    assert len(reads) == len(set(reads))
+
+
+def test_dangling_foreign_keys_are_reported_together(tmp_path):
+    """All dangling references of all element resources are reported."""
+    shutil.copytree(os.path.join(EXAMPLES_DIR, "dispatch"), tmp_path / "p")
+    elements = tmp_path / "p" / "data" / "elements"
+    for name, bus in (("volatile", "bus7"), ("load", "bus8")):
+        with open(elements / (name + ".csv")) as f:
+            content = f.read().replace(";bus1;", ";" + bus + ";", 1)
+            content = content.replace(";bus1\n", ";" + bus + "\n", 1)
+        with open(elements / (name + ".csv"), "w") as f:
+            f.write(content)
+    with pytest.raises(exceptions.LoadError) as error:
+        EnergySystem.from_datapackage(
+            str(tmp_path / "p" / "datapackage.json"), typemap=TYPEMAP
+        )
+    message = str(error.value)
+    assert "2 dangling" in message
+    assert "bus7 not found in `bus`" in message
+    assert "bus8 not found in `bus`" in message
+
+
+def test_relations_use_shared_indexes():
+    """Referenced resources are indexed once per package."""
+    package = example_package("dispatch")
+    reader = reading.PackageReader(package)
+    for r in package.resources:
+        if reading.in_directory(r, "data/elements"):
+            assert reader.read_related(r)
+    assert list(reader.indexes) == [("bus", ("name",))]
+    volatile = package.get_resource("volatile")
+    wind = next(
+        row for row in reader.read_related(volatile) if row["name"] == "wind"
+    )
+    assert wind["bus"]["name"] == "bus0"
+    wind = next(row for row in reader.read(volatile) if row["name"] == "wind")
+    assert wind["bus"] == "bus0"
+
+
+def test_reader_deserializes_more_than_once():
+    """A reader's rows aren't changed by deserializing its package."""
+    package = example_package("foreignkeys")
+    reader = reading.PackageReader(package)
+    rows = [
+        dict(row) for row in reader.read(package.get_resource("component"))
+    ]
+    systems = [
+        reading.deserialize_energy_system(
+            EnergySystem, None, TYPEMAP, reader=reader
+        )
+        for _ in range(2)
+    ]
+    assert reader.read(package.get_resource("component")) == rows
+    labels = [sorted(str(n.label) for n in es.nodes) for es in systems]
+    assert labels[0] == labels[1]
+    for es in systems:
+        for node in es.nodes:
+            for bus in getattr(node, "outputs", {}):
+                assert es.groups[bus.label] is bus
+
+
+def test_validate_reports_cast_errors(tmp_path):
+    """With `validate` set, cast errors of all resources are raised."""
+    shutil.copytree(os.path.join(EXAMPLES_DIR, "dispatch"), tmp_path / "p")
+    with open(tmp_path / "p" / "data" / "elements" / "load.csv", "a") as f:
+        f.write("broken;many;electricity-load-profile;load;bus0\n")
+    with pytest.raises(exceptions.CastError, match="`load`"):
+        EnergySystem.from_datapackage(
+            str(tmp_path / "p" / "datapackage.json"),
+            typemap=TYPEMAP,
+            validate=True,
+        )
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_parallel_loading(tmp_path, executor):
+    """Parsing resources concurrently yields the same energy system."""
+    path = os.path.join(EXAMPLES_DIR, "investment", "datapackage.json")
+    expected = EnergySystem.from_datapackage(path, typemap=TYPEMAP)
+    es = EnergySystem.from_datapackage(
+        path, typemap=TYPEMAP, workers=2, executor=executor
+    )
+    assert [n.label for n in es.nodes] == [n.label for n in expected.nodes]
+    assert list(es.groups["wind"].profile) == list(
+        expected.groups["wind"].profile
+    )
+
+    shutil.copytree(os.path.join(EXAMPLES_DIR, "dispatch"), tmp_path / "p")
+    with open(tmp_path / "p" / "data" / "elements" / "load.csv", "a") as f:
+        f.write("broken;many;electricity-load-profile;load;bus0\n")
+    with pytest.raises(exceptions.CastError, match="`load`"):
+        EnergySystem.from_datapackage(
+            str(tmp_path / "p" / "datapackage.json"),
+            typemap=TYPEMAP,
+            validate=True,
+            workers=2,
+            executor=executor,
+        )
+
+
+def test_lazy_loading():
+    """Lazily loaded facades are built only once asked to."""
+    path = os.path.join(EXAMPLES_DIR, "dispatch", "datapackage.json")
+    es = EnergySystem.from_datapackage(path, typemap=TYPEMAP, lazy=True)
+    wind = es.groups["wind"]
+    assert not wind.solph_components_built and not wind.outputs
+    es.nodes.remove(es.groups["pv"])
+    build_facades(es)
+    assert wind.solph_components_built and wind.outputs
+    assert not es.groups["pv"].outputs
+
+
+@pytest.mark.parametrize("example", ["dispatch", "foreignkeys"])
+def test_lazy_loading_builds_model(tmp_path, example):
+    """Models of lazily loaded and then built energy systems equal those
+    of eager ones."""
+    path = os.path.join(EXAMPLES_DIR, example, "datapackage.json")
+    lines = []
+    for lazy in [False, True]:
+        es = SolphEnergySystem.from_datapackage(
+            path, typemap=TYPEMAP, lazy=lazy
+        )
+        build_facades(es)
+        lp = str(tmp_path / f"{lazy}.lp")
+        Model(es).write(lp, io_options={"symbolic_solver_labels": True})
+        with open(lp) as f:
+            lines.append(sorted(f.read().splitlines()))
+    assert lines[0] == lines[1]
+
+
+def test_parallel_run_keeps_order():
+    futures = parallel.run(divmod, [(7, 2), (1, 0), (9, 3)], workers=2)
+    assert futures[0].result() == (3, 1)
+    with pytest.raises(ZeroDivisionError):
+        futures[1].result()
+    assert futures[2].result() == (3, 0)
+    with pytest.raises(ValueError):
+        parallel.pool("fibers")
+
+
+def test_cached_package_loads_from_cache(tmp_path, monkeypatch):
+    """A cached package is loaded without parsing its resources again."""
+    path = os.path.join(EXAMPLES_DIR, "dispatch", "datapackage.json")
+    cache = ResourceCache(tmp_path / "cache")
+    EnergySystem.from_datapackage(path, typemap=TYPEMAP, cache=cache)
+    assert cache.size() > 0
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Resource parsed despite being cached.")
+
+    monkeypatch.setattr(Resource, "read", fail)
+    monkeypatch.setattr(reading, "sequence_data", fail)
+    monkeypatch.setattr(reading, "table_rows", fail)
+    es = EnergySystem.from_datapackage(path, typemap=TYPEMAP, cache=cache)
+    assert len(es.nodes) == 15
+
+
+def test_cached_rows_keep_their_types(tmp_path):
+    """Rows are cached as JSON, keeping the types of their values."""
+    r = example_package("dispatch").get_resource("bus")
+    cache = ResourceCache(tmp_path)
+    rows = [
+        {
+            "name": "bus0",
+            "balanced": True,
+            "amount": Decimal("1.50"),
+            "count": 3,
+            "share": 0.5,
+            "start": datetime.datetime(2020, 1, 1, 12),
+            "day": datetime.date(2020, 1, 1),
+            "output_parameters": {"max": [Decimal("1"), None]},
+            "tags": ["a", {"object": 1}],
+            "missing": None,
+        }
+    ]
+    cache.store_rows(r, rows)
+    assert [e.name.endswith(".json") for e in os.scandir(tmp_path)] == [True]
+    loaded = cache.load_rows(r)
+    assert loaded == rows
+    assert [type(v) for v in loaded[0].values()] == [
+        type(v) for v in rows[0].values()
+    ]
+
+    cache.clear()
+    cache.store_rows(r, [{"name": "bus0", "location": (1, 2)}])
+    assert cache.load_rows(r) is None
+
+
+def test_cache_eviction(tmp_path):
+    """The cache is shrunk below its maximum size."""
+    r = example_package("dispatch").get_resource("load_profile")
+    cache = ResourceCache(tmp_path, max_size=0)
+    cache.store_columns(r, reading.sequence_data(r))
+    assert cache.size() == 0
+    assert cache.load_columns(r) is None
+
+
+@pytest.mark.parametrize("extension", ["parquet", "arrow"])
+def test_columnar_package(tmp_path, extension):
+    """Packages with Parquet/Arrow resources load like their CSV source."""
+    pytest.importorskip("pyarrow")
+    source = os.path.join(EXAMPLES_DIR, "dispatch", "datapackage.json")
+    for r in Package(source).resources:
+        name = "{}.{}".format(r.name, extension)
+        df = pd.DataFrame(r.read(keyed=True))
+        if r.descriptor["path"].startswith("data/sequences"):
+            building.write_sequences(
+                name,
+                df.set_index("timeindex").astype(float),
+                directory=str(tmp_path / "data" / "sequences"),
+            )
+        else:
+            building.write_elements(
+                name,
+                df.set_index("name").dropna(axis=1, how="all"),
+                directory=str(tmp_path / "data" / "elements"),
+            )
+    building.infer_metadata(
+        path=str(tmp_path),
+        foreign_keys={
+            "bus": ["volatile", "dispatchable", "storage", "load"],
+            "profile": ["load", "volatile"],
+            "from_to_bus": ["link"],
+        },
+    )
+
+    expected = EnergySystem.from_datapackage(source, typemap=TYPEMAP)
+    es = EnergySystem.from_datapackage(
+        str(tmp_path / "datapackage.json"), typemap=TYPEMAP
+    )
+    assert sorted(n.label for n in es.nodes) == sorted(
+        n.label for n in expected.nodes
+    )
+    assert es.timeindex.equals(expected.timeindex)
+    wind = es.groups["wind"]
+    assert list(wind.profile) == list(expected.groups["wind"].profile)
+
+
+def test_mmap_sequences(tmp_path):
+    """Profiles are read-only views into memory-mapped sidecars."""
+    shutil.copytree(os.path.join(EXAMPLES_DIR, "dispatch"), tmp_path / "p")
+    path = str(tmp_path / "p" / "datapackage.json")
+    expected = EnergySystem.from_datapackage(path, typemap=TYPEMAP)
+    for _ in range(2):
+        es = EnergySystem.from_datapackage(
+            path, typemap=TYPEMAP, mmap_sequences=True
+        )
+        profile = es.groups["wind"].profile
+        assert isinstance(profile, np.memmap)
+        assert not profile.flags.writeable
+        assert list(profile) == list(expected.groups["wind"].profile)
+    assert (
+        tmp_path / "p" / "data" / "sequences" / "load_profile.npy"
+    ).exists()
+
+    # Sidecars are ignored once the resource they belong to has changed,
+    # even if it is older than its sidecars, but not if it was only touched.
+    r = Package(path).get_resource("volatile_profile")
+    os.utime(r.source, ns=(2**62, 2**62))
+    assert sidecars.load(r) is not None
+    fields = r.descriptor["schema"]["fields"]
+    fields[1:] = fields[:0:-1]
+    assert sidecars.load(r) is None
+
+    r = Package(path).get_resource("volatile_profile")
+    with open(r.source) as f:
+        content = f.read()
+    with open(r.source, "w") as f:
+        f.write(content.replace("0.1", "0.2", 1))
+    os.utime(r.source, ns=(0, 0))
+    assert sidecars.load(r) is None
+
+
+@pytest.mark.parametrize(
+    "window", [slice(10, 58), ("2050-01-01 10:00", "2050-01-03 09:00")]
+)
+def test_time_window(window):
+    """Only the timesteps in the time window are loaded."""
+    path = os.path.join(EXAMPLES_DIR, "investment", "datapackage.json")
+    expected = EnergySystem.from_datapackage(path, typemap=TYPEMAP)
+    es = EnergySystem.from_datapackage(
+        path, typemap=TYPEMAP, time_window=window
+    )
+    assert es.timeindex[0] == expected.timeindex[10]
+    assert len(es.groups["wind"].profile) == 48
+    assert list(es.groups["wind"].profile) == list(
+        expected.groups["wind"].profile[10:58]
+    )
+    with pytest.raises(ValueError, match="any timestep"):
+        EnergySystem.from_datapackage(
+            path, typemap=TYPEMAP, time_window=("2049", "2049")
+        )
+
+
+@pytest.mark.parametrize("window", [None, ("2050-01-01 10:00", "2050-01-03")])
+def test_epoch_timeindex(tmp_path, window):
+    """Sequences indexed by seconds since the epoch load like ISO ones."""
+    shutil.copytree(os.path.join(EXAMPLES_DIR, "investment"), tmp_path / "p")
+    path = str(tmp_path / "p" / "datapackage.json")
+    expected = EnergySystem.from_datapackage(
+        path, typemap=TYPEMAP, time_window=window
+    )
+
+    package = Package(path)
+    for resource in package.descriptor["resources"]:
+        if "/sequences/" not in resource["path"]:
+            continue
+        csv = tmp_path / "p" / resource["path"]
+        df = pd.read_csv(csv)
+        df["timeindex"] = timestamps.to_epoch(
+            timestamps.parse_iso(df["timeindex"])
+        )
+        df.to_csv(csv, index=False)
+        resource["schema"]["fields"][0] = {
+            "name": "timeindex",
+            "type": "integer",
+        }
+    package.commit()
+    package.save(path)
+
+    es = EnergySystem.from_datapackage(
+        path, typemap=TYPEMAP, time_window=window
+    )
+    assert es.timeindex.equals(expected.timeindex)
+    assert list(es.groups["wind"].profile) == list(
+        expected.groups["wind"].profile
+    )
+    with pytest.raises(ValueError, match="format"):
+        timestamps.parse_iso(["2050-01-01", "2050-01-01T01:00:00Z"])
+
+
+@pytest.mark.parametrize("window", [slice(0, 1), slice(1, 3)])
+def test_short_time_window(window):
+    """Windows too short to infer a frequency from get the full one's."""
+    path = os.path.join(EXAMPLES_DIR, "dispatch", "datapackage.json")
+    es = SolphEnergySystem.from_datapackage(
+        path, typemap=TYPEMAP, time_window=window
+    )
+    assert es.timeindex.freq == "h"
+    assert len(Model(es).TIMESTEPS) == window.stop - window.start
+
+    path = os.path.join(
+        EXAMPLES_DIR,
+        "dispatch_multi_period_periodic_values",
+        "datapackage.json",
+    )
+    es = SolphEnergySystem.from_datapackage(
+        path, typemap=TYPEMAP, time_window=slice(1, 5)
+    )
+    assert [len(period) for period in es.periods] == [2, 2]
+    assert all(period.freq == "h" for period in es.periods)
+
+
+def test_time_window_drops_periods():
+    """Values given per period are cut to the periods in the window."""
+    path = os.path.join(
+        EXAMPLES_DIR,
+        "dispatch_multi_period_periodic_values",
+        "datapackage.json",
+    )
+    es = EnergySystem.from_datapackage(
+        path, typemap=TYPEMAP, time_window=("2035", None)
+    )
+    assert len(es.timeindex) == 6
+    assert list(es.groups["wind"].marginal_cost) == [1, 1, 1, 0, 0, 0]
+
+
+def test_window_slice_reads_few_timestamps():
+    """Bounds are found by bisection, partial dates cover whole periods."""
+    looked_up = []
+
+    class Timeindex(list):
+        def __getitem__(self, i):
+            looked_up.append(i)
+            return super().__getitem__(i)
+
+    timeindex = Timeindex(pd.date_range("2020", periods=8760, freq="h"))
+    assert reading.window_slice(timeindex, ("2020-03", "2020-03")) == slice(
+        1440, 2184
+    )
+    assert len(looked_up) < 40
+    assert reading.window_slice(timeindex, slice(-24, None)) == slice(
+        8736, 8760
+    )
+
+
+def test_row_filter():
+    keep = reading.RowFilter(
+        {"name": ["DE-*", "FR-wind"], "capacity": lambda c: c > 10}
+    )
+    assert keep({"name": "DE-pv", "capacity": 20})
+    assert keep({"name": "FR-wind", "capacity": 20})
+    assert not keep({"name": "FR-pv", "capacity": 20})
+    assert not keep({"name": "DE-pv", "capacity": 5})
+    assert not keep({"name": "DE-pv"})
+
+
+@pytest.mark.parametrize("executor", [None, "process"])
+def test_filtered_loading(executor):
+    """Only matching elements, their buses and their profiles are loaded."""
+    path = os.path.join(EXAMPLES_DIR, "dispatch", "datapackage.json")
+    es = EnergySystem.from_datapackage(
+        path,
+        typemap=TYPEMAP,
+        filters={"type": "volatile", "bus": "bus1"},
+        workers=executor and 2,
+        executor=executor or "process",
+    )
+    assert sorted(n.label for n in es.nodes) == ["bus1", "pv"]
+    assert es.groups["pv"].bus is es.groups["bus1"]
+
+    package = example_package("dispatch")
+    reader = reading.PackageReader(package, filters={"carrier": "wind"})
+    reader.usecols = reader.referenced_columns(
+        r
+        for r in package.resources
+        if r.descriptor["path"].startswith("data/elements")
+    )
+    assert reader.usecols == {
+        "load_profile": set(),
+        "volatile_profile": {"wind-profile"},
+    }
+    assert list(
+        reader.sequences(package.get_resource("volatile_profile"))
+    ) == ["wind-profile"]
+
+
+def test_filters_selecting_nothing():
+    """Filters which don't select any element raise."""
+    path = os.path.join(
+        EXAMPLES_DIR, "dispatch_multi_period", "datapackage.json"
+    )
+    with pytest.raises(ValueError, match="don't select any element"):
+        EnergySystem.from_datapackage(
+            path, typemap=TYPEMAP, filters={"name": "DE-*"}
+        )
+
+
+def test_table_rows_skip_filtered_rows(tmp_path):
+    """Rows which don't match are skipped without being cast."""
+    shutil.copytree(os.path.join(EXAMPLES_DIR, "dispatch"), tmp_path / "p")
+    load = tmp_path / "p" / "data" / "elements" / "load.csv"
+    with open(load) as f:
+        content = f.read()
+    with open(load, "w") as f:
+        f.write(content.replace("5000", "lots"))
+    r = Package(str(tmp_path / "p" / "datapackage.json")).get_resource("load")
+    rows = reading.table_rows(r, reading.RowFilter({"bus": "bus1"}))
+    assert [row["name"] for row in rows] == ["demand1"]
+
+
+def test_incremental_reload(tmp_path):
+    """Only edited elements and the elements referencing them are rebuilt."""
+    shutil.copytree(os.path.join(EXAMPLES_DIR, "dispatch"), tmp_path / "p")
+    elements = tmp_path / "p" / "data" / "elements"
+    loader = incremental.IncrementalLoader(
+        EnergySystem, str(tmp_path / "p" / "datapackage.json"), TYPEMAP
+    )
+    es = loader.load()
+    wind, pv, bus0 = es.groups["wind"], es.groups["pv"], es.groups["bus0"]
+
+    assert loader.reload() == (es, incremental.ChangeSet())
+
+    volatile = (elements / "volatile.csv").read_text()
+    (elements / "volatile.csv").write_text(volatile.replace(";50;", ";60;"))
+    reloaded, changes = loader.reload()
+    assert reloaded is es and not changes.full
+    assert changes.resources == {"volatile"}
+    assert changes.modified == changes.rebuilt == {"wind"}
+    assert es.groups["wind"] is not wind and es.groups["wind"].capacity == 60
+    assert es.groups["pv"] is pv and es.groups["bus0"] is bus0
+    assert wind not in es.nodes and wind not in bus0.inputs
+    assert es.groups["wind"] in bus0.inputs
+
+    bus = (elements / "bus.csv").read_text()
+    (elements / "bus.csv").write_text(bus.replace("bus1;bus;true\n", ""))
+    with pytest.raises(exceptions.LoadError, match="bus1"):
+        loader.reload()
+    (elements / "bus.csv").write_text(bus)
+    es, changes = loader.reload()
+    assert changes.full
+
+    (elements / "bus.csv").write_text(bus.replace("true", "false", 1))
+    (elements / "volatile.csv").write_text(volatile.replace("pv;", "solar;"))
+    es, changes = loader.reload()
+    assert not changes.full
+    assert changes.added == {"solar"} and changes.removed == {"pv"}
+    assert changes.modified == {"bus0", "wind"}
+    assert {"wind", "demand0", "solar"} <= changes.rebuilt
+    assert "demand1" not in changes.rebuilt
+    assert es.groups["wind"].bus is es.groups["bus0"]
+    assert not es.groups["bus0"].balanced
+    assert "pv" not in es.groups
+
+
+def test_overlay(tmp_path):
+    """Overlays change rows and columns of their parent, sharing the rest."""
+    parent = os.path.join(EXAMPLES_DIR, "dispatch", "datapackage.json")
+    profiles = pd.read_csv(
+        os.path.join(
+            EXAMPLES_DIR,
+            "dispatch",
+            "data",
+            "sequences",
+            "volatile_profile.csv",
+        ),
+        index_col="timeindex",
+        parse_dates=True,
+    )
+    building.write_elements(
+        "volatile.csv",
+        pd.DataFrame(
+            {
+                "capacity": [60, 10],
+                "bus": [None, "bus1"],
+                "carrier": [None, "solar"],
+                "profile": [None, "pv-profile"],
+                "tech": [None, "pv"],
+                "type": [None, "volatile"],
+            },
+            index=pd.Index(["wind", "solar"], name="name"),
+        ),
+        directory=str(tmp_path / "data" / "elements"),
+    )
+    building.write_sequences(
+        "volatile_profile.csv",
+        profiles[["wind-profile"]] / 2,
+        directory=str(tmp_path / "data" / "sequences"),
+    )
+    building.infer_metadata(
+        path=str(tmp_path), foreign_keys={}, parent=os.path.relpath(parent)
+    )
+
+    shared = reading.PackageReader(Package(parent))
+    child = reading.PackageReader(
+        Package(str(tmp_path / "datapackage.json")), parent=shared
+    )
+    es = reading.deserialize_energy_system(
+        EnergySystem, None, TYPEMAP, reader=child
+    )
+    assert es.groups["wind"].capacity == 60
+    assert es.groups["wind"].marginal_cost == 0
+    assert es.groups["wind"].carrier == "wind"
+    assert es.groups["solar"].bus is es.groups["bus1"]
+    assert list(es.groups["wind"].profile) == list(
+        profiles["wind-profile"] / 2
+    )
+    assert list(es.groups["pv"].profile) == list(profiles["pv-profile"])
+
+    es = reading.deserialize_energy_system(
+        EnergySystem, None, TYPEMAP, reader=shared
+    )
+    assert es.groups["wind"].capacity == 50 and "solar" not in es.groups
+    assert list(es.groups["wind"].profile) == list(profiles["wind-profile"])
+
+
+def test_periodic_and_yearly_values():
+    lengths = np.array([3, 2])
+    values = reading.create_periodic_values([Decimal("1.5"), 2], lengths)
+    assert values.dtype == np.float64
+    assert list(values) == [1.5, 1.5, 1.5, 2, 2]
+    with pytest.raises(ValueError):
+        reading.create_periodic_values([1, 2, 3], lengths)
+
+    spans = reading.year_spans([2020, 2023, 2025])
+    assert list(spans) == [3, 2, 1]
+    assert list(reading.create_yearly_values([1, 2, 3], spans)) == [
+        1,
+        1,
+        1,
+        2,
+        2,
+        3,
+    ]
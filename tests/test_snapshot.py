@@ -0,0 +1,65 @@
+import importlib.resources
+import json
+import os
+
+import numpy as np
+import pytest
+from oemof.solph import EnergySystem, Model
+
+from oemof.tabular.constraint_facades import CONSTRAINT_TYPE_MAP
+from oemof.tabular.datapackage import snapshot
+from oemof.tabular.facades import TYPEMAP
+
+EXAMPLES_DIR = os.path.join(
+    importlib.resources.files("oemof.tabular"), "examples/datapackages"
+)
+
+
+def lp(es, path, package):
+    model = Model(es)
+    model.add_constraints_from_datapackage(
+        package, constraint_type_map=CONSTRAINT_TYPE_MAP
+    )
+    model.write(str(path), io_options={"symbolic_solver_labels": True})
+    with open(path) as f:
+        return sorted(f.read().splitlines())
+
+
+@pytest.mark.parametrize(
+    "example", ["dispatch_multi_period", "emission_constraint", "investment"]
+)
+def test_snapshot_roundtrip(tmp_path, example):
+    """Restored energy systems yield the same models as the original ones."""
+    package = os.path.join(EXAMPLES_DIR, example, "datapackage.json")
+    es = EnergySystem.from_datapackage(package, typemap=TYPEMAP)
+    es.to_snapshot(str(tmp_path / "es.snapshot"))
+    restored = EnergySystem.from_snapshot(str(tmp_path / "es.snapshot"))
+
+    assert [n.label for n in restored.nodes] == [n.label for n in es.nodes]
+    assert restored.timeindex.equals(es.timeindex)
+    assert (restored.periods is None) == (es.periods is None)
+    assert lp(restored, tmp_path / "a.lp", package) == lp(
+        es, tmp_path / "b.lp", package
+    )
+
+
+def test_snapshot_arrays_and_versions(tmp_path):
+    """Sequences are restored as arrays and stale snapshots are rejected."""
+    package = os.path.join(EXAMPLES_DIR, "dispatch", "datapackage.json")
+    es = EnergySystem.from_datapackage(package, typemap=TYPEMAP)
+    path = str(tmp_path / "es.snapshot")
+    snapshot.write_snapshot(es, path)
+    restored = snapshot.read_snapshot(EnergySystem, path)
+    profile = restored.groups["wind"].profile
+    assert isinstance(profile, np.ndarray)
+    assert np.array_equal(profile, es.groups["wind"].profile)
+
+    with open(path, "rb") as f:
+        content = f.read()
+    line, rest = content.split(b"\n", 1)
+    metadata = dict(json.loads(line), oemof_tabular_version="0.0.1")
+    stale = json.dumps(metadata).encode().ljust(len(line))
+    with open(path, "wb") as f:
+        f.write(stale + b"\n" + rest)
+    with pytest.raises(ValueError, match="0.0.1"):
+        snapshot.read_snapshot(EnergySystem, path)
@@ -0,0 +1,83 @@
+import importlib.resources
+import os
+import shutil
+
+import pandas as pd
+import pytest
+from oemof.solph import EnergySystem, Model
+
+from oemof.tabular.datapackage import building, updating
+from oemof.tabular.facades import TYPEMAP
+
+EXAMPLES_DIR = os.path.join(
+    importlib.resources.files("oemof.tabular"), "examples/datapackages"
+)
+
+
+def lp(model, path):
+    model.write(str(path), io_options={"symbolic_solver_labels": True})
+    with open(path) as f:
+        return sorted(f.read().splitlines())
+
+
+def test_update_from_datapackage(tmp_path):
+    """Updating a model yields the model built from the changed package."""
+    shutil.copytree(os.path.join(EXAMPLES_DIR, "dispatch"), tmp_path / "p")
+    path = str(tmp_path / "p" / "datapackage.json")
+    model = Model(EnergySystem.from_datapackage(path, typemap=TYPEMAP))
+    profiles = pd.read_csv(
+        tmp_path / "p" / "data" / "sequences" / "volatile_profile.csv",
+        index_col="timeindex",
+        parse_dates=True,
+    )
+
+    building.write_elements(
+        "volatile.csv",
+        pd.DataFrame(
+            {"capacity": [60], "marginal_cost": [3], "profile": ["wind"]},
+            index=pd.Index(["wind"], name="name"),
+        ),
+        directory=str(tmp_path / "delta" / "data" / "elements"),
+    )
+    building.write_sequences(
+        "volatile_profile.csv",
+        profiles[["pv-profile"]].rename(columns={"pv-profile": "wind"}),
+        directory=str(tmp_path / "delta" / "data" / "sequences"),
+    )
+    building.infer_metadata(
+        path=str(tmp_path / "delta"),
+        foreign_keys={"profile": ["volatile"]},
+    )
+    model.update_from_datapackage(str(tmp_path / "delta" / "datapackage.json"))
+    assert model.es.groups["wind"].capacity == 60
+
+    volatile = tmp_path / "p" / "data" / "elements" / "volatile.csv"
+    volatile.write_text(
+        volatile.read_text().replace(
+            "wind;volatile;wind;onshore;50;;bus0;0;wind-profile",
+            "wind;volatile;wind;onshore;60;;bus0;3;pv-profile",
+        )
+    )
+    expected = Model(EnergySystem.from_datapackage(path, typemap=TYPEMAP))
+    assert lp(model, tmp_path / "a.lp") == lp(expected, tmp_path / "b.lp")
+
+
+def test_update_model_rejects_structural_changes():
+    """Changes entering constraints raise before anything is changed."""
+    path = os.path.join(EXAMPLES_DIR, "investment", "datapackage.json")
+    model = Model(EnergySystem.from_datapackage(path, typemap=TYPEMAP))
+    wind = model.es.groups["wind"]
+    with pytest.raises(ValueError, match="`existing` of `wind`"):
+        updating.update_model(
+            model, {"coal-st": {"marginal_cost": 1}, "wind": {"capacity": 10}}
+        )
+    assert model.es.groups["coal-st"].marginal_cost == 40
+    assert wind.capacity == 0
+    with pytest.raises(ValueError, match="rebuilt"):
+        updating.update_model(model, {"wind": {"bus": "bus1"}})
+    with pytest.raises(ValueError, match="no facade `nowhere`"):
+        updating.update_model(model, {"nowhere": {"capacity": 1}})
+
+    updating.update_model(model, {"wind": {"capacity_cost": 60}})
+    flow = model.flows[wind, model.es.groups["bus0"]]
+    assert wind.capacity_cost == 60 and flow.investment.ep_costs[0] == 60